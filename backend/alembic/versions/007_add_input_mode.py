@@ -0,0 +1,28 @@
+"""add input mode to whatsapp connection
+
+Revision ID: 007_add_input_mode
+Revises: 006_add_whatsapp_groups
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '007_add_input_mode'
+down_revision = '006_add_whatsapp_groups'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Typing strategy per connection: char (default), chunk, paste
+    op.add_column(
+        'whatsapp_connections',
+        sa.Column('input_mode', sa.String(10), nullable=False, server_default='char')
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('whatsapp_connections', 'input_mode')
@@ -0,0 +1,28 @@
+"""add preview latency to offer logs
+
+Revision ID: 008_add_offer_preview_ms
+Revises: 007_add_input_mode
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '008_add_offer_preview_ms'
+down_revision = '007_add_input_mode'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Time until the link preview appeared (or the deadline expired)
+    op.add_column(
+        'offer_logs',
+        sa.Column('preview_ms', sa.Integer(), nullable=True)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('offer_logs', 'preview_ms')
@@ -7,7 +7,7 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from core.config import settings
-from core.database import get_db
+from core.database import AsyncSessionLocal, get_db
 from models.user import User
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_PREFIX}/users/login")
@@ -45,3 +45,14 @@ async def get_current_user(
         raise credentials_exception
         
     return user
+
+
+async def get_current_user_detached(token: str = Depends(oauth2_scheme)) -> User:
+    """
+    Igual a get_current_user, com uma sessão própria já fechada ao retornar.
+    
+    Para respostas longas (SSE): com Depends(get_db) a sessão e a conexão
+    do pool ficariam presas até o fim do stream.
+    """
+    async with AsyncSessionLocal() as db:
+        return await get_current_user(token, db)
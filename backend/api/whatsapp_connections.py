@@ -7,26 +7,31 @@ Endpoints:
 - POST /api/v1/connections - Create new connection (triggers Worker)
 - GET /api/v1/connections - List all connections
 - GET /api/v1/connections/{id} - Get connection details
-- GET /api/v1/connections/{id}/qr - Get QR Code from DB (no Playwright)
+- GET /api/v1/connections/{id}/qr - Get QR Code from Redis (no Playwright)
 - GET /api/v1/connections/{id}/status - Get connection status from DB
+- GET /api/v1/connections/{id}/events - Stream status/QR updates (SSE)
 - GET /api/v1/connections/{id}/stats - Get connection statistics
 - PATCH /api/v1/connections/{id} - Update connection config
 - DELETE /api/v1/connections/{id} - Delete connection
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
 from typing import List
 from datetime import datetime, timedelta
 import uuid
 import json
+import time
 
-from core.database import get_db
+from core.database import AsyncSessionLocal, get_db
 from core.redis_client import redis_client
-from api.deps import get_current_user
+from api.deps import get_current_user, get_current_user_detached
 from models.user import User
 from models.whatsapp_connection import WhatsAppConnection
 from models.offer_log import OfferLog
+from services.whatsapp.qr_store import QR_TTL_SECONDS, claim_regeneration, get_qr
+from services.whatsapp.connection_events import events_channel
 from schemas.whatsapp_connection import (
     ConnectionCreate,
     ConnectionUpdate,
@@ -71,6 +76,7 @@ async def create_connection(
         min_interval_per_group=data.min_interval_per_group,
         min_interval_global=data.min_interval_global,
         max_messages_per_day=data.max_messages_per_day,
+        input_mode=data.input_mode,
         plan_name=data.plan_name,
         max_source_groups=data.max_source_groups,
         max_destination_groups=data.max_destination_groups
@@ -166,11 +172,12 @@ async def update_connection(
     update_data = data.dict(exclude_unset=True)
     
     for field, value in update_data.items():
-        if field in ["source_groups", "destination_groups"] and value is not None:
-            # Convert to dict format
-            setattr(connection, field, [g.dict() for g in value])
-        else:
-            setattr(connection, field, value)
+        if value is None:
+            # Explicit null means "leave as is": none of these columns accept NULL
+            continue
+        
+        # Groups are already plain dicts here (.dict() converts nested models)
+        setattr(connection, field, value)
     
     connection.updated_at = datetime.utcnow()
     
@@ -225,7 +232,8 @@ async def get_qr_code(
     """
     Get QR Code for WhatsApp authentication.
     
-    Returns QR Code from database (generated by Worker).
+    Returns QR Code from Redis (published by Worker only when it changes,
+    with a short TTL - an expired key means the Worker stopped refreshing it).
     
     Status Codes:
     - 200: QR Code available
@@ -248,19 +256,18 @@ async def get_qr_code(
             detail="Connection not found"
         )
     
-    # Check if QR Code is available
-    if not connection.qr_code_base64:
-        # Worker hasn't generated QR yet
-        raise HTTPException(
-            status_code=status.HTTP_202_ACCEPTED,
-            detail=f"QR code being generated (status: {connection.status}), try again in 2 seconds"
-        )
-    
-    # Check if QR expired (>60 seconds)
-    if connection.qr_generated_at:
-        age = (datetime.utcnow() - connection.qr_generated_at).total_seconds()
-        if age > 60:
-            # Request new QR from Worker (FIXED: .client.publish)
+    qr = await get_qr(redis_client.client, str(connection.id))
+    
+    if not qr:
+        # QR expired or not generated yet. If the Worker has been showing the
+        # QR screen for a while, ask it to reload (at most once per cooldown)
+        waiting = (datetime.utcnow() - connection.updated_at).total_seconds()
+        
+        if (
+            connection.status == "qr_needed"
+            and waiting > QR_TTL_SECONDS
+            and await claim_regeneration(redis_client.client, str(connection.id))
+        ):
             await redis_client.client.publish(
                 "whatsapp:commands",
                 json.dumps({
@@ -268,14 +275,15 @@ async def get_qr_code(
                     "connection_id": str(connection.id)
                 })
             )
-            raise HTTPException(
-                status_code=status.HTTP_202_ACCEPTED,
-                detail="QR expired, regenerating... try again in 2 seconds"
-            )
+        
+        raise HTTPException(
+            status_code=status.HTTP_202_ACCEPTED,
+            detail=f"QR code being generated (status: {connection.status}), try again in 2 seconds"
+        )
     
-    # Return QR Code from database
+    # Return QR Code from Redis
     return QRCodeResponse(
-        qr_code=connection.qr_code_base64,
+        qr_code=qr["qr_code"],
         instance_id=str(connection.id),
         status=connection.status
     )
@@ -319,6 +327,102 @@ async def get_connection_status(
     )
 
 
+# Comment line sent when the stream is idle (keeps proxies from closing it)
+SSE_HEARTBEAT_SECONDS = 15
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@router.get("/{connection_id}/events")
+async def stream_connection_events(
+    connection_id: uuid.UUID,
+    request: Request,
+    current_user: User = Depends(get_current_user_detached)
+):
+    """
+    Stream connection status transitions and new QR frames (Server-Sent Events).
+    
+    Replaces polling /qr and /status: the Worker publishes to
+    whatsapp:events:{id} and this endpoint forwards each message.
+    
+    Events:
+    - status: {"status": "..."}
+    - qr: {"qr_code": "...", "hash": "..."}
+    
+    The current status (and QR, if any) is sent first, so clients that
+    connect mid-login don't wait for the next transition.
+    
+    No DB session lives as long as the stream: auth, ownership and the
+    snapshot use short sessions that are closed before the response starts.
+    """
+    async with AsyncSessionLocal() as db:
+        owned_id = await db.scalar(
+            select(WhatsAppConnection.id).where(
+                WhatsAppConnection.id == connection_id,
+                WhatsAppConnection.user_id == current_user.id
+            )
+        )
+        
+        if not owned_id:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Connection not found"
+            )
+        
+        conn_id = str(owned_id)
+        
+        # Subscribe before reading the snapshot so no transition falls in between
+        pubsub = redis_client.client.pubsub()
+        await pubsub.subscribe(events_channel(conn_id))
+        
+        try:
+            snapshot_status = await db.scalar(
+                select(WhatsAppConnection.status).where(WhatsAppConnection.id == owned_id)
+            )
+            qr = await get_qr(redis_client.client, conn_id)
+        except Exception:
+            await pubsub.aclose()
+            raise
+    
+    async def event_stream():
+        try:
+            yield _sse("status", {"status": snapshot_status})
+            if qr:
+                yield _sse("qr", {"qr_code": qr["qr_code"], "hash": qr["hash"]})
+            
+            last_sent = time.monotonic()
+            
+            while not await request.is_disconnected():
+                message = await pubsub.get_message(
+                    ignore_subscribe_messages=True,
+                    timeout=1.0
+                )
+                
+                if message:
+                    event = json.loads(message["data"])
+                    yield _sse(event.pop("type"), event)
+                    last_sent = time.monotonic()
+                
+                elif time.monotonic() - last_sent > SSE_HEARTBEAT_SECONDS:
+                    yield ": keepalive\n\n"
+                    last_sent = time.monotonic()
+        
+        finally:
+            await pubsub.unsubscribe()
+            await pubsub.aclose()
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # nginx: don't buffer the stream
+        }
+    )
+
+
 # ============================================================================
 # STATISTICS ENDPOINT
 # ============================================================================
@@ -33,6 +33,44 @@ class Settings(BaseSettings):
     EVOLUTION_API_BASE_URL: str = "http://localhost:8080"
     EVOLUTION_API_TOKEN: str = "your-evolution-api-token-here"
     
+    # WhatsApp Worker (Playwright)
+    # persistent = 1 Chromium por conexão; shared = 1 Chromium para N conexões
+    WHATSAPP_POOL_MODE: str = "persistent"
+    WHATSAPP_CONTEXTS_PER_BROWSER: int = 8
+    # Máximo de contexts vivos (0 = sem limite); acima disso hiberna o menos usado
+    WHATSAPP_MAX_LIVE_CONTEXTS: int = 0
+    # Bloquear imagens/mídia/fontes (agressivo no monitor, preserva preview no envio)
+    WHATSAPP_BLOCK_RESOURCES: bool = False
+    # Contexts pré-lançados com WhatsApp Web carregado para conexões novas (0 = desligado)
+    WHATSAPP_WARM_POOL_SIZE: int = 0
+    # Telemetria de memória/CPU por context e reciclagem acima do orçamento (0 = sem reciclagem)
+    # persistent: RSS da árvore de processos do Chromium; shared: heap JS da página
+    WHATSAPP_TELEMETRY_INTERVAL: int = 60
+    WHATSAPP_CONTEXT_MEMORY_BUDGET_MB: int = 0
+    WHATSAPP_CONTEXT_HEAP_BUDGET_MB: int = 0
+    # Máximo de segundos sem checar um grupo fonte (grupos ativos são checados mais vezes)
+    WHATSAPP_MONITOR_MAX_STALENESS: int = 300
+    # Fila por grupo destino: tamanho máximo (0 = sem limite) e política ao encher
+    # (drop_oldest | drop_lowest | reject); cota diária zera à meia-noite deste fuso
+    WHATSAPP_MAX_QUEUE_PER_GROUP: int = 50
+    WHATSAPP_QUEUE_OVERFLOW_POLICY: str = "drop_oldest"
+    WHATSAPP_QUOTA_TIMEZONE: str = "America/Sao_Paulo"
+    # Mesma oferta (product_unique_id) de grupos fonte diferentes dentro da janela:
+    # best_price (fica o menor preço) | first (fica a primeira); 0 = desligado
+    WHATSAPP_COALESCE_WINDOW_SECONDS: int = 600
+    WHATSAPP_COALESCE_POLICY: str = "best_price"
+    
+    # Prometheus: porta do /metrics de cada processo (0 = desligado; a API usa GET /metrics)
+    WORKER_METRICS_PORT: int = 9101
+    DISPATCHER_METRICS_PORT: int = 9102
+    
+    # Tracing do pipeline de ofertas: spans em JSONL (vazio = só propaga ids)
+    TRACE_EXPORT_PATH: str = ""
+    
+    # Profiler de amostragem (core.profiler): janela ao iniciar (0 = só pelo comando PROFILE)
+    WORKER_PROFILE_SECONDS: int = 0
+    WORKER_PROFILE_DIR: str = "logs/profiles"
+    
     # Telegram Bot
     TELEGRAM_BOT_TOKEN: str = "123456:ABC-DEF1234ghIkl-zyx57W2v1u123ew11"
     
@@ -0,0 +1,108 @@
+"""
+Métricas Prometheus compartilhadas pela API, pelo worker e pelo dispatcher.
+
+Cada processo expõe o próprio registry:
+- API: GET /metrics
+- whatsapp_worker: porta WORKER_METRICS_PORT
+- dispatcher: porta DISPATCHER_METRICS_PORT
+
+Labels só de baixa cardinalidade (tipo de ciclo, status, tipo de seletor).
+A exceção é connection_id na profundidade da fila (poucas dezenas por worker).
+
+Razões úteis (PromQL):
+- sucesso de preview: rate(autopromo_whatsapp_sends_total{preview="yes"}[5m])
+                      / rate(autopromo_whatsapp_sends_total{status="sent"}[5m])
+"""
+import time
+import logging
+from contextlib import contextmanager
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    start_http_server,
+)
+
+logger = logging.getLogger(__name__)
+
+
+# Worker WhatsApp
+WORKER_CYCLE_SECONDS = Histogram(
+    "autopromo_worker_cycle_seconds",
+    "Duração de uma passada dos ciclos do whatsapp_worker",
+    ["cycle"],  # login | monitor | send
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+)
+
+SEND_QUEUE_DEPTH = Gauge(
+    "autopromo_whatsapp_send_queue_depth",
+    "Mensagens aguardando envio por conexão",
+    ["connection_id"],
+)
+
+SEND_SECONDS = Histogram(
+    "autopromo_whatsapp_send_seconds",
+    "Duração de um envio (abrir chat, digitar, preview, enviar)",
+    ["status"],  # sent | error
+    buckets=(1, 2.5, 5, 10, 15, 20, 30, 45, 60, 90),
+)
+
+SENDS_TOTAL = Counter(
+    "autopromo_whatsapp_sends_total",
+    "Envios por status e se o preview do link foi gerado",
+    ["status", "preview"],  # preview: yes | no
+)
+
+PLAYWRIGHT_OP_SECONDS = Histogram(
+    "autopromo_playwright_op_seconds",
+    "Latência de operações do Playwright por tipo de seletor",
+    ["kind"],  # chat_already_open | chat_row | chat_search | link_preview | unread_sweep | ...
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+CONTEXT_LIFECYCLE_SECONDS = Histogram(
+    "autopromo_browser_context_lifecycle_seconds",
+    "Duração de hibernar (fechar) e acordar (reabrir + reidratar) um browser context",
+    ["kind"],  # hibernate | wake
+    buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60),
+)
+
+# Ingestão (webhooks) e dispatcher
+INGESTION_MESSAGES_TOTAL = Counter(
+    "autopromo_ingestion_messages_total",
+    "Mensagens recebidas pela ingestão",
+    ["platform", "status"],  # status: accepted | duplicate
+)
+
+DISPATCH_LAG_SECONDS = Histogram(
+    "autopromo_dispatch_lag_seconds",
+    "Tempo entre a oferta entrar em queue:dispatch e ser enviada",
+    ["platform"],
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600),
+)
+
+
+@contextmanager
+def track_duration(histogram: Histogram, **labels):
+    """Observa a duração do bloco (também quando ele levanta exceção)."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.labels(**labels).observe(time.perf_counter() - started)
+
+
+def start_metrics_server(port: int):
+    """Sobe o endpoint /metrics numa porta própria (0 = desligado)."""
+    if not port:
+        return
+    start_http_server(port)
+    logger.info(f"✓ Metrics exposed on :{port}/metrics")
+
+
+def render_latest() -> tuple:
+    """Payload e content-type do registry (para o endpoint da API)."""
+    return generate_latest(), CONTENT_TYPE_LATEST
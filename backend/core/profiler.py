@@ -0,0 +1,217 @@
+"""
+Profiler de amostragem sob demanda para os processos asyncio (workers).
+
+Uma thread lê a pilha da thread do event loop a cada intervalo
+(sys._current_frames) por N segundos. Nada é instrumentado e o processo não
+reinicia (filas em memória continuam lá); um loop quente aparece mesmo
+quando não devolve o controle ao event loop.
+
+Saída em WORKER_PROFILE_DIR, um par de arquivos por janela:
+- <nome>-<timestamp>.collapsed: pilhas "raiz;...;folha <amostras>", formato
+  do flamegraph.pl / speedscope / inferno. A raiz é a task asyncio que
+  estava rodando ("<event loop>" fora de task: callbacks, select ocioso)
+- <nome>-<timestamp>.tasks.txt: todas as tasks do loop no fim da janela,
+  com a cadeia de awaits até o ponto onde cada uma está parada
+
+Disparo:
+- WORKER_PROFILE_SECONDS > 0: uma janela logo ao iniciar o processo
+- Comando no WhatsApp worker, sem reiniciar:
+    redis-cli PUBLISH whatsapp:commands '{"type": "PROFILE", "seconds": 30}'
+
+Uma janela por vez por processo.
+"""
+import os
+import sys
+import time
+import asyncio
+import logging
+import threading
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_INTERVAL = 0.005   # segundos entre amostras (= intervalo de troca do GIL)
+MAX_SECONDS = 600          # janela máxima (perfil esquecido ligado não roda para sempre)
+
+_ROOT = str(Path(__file__).resolve().parent.parent) + os.sep
+
+_active: Optional[asyncio.Task] = None
+
+
+def _short_path(filename: str) -> str:
+    """Caminho relativo ao backend; fora dele, pacote/arquivo (ex: asyncio/tasks.py)."""
+    if filename.startswith(_ROOT):
+        return filename[len(_ROOT):]
+    return "/".join(filename.replace("\\", "/").rsplit("/", 2)[-2:])
+
+
+def _frame_label(frame) -> str:
+    # Linha de definição (não a atual): uma caixa por função no flamegraph
+    code = frame.f_code
+    return f"{code.co_qualname} ({_short_path(code.co_filename)}:{code.co_firstlineno})".replace(";", ",")
+
+
+class StackSampler:
+    """Amostra a pilha de uma thread (a do event loop) a partir de outra thread."""
+    
+    def __init__(self, thread_id: int, loop: asyncio.AbstractEventLoop, interval: float = DEFAULT_INTERVAL):
+        self.thread_id = thread_id
+        self.loop = loop
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+    
+    def start(self):
+        self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+    
+    def sample(self):
+        frame = sys._current_frames().get(self.thread_id)
+        if frame is None:
+            return
+        
+        stack = []
+        while frame is not None:
+            stack.append(_frame_label(frame))
+            frame = frame.f_back
+        
+        task = asyncio.current_task(self.loop)
+        stack.append(f"task:{task.get_name()}" if task else "<event loop>")
+        
+        self.stacks[";".join(reversed(stack))] += 1
+        self.samples += 1
+    
+    def collapsed(self) -> str:
+        """Formato collapsed (uma pilha por linha, mais amostradas primeiro)."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def await_chain(task: asyncio.Task) -> List[str]:
+    """
+    Onde a task está parada: da coroutine raiz até o último await.
+    
+    Returns:
+        ["arquivo:linha in função", ..., "waiting on <future>"]
+    """
+    lines = []
+    coro = task.get_coro()
+    
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+        if frame is None:
+            break
+        lines.append(f"{_short_path(frame.f_code.co_filename)}:{frame.f_lineno} in {frame.f_code.co_qualname}")
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+        if not hasattr(coro, "cr_frame") and not hasattr(coro, "gi_frame"):
+            break
+    
+    waiter = getattr(task, "_fut_waiter", None)
+    if waiter is not None:
+        lines.append(f"waiting on {waiter!r}"[:300])
+    return lines
+
+
+def dump_tasks(loop: Optional[asyncio.AbstractEventLoop] = None) -> str:
+    """Texto com todas as tasks do loop e a cadeia de awaits de cada uma."""
+    tasks = sorted(asyncio.all_tasks(loop), key=lambda t: t.get_name())
+    current = asyncio.current_task(loop)
+    
+    out = [f"# {len(tasks)} tasks at {datetime.now().isoformat(timespec='seconds')}\n"]
+    for task in tasks:
+        coro = task.get_coro()
+        state = "running" if task is current else "cancelling" if task.cancelling() else "pending"
+        out.append(f"\nTask {task.get_name()!r} ({getattr(coro, '__qualname__', coro)}) {state}\n")
+        for line in await_chain(task):
+            out.append(f"    {line}\n")
+    return "".join(out)
+
+
+async def profile(
+    seconds: float,
+    name: str = "worker",
+    output_dir: Optional[str] = None,
+    interval: float = DEFAULT_INTERVAL
+) -> dict:
+    """
+    Amostra o event loop atual por `seconds` e grava perfil + dump de tasks.
+    
+    Returns:
+        {"profile": str, "tasks": str, "samples": int, "seconds": float}
+    """
+    seconds = min(max(seconds, interval), MAX_SECONDS)
+    loop = asyncio.get_running_loop()
+    sampler = StackSampler(threading.get_ident(), loop, interval)
+    
+    started = time.monotonic()
+    sampler.start()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        sampler.stop()
+    elapsed = time.monotonic() - started
+    
+    # No fim da janela: o estado das tasks que o perfil acabou de ver
+    tasks = dump_tasks(loop)
+    
+    directory = Path(output_dir or settings.WORKER_PROFILE_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    prefix = directory / f"{name}-{datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}"
+    profile_path = prefix.with_name(prefix.name + ".collapsed")
+    tasks_path = prefix.with_name(prefix.name + ".tasks.txt")
+    profile_path.write_text(sampler.collapsed(), encoding="utf-8")
+    tasks_path.write_text(tasks, encoding="utf-8")
+    
+    logger.info(
+        f"Profile written: {profile_path} ({sampler.samples} samples in {elapsed:.1f}s), "
+        f"task dump: {tasks_path}"
+    )
+    return {
+        "profile": str(profile_path),
+        "tasks": str(tasks_path),
+        "samples": sampler.samples,
+        "seconds": round(elapsed, 1),
+    }
+
+
+def start_profile(seconds: float, name: str = "worker", **kwargs) -> Optional[asyncio.Task]:
+    """
+    Roda profile() em background (quem chama não espera a janela).
+    
+    Returns:
+        A task, ou None se já houver uma janela em andamento
+    """
+    global _active
+    if _active is not None and not _active.done():
+        logger.warning("Profiler already running, ignoring request")
+        return None
+    
+    _active = asyncio.create_task(profile(seconds, name, **kwargs), name="profiler")
+    _active.add_done_callback(_log_failure)
+    return _active
+
+
+def profile_on_start(name: str) -> Optional[asyncio.Task]:
+    """Janela inicial se WORKER_PROFILE_SECONDS > 0 (chamar já dentro do event loop)."""
+    if settings.WORKER_PROFILE_SECONDS <= 0:
+        return None
+    return start_profile(settings.WORKER_PROFILE_SECONDS, name)
+
+
+def _log_failure(task: asyncio.Task):
+    if not task.cancelled() and task.exception():
+        logger.error(f"Profiler failed: {task.exception()}")
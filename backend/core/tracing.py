@@ -0,0 +1,202 @@
+"""
+Tracing do pipeline de ofertas.
+
+POST /webhook/* -> queue:ingestion -> process_message -> queue:dispatch -> envio
+
+trace_id/span_id seguem o formato W3C (hex 32/16) e viajam dentro dos
+payloads das filas (IngestionQueueMessage, ProcessedOffer), então um trace
+atravessa processos sem depender de headers. Dentro do processo o span
+atual fica num ContextVar (funções no caminho não recebem nada a mais).
+
+Spans terminados vão para um exportador local JSONL (TRACE_EXPORT_PATH),
+gravado em lote por uma thread de fundo, uma linha por span:
+    {"trace_id", "span_id", "parent_id", "name", "start", "duration_ms",
+     "attributes", "error"}
+Percentis por etapa: scripts/trace_report.py
+
+Sem trace ativo, span() não faz nada (caminhos fora do pipeline não geram ruído).
+"""
+import atexit
+import json
+import os
+import secrets
+import threading
+import time
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Span:
+    """Span ativo (atributos podem ser adicionados até ele terminar)."""
+    
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "attributes")
+    
+    def __init__(self, trace_id: str, parent_id: Optional[str], name: str, attributes: dict):
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes
+    
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class JSONLExporter:
+    """
+    Anexa um span por linha num arquivo local (seguro entre threads).
+    
+    export() só guarda a linha num buffer (roda no event loop, sem I/O);
+    uma thread de fundo grava o buffer a cada flush_interval segundos ou
+    assim que ele chega a batch_size linhas. O que sobrar é gravado no exit.
+    """
+    
+    def __init__(self, path: str, batch_size: int = 256, flush_interval: float = 1.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()        # buffer
+        self._write_lock = threading.Lock()  # arquivo
+        self._lines: List[str] = []
+        self._file = None
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        atexit.register(self.flush)
+    
+    def export(self, record: dict):
+        line = json.dumps(record, default=str)
+        with self._lock:
+            self._lines.append(line)
+            pending = len(self._lines)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                self._thread.start()
+        
+        if pending >= self.batch_size:
+            self._wake.set()
+    
+    def flush(self):
+        """Grava as linhas pendentes (chamado pela thread de fundo e no exit)."""
+        with self._write_lock:
+            with self._lock:
+                lines, self._lines = self._lines, []
+            if not lines:
+                return
+            
+            if self._file is None:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write("".join(line + "\n" for line in lines))
+            self._file.flush()
+    
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.debug(f"Span flush failed: {e}")
+
+
+_exporter: Optional[JSONLExporter] = None
+
+
+def get_exporter() -> Optional[JSONLExporter]:
+    """Exportador configurado (None = TRACE_EXPORT_PATH vazio, só propaga ids)."""
+    global _exporter
+    if _exporter is None and settings.TRACE_EXPORT_PATH:
+        _exporter = JSONLExporter(settings.TRACE_EXPORT_PATH)
+    return _exporter
+
+
+def set_exporter(exporter):
+    """Troca o exportador (qualquer objeto com export(record: dict))."""
+    global _exporter
+    _exporter = exporter
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def trace_fields() -> dict:
+    """trace_id/parent_span_id do span atual, para colocar num payload de fila."""
+    active = _current_span.get()
+    if active is None:
+        return {}
+    return {"trace_id": active.trace_id, "parent_span_id": active.span_id}
+
+
+@contextmanager
+def _run(active: Span) -> Iterator[Span]:
+    token = _current_span.set(active)
+    start = time.time()
+    started = time.perf_counter()
+    error = None
+    
+    try:
+        yield active
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        _current_span.reset(token)
+        exporter = get_exporter()
+        if exporter is not None:
+            try:
+                exporter.export({
+                    "trace_id": active.trace_id,
+                    "span_id": active.span_id,
+                    "parent_id": active.parent_id,
+                    "name": active.name,
+                    "start": start,
+                    "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+                    "attributes": active.attributes,
+                    "error": error,
+                })
+            except Exception as e:
+                logger.debug(f"Span export failed: {e}")
+
+
+@contextmanager
+def start_trace(
+    name: str,
+    trace_id: Optional[str] = None,
+    parent_span_id: Optional[str] = None,
+    **attributes
+) -> Iterator[Span]:
+    """
+    Abre um span raiz, ou continua um trace vindo de um payload de fila.
+    
+    Payloads antigos (sem trace_id) começam um trace novo.
+    """
+    active = Span(
+        trace_id or secrets.token_hex(16),
+        parent_span_id if trace_id else None,
+        name,
+        attributes
+    )
+    with _run(active) as opened:
+        yield opened
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Optional[Span]]:
+    """Span filho do span atual (no-op fora de um trace)."""
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+    
+    with _run(Span(parent.trace_id, parent.span_id, name, attributes)) as opened:
+        yield opened
@@ -11,12 +11,13 @@ load_dotenv(dotenv_path=env_path)
 print(f"[STARTUP] Loading .env from: {env_path}")
 print(f"[STARTUP] .env exists: {env_path.exists()}")
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
 from core.config import settings
 from core.redis_client import redis_client
+from core.metrics import render_latest
 from api import (
     auth_router, 
     webhooks_router, 
@@ -93,6 +94,13 @@ async def root():
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint."""
+    payload, content_type = render_latest()
+    return Response(content=payload, media_type=content_type)
+
+
 @app.get("/health")
 async def health():
     """Detailed health check."""
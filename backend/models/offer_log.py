@@ -58,6 +58,7 @@ class OfferLog(Base):
     
     # Métricas
     preview_generated = Column(String(10))  # "yes", "no", "unknown"
+    preview_ms = Column(Integer)             # Tempo até o preview aparecer (ms)
     send_duration_ms = Column(Integer)       # Tempo para enviar (ms)
     
     # Timestamp
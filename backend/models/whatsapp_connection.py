@@ -52,6 +52,9 @@ class WhatsAppConnection(Base):
     min_interval_global = Column(Integer, default=30)          # 30 segundos entre mensagens
     max_messages_per_day = Column(Integer, default=1000)
     
+    # Digitação: "char" (humano), "chunk" (rajadas por palavra), "paste" (insert_text)
+    input_mode = Column(String(10), nullable=False, default="char", server_default="char")
+    
     # Plano do usuário
     plan_name = Column(String(50), default="trial")
     max_source_groups = Column(Integer, default=5)
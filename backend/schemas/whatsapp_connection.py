@@ -4,10 +4,13 @@ Schemas for WhatsApp Connections API.
 Pydantic models for request/response validation.
 """
 from pydantic import BaseModel, Field, UUID4
-from typing import List, Optional
+from typing import List, Literal, Optional
 from datetime import datetime
 
 
+InputMode = Literal["char", "chunk", "paste"]
+
+
 # ============================================================================
 # CONNECTION SCHEMAS
 # ============================================================================
@@ -29,6 +32,7 @@ class ConnectionCreate(BaseModel):
     min_interval_per_group: int = Field(360, description="Min seconds between messages per group (default: 6 min)")
     min_interval_global: int = Field(30, description="Min seconds between any messages (default: 30s)")
     max_messages_per_day: int = Field(1000, description="Max messages per day")
+    input_mode: InputMode = Field("char", description="Typing strategy: char (stealth), chunk, paste (fastest)")
     
     # Plan config
     plan_name: str = Field("trial", description="Plan name (trial, basic, pro)")
@@ -46,6 +50,7 @@ class ConnectionUpdate(BaseModel):
     min_interval_per_group: Optional[int] = None
     min_interval_global: Optional[int] = None
     max_messages_per_day: Optional[int] = None
+    input_mode: Optional[InputMode] = None
 
 
 class ConnectionResponse(BaseModel):
@@ -64,6 +69,7 @@ class ConnectionResponse(BaseModel):
     min_interval_per_group: int
     min_interval_global: int
     max_messages_per_day: int
+    input_mode: str
     
     # Plan
     plan_name: str
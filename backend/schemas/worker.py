@@ -3,7 +3,8 @@ Schemas para o Worker de Processamento.
 
 Define os modelos Pydantic para payloads de filas e ofertas processadas.
 """
-from pydantic import BaseModel
+import time
+from pydantic import BaseModel, Field
 from typing import Optional
 from datetime import datetime
 
@@ -19,6 +20,10 @@ class IngestionQueueMessage(BaseModel):
     media_urls: list[str] = []
     timestamp: str  # ISO8601
     dedup_hash: str
+    
+    # Tracing (core.tracing): span da ingestão
+    trace_id: Optional[str] = None
+    parent_span_id: Optional[str] = None
 
 
 class ProcessedOffer(BaseModel):
@@ -39,3 +44,8 @@ class ProcessedOffer(BaseModel):
     source_group_id: str
     store_slug: Optional[str] = None
     price_cents: Optional[int] = None
+    enqueued_at: float = Field(default_factory=time.time)  # para medir o lag do dispatcher
+    
+    # Tracing (core.tracing): span do enfileiramento para dispatch
+    trace_id: Optional[str] = None
+    parent_span_id: Optional[str] = None
@@ -0,0 +1,126 @@
+"""
+Benchmark de memória do ConnectionPool: modo persistent x shared.
+
+Uso:
+    python scripts/benchmark_pool_memory.py [--connections 10] [--per-browser 8] [--url about:blank]
+                                            [--block-resources]
+
+O que faz:
+    1. Para cada modo, abre N contexts (sessões temporárias, sem login)
+    2. Navega cada um para --url (use https://web.whatsapp.com para um número realista)
+    3. Mede a memória da árvore de processos do Playwright/Chromium via /proc
+       - RSS: conta páginas compartilhadas várias vezes (superestima)
+       - PSS: divide páginas compartilhadas entre processos (mais honesto)
+    4. Imprime total e custo por conexão de cada modo
+    
+    Com --block-resources os contexts usam o ResourceFilter (perfil monitor) e
+    o relatório inclui quantos requests foram evitados.
+
+Só funciona em Linux (lê /proc).
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict
+
+# Adicionar diretório pai ao path para imports funcionarem
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.whatsapp.connection_pool import ConnectionPool
+from services.whatsapp.context_telemetry import descendants, read_kb
+
+
+def tree_memory_mb() -> Dict[str, float]:
+    """RSS e PSS (MB) de todos os processos filhos deste Python."""
+    pids = descendants(os.getpid())
+    rss = sum(read_kb(f"/proc/{p}/status", "VmRSS") for p in pids)
+    pss = sum(read_kb(f"/proc/{p}/smaps_rollup", "Pss") for p in pids)
+    return {
+        "processes": len(pids),
+        "rss_mb": rss / 1024,
+        "pss_mb": pss / 1024,
+    }
+
+
+async def measure(
+    mode: str,
+    connections: int,
+    per_browser: int,
+    url: str,
+    block_resources: bool = False
+) -> Dict[str, float]:
+    """Abre N contexts num modo e retorna a memória adicional (descontado o driver)."""
+    with tempfile.TemporaryDirectory(prefix=f"pool-bench-{mode}-") as sessions_dir:
+        pool = ConnectionPool(
+            sessions_dir=sessions_dir,
+            mode=mode,
+            contexts_per_browser=per_browser,
+            block_resources=block_resources
+        )
+        await pool.start()
+        baseline = tree_memory_mb()
+        
+        try:
+            for i in range(connections):
+                context = await pool.get_or_create(f"bench-{i}")
+                await context.pages[0].goto(url, wait_until="load", timeout=60000)
+            
+            # Dar tempo para o Chromium estabilizar (GC, workers)
+            await asyncio.sleep(5)
+            loaded = tree_memory_mb()
+            avoided = sum(
+                sum(f.blocked.values()) + sum(f.stubbed.values())
+                for f in pool.filters.values()
+            )
+        finally:
+            await pool.close_all()
+    
+    rss = loaded["rss_mb"] - baseline["rss_mb"]
+    pss = loaded["pss_mb"] - baseline["pss_mb"]
+    return {
+        "processes": loaded["processes"] - baseline["processes"],
+        "rss_mb": rss,
+        "pss_mb": pss,
+        "rss_per_conn_mb": rss / connections,
+        "pss_per_conn_mb": pss / connections,
+        "requests_avoided": avoided,
+    }
+
+
+async def main(args):
+    results = {}
+    for mode in ("persistent", "shared"):
+        print(f"Measuring {mode} mode ({args.connections} connections)...")
+        results[mode] = await measure(
+            mode, args.connections, args.per_browser, args.url, args.block_resources
+        )
+    
+    print()
+    print("=" * 82)
+    print(
+        f"{'mode':12} {'procs':>6} {'RSS MB':>10} {'PSS MB':>10} "
+        f"{'RSS/conn':>10} {'PSS/conn':>10} {'avoided':>9}"
+    )
+    print("-" * 82)
+    for mode, r in results.items():
+        print(
+            f"{mode:12} {r['processes']:>6} {r['rss_mb']:>10.1f} {r['pss_mb']:>10.1f} "
+            f"{r['rss_per_conn_mb']:>10.1f} {r['pss_per_conn_mb']:>10.1f} {r['requests_avoided']:>9}"
+        )
+    print("=" * 82)
+    
+    persistent, shared = results["persistent"]["pss_mb"], results["shared"]["pss_mb"]
+    if shared > 0:
+        print(f"shared uses {persistent / shared:.1f}x less memory (PSS) than persistent")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare ConnectionPool memory per connection")
+    parser.add_argument("--connections", type=int, default=10)
+    parser.add_argument("--per-browser", type=int, default=8)
+    parser.add_argument("--url", default="about:blank")
+    parser.add_argument("--block-resources", action="store_true")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,87 @@
+"""
+Benchmark de compactação de sessão: espaço recuperado x tempo de cold launch.
+
+Uso:
+    python scripts/benchmark_session_compaction.py <SESSION_DIR> [--runs 3] [--url https://web.whatsapp.com]
+
+O que faz:
+    1. Copia o perfil para dois diretórios temporários (o original não é tocado)
+    2. Compacta uma das cópias (session_compaction.compact_session)
+    3. Faz cold launch de cada cópia --runs vezes: launch_persistent_context
+       + goto(--url) + espera a lista de chats (se a sessão estiver logada)
+    4. Imprime tamanho antes/depois e tempo médio de launch
+
+Compactar poda o CacheStorage do Service Worker: o primeiro launch depois
+da poda baixa o app de novo, os seguintes voltam a usar cache.
+"""
+import argparse
+import asyncio
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Adicionar diretório pai ao path para imports funcionarem
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from playwright.async_api import async_playwright
+
+from services.whatsapp.connection_pool import CHAT_LIST_SELECTOR, CONTEXT_OPTIONS, LAUNCH_ARGS
+from services.whatsapp.session_compaction import compact_session, dir_size
+
+
+async def cold_launch_ms(playwright, user_data_dir: str, url: str) -> int:
+    start_time = time.time()
+    context = await playwright.chromium.launch_persistent_context(
+        user_data_dir=user_data_dir,
+        headless=True,
+        args=LAUNCH_ARGS,
+        **CONTEXT_OPTIONS
+    )
+    try:
+        page = context.pages[0]
+        await page.goto(url, wait_until="domcontentloaded", timeout=60000)
+        try:
+            await page.wait_for_selector(CHAT_LIST_SELECTOR, timeout=30000)
+        except Exception:
+            pass  # Sessão não logada: mede só o carregamento
+        return int((time.time() - start_time) * 1000)
+    finally:
+        await context.close()
+
+
+async def main(args):
+    with tempfile.TemporaryDirectory(prefix="compaction-bench-") as tmp:
+        original = f"{tmp}/original"
+        compacted = f"{tmp}/compacted"
+        shutil.copytree(args.session_dir, original, symlinks=True)
+        shutil.copytree(args.session_dir, compacted, symlinks=True)
+        
+        size_before = dir_size(compacted)
+        result = compact_session(compacted)
+        size_after = dir_size(compacted)
+        
+        timings = {"original": [], "compacted": []}
+        async with async_playwright() as playwright:
+            for _ in range(args.runs):
+                for name, path in (("original", original), ("compacted", compacted)):
+                    timings[name].append(await cold_launch_ms(playwright, path, args.url))
+    
+    print()
+    print("=" * 60)
+    print(f"Size before:  {size_before / (1024 * 1024):8.1f} MB")
+    print(f"Size after:   {size_after / (1024 * 1024):8.1f} MB")
+    print(f"Reclaimed:    {result['reclaimed_bytes'] / (1024 * 1024):8.1f} MB ({', '.join(result['removed']) or '-'})")
+    print("-" * 60)
+    for name, runs in timings.items():
+        print(f"{name:10} launch ms: {runs} (avg {sum(runs) / len(runs):.0f})")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure session compaction effect")
+    parser.add_argument("session_dir")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--url", default="https://web.whatsapp.com")
+    asyncio.run(main(parser.parse_args()))
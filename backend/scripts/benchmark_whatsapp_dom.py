@@ -0,0 +1,180 @@
+"""
+Benchmark dos caminhos Playwright do worker contra o WhatsApp Web de mentira.
+
+Uso:
+    python scripts/benchmark_whatsapp_dom.py [--groups 200] [--contacts 50] [--runs 3]
+        [--preview-ms 600] [--headed]
+
+O que faz:
+    1. Abre tests/fixtures/whatsapp_web/index.html (file://, sem rede e sem
+       sessão logada) com os mesmos LAUNCH_ARGS/CONTEXT_OPTIONS do pool
+    2. Mede, --runs vezes cada:
+       - descoberta de grupos (collect_groups na lista virtualizada)
+       - varredura de não lidas (UnreadSweep.sweep depois de waFixture.receive)
+       - abrir chat pela linha (open_chat_row) x pela busca (HumanizedSender._open_group)
+       - digitação por modo (type_text, chars/s)
+       - latência do preview (wait_for_link_preview x --preview-ms da página)
+       - envio completo (HumanizedSender.send_with_preview, modo paste)
+       - leitura da última mensagem (MessageMonitor._extract_last_message)
+    3. Imprime as medidas de cada rodada e a média
+
+A página é determinística (mesmo --seed, mesmos chats), então dá para comparar
+mudanças nos seletores/esperas entre commits sem depender do WhatsApp real.
+Os tempos incluem as pausas "humanas" do código medido.
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+from urllib.parse import urlencode
+
+# Adicionar diretório pai ao path para imports funcionarem
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from playwright.async_api import async_playwright
+
+from services.whatsapp.chat_navigator import open_chat_row
+from services.whatsapp.connection_pool import CHAT_LIST_SELECTOR, CONTEXT_OPTIONS, LAUNCH_ARGS
+from services.whatsapp.group_discovery import collect_groups
+from services.whatsapp.humanized_sender import HumanizedSender
+from services.whatsapp.link_preview import wait_for_link_preview
+from services.whatsapp.message_monitor import MessageMonitor
+from services.whatsapp.text_input import INPUT_MODES, clear_compose_box, type_text
+from services.whatsapp.unread_sweep import UnreadSweep
+
+FIXTURE = Path(__file__).parent.parent / "tests" / "fixtures" / "whatsapp_web" / "index.html"
+
+SOURCE_GROUPS = ["Fonte A", "Fonte B", "Fonte C"]
+DESTINATION = "Destino"
+COMPOSE_SELECTOR = '[data-testid="conversation-compose-box-input"]'
+
+OFFER = (
+    "🔥 Fone JBL Tune 520BT\n"
+    "R$ 179,90\n"
+    "https://www.amazon.com.br/dp/B0C4Q3XKQ1?tag=fixture-20"
+)
+
+
+def fixture_url(**params) -> str:
+    return FIXTURE.as_uri() + "?" + urlencode(params, doseq=True)
+
+
+def elapsed_ms(started: float) -> int:
+    return int((time.perf_counter() - started) * 1000)
+
+
+async def open_fixture(context, args):
+    page = await context.new_page()
+    await page.goto(fixture_url(
+        groups=args.groups,
+        contacts=args.contacts,
+        seed=args.seed,
+        preview_ms=args.preview_ms,
+        group=[DESTINATION, *SOURCE_GROUPS]
+    ))
+    await page.wait_for_selector(CHAT_LIST_SELECTOR)
+    return page
+
+
+async def run_once(context, args, results: dict):
+    page = await open_fixture(context, args)
+    try:
+        # Descoberta de grupos
+        started = time.perf_counter()
+        groups = await collect_groups(page)
+        results["discovery_ms"].append(elapsed_ms(started))
+        results["groups_found"].append(len(groups))
+        
+        # Varredura: primeira passada grava as assinaturas, depois chegam ofertas
+        sweeper = UnreadSweep()
+        await sweeper.sweep(page, "bench", SOURCE_GROUPS)
+        for name in SOURCE_GROUPS[:2]:
+            await page.evaluate("name => window.waFixture.receive(name)", name)
+        started = time.perf_counter()
+        swept = await sweeper.sweep(page, "bench", SOURCE_GROUPS)
+        results["sweep_ms"].append(elapsed_ms(started))
+        results["sweep_changed"].append(len(swept["changed"]))
+        
+        # Abrir chat: clique na linha x busca
+        started = time.perf_counter()
+        await open_chat_row(page, SOURCE_GROUPS[0])
+        results["open_row_ms"].append(elapsed_ms(started))
+        
+        sender = HumanizedSender()
+        started = time.perf_counter()
+        await sender._open_group(page, SOURCE_GROUPS[1])
+        results["open_search_ms"].append(elapsed_ms(started))
+        
+        # Leitura da última mensagem do chat aberto
+        monitor = MessageMonitor(db=None)
+        started = time.perf_counter()
+        message = await monitor._extract_last_message(page, SOURCE_GROUPS[1])
+        results["extract_ms"].append(elapsed_ms(started))
+        results["extract_ok"].append(int(message is not None))
+        
+        # Digitação por modo (texto sem link: sem preview no meio)
+        await page.evaluate("name => window.waFixture.openChat(name)", DESTINATION)
+        compose = await page.wait_for_selector(COMPOSE_SELECTOR)
+        for mode in INPUT_MODES:
+            await compose.click()
+            typing = await type_text(page, OFFER.split("https://")[0].strip(), mode)
+            results[f"type_{mode}_cps"].append(typing["chars_per_second"])
+            await clear_compose_box(page, compose)
+        
+        # Preview: do fim da digitação até o card aparecer
+        await compose.click()
+        await page.keyboard.insert_text(OFFER)
+        preview = await wait_for_link_preview(page)
+        results["preview_ms"].append(preview["preview_ms"])
+        await clear_compose_box(page, compose)
+        
+        # Envio completo (abre pela lista, paste, espera preview, Enter)
+        await page.evaluate("name => window.waFixture.openChat(name)", SOURCE_GROUPS[2])
+        sent = await sender.send_with_preview(page, DESTINATION, OFFER, input_mode="paste")
+        results["send_ms"].append(sent["duration_ms"])
+        results["send_preview"].append(int(sent.get("preview_generated", False)))
+    finally:
+        await page.close()
+
+
+async def main(args):
+    results = {
+        name: [] for name in (
+            "discovery_ms", "groups_found", "sweep_ms", "sweep_changed",
+            "open_row_ms", "open_search_ms", "extract_ms", "extract_ok",
+            *(f"type_{mode}_cps" for mode in INPUT_MODES),
+            "preview_ms", "send_ms", "send_preview",
+        )
+    }
+    
+    async with async_playwright() as playwright:
+        browser = await playwright.chromium.launch(headless=not args.headed, args=LAUNCH_ARGS)
+        context = await browser.new_context(**CONTEXT_OPTIONS)
+        try:
+            for _ in range(args.runs):
+                await run_once(context, args, results)
+        finally:
+            await browser.close()
+    
+    expected_groups = args.groups + 1 + len(SOURCE_GROUPS)
+    
+    print()
+    print("=" * 72)
+    print(f"Fixture: {args.groups} groups + {args.contacts} contacts, preview {args.preview_ms}ms, {args.runs} runs")
+    print(f"Expected groups: {expected_groups}")
+    print("-" * 72)
+    for name, runs in results.items():
+        print(f"{name:18} {runs} (avg {sum(runs) / len(runs):.1f})")
+    print("=" * 72)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark Playwright code paths against the local WhatsApp Web fixture")
+    parser.add_argument("--groups", type=int, default=200)
+    parser.add_argument("--contacts", type=int, default=50)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--preview-ms", type=int, default=600)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--headed", action="store_true")
+    asyncio.run(main(parser.parse_args()))
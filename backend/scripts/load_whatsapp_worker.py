@@ -0,0 +1,269 @@
+"""
+Teste de carga do WhatsAppWorker sem browser e sem Postgres.
+
+Uso:
+    python scripts/load_whatsapp_worker.py [--connections 200] [--duration 120]
+        [--source-groups 5] [--dest-groups 3] [--rate 1] [--latency send=6]
+        [--latency-scale 1.0] [--redis-url redis://localhost:6379/15] [--json out.json]
+
+O que faz:
+    1. Cria --connections conexões "connected" em memória e troca o Playwright
+       por um SimulatedWhatsAppGateway (latência por operação, chegadas Poisson)
+    2. Roda monitor_cycle e send_cycle do WhatsAppWorker de verdade
+       (UnreadSweep/PollScheduler, OfferCoalescer, QueueManager, SendScheduler)
+    3. Amostra a profundidade das filas e o atraso do event loop a cada
+       --sample-interval segundos
+    4. Imprime latência chegada -> leitura -> envio, profundidade no tempo
+       e CPU do processo por conexão
+
+Sem --redis-url usa fakeredis (em memória, mais lento que Redis real).
+Com Redis real use um banco vazio: as chaves das conexões simuladas ficam lá.
+--rate é em mensagens/minuto por grupo fonte (média; cada grupo sorteia a sua).
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+import uuid
+from pathlib import Path
+from types import SimpleNamespace
+
+# Adicionar diretório pai ao path para imports funcionarem
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.config import settings
+from core.redis_client import redis_client
+from models.whatsapp_connection import WhatsAppConnection
+from services.whatsapp.simulated_gateway import DEFAULT_LATENCIES, SimulatedWhatsAppGateway
+from workers.whatsapp_worker import WhatsAppWorker
+
+
+class SimulatedSession:
+    """AsyncSession em memória: conexões por id, toda loja com tag, escritas descartadas."""
+    
+    _tag = SimpleNamespace(tag_code="loadtest-20")
+    
+    def __init__(self, connections: dict):
+        self.connections = connections
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc):
+        return False
+    
+    async def get(self, model, ident):
+        return self.connections.get(str(ident))
+    
+    async def execute(self, statement):
+        return self  # get_affiliate_tag / update de messages_sent_today
+    
+    def scalar_one_or_none(self):
+        return self._tag
+    
+    def add(self, obj):
+        pass
+    
+    async def commit(self):
+        pass
+
+
+class SimulatedWorker(WhatsAppWorker):
+    """WhatsAppWorker com conexões em memória no lugar do banco."""
+    
+    def __init__(self, gateway: SimulatedWhatsAppGateway, connections: list):
+        super().__init__()
+        self.gateway = gateway
+        self.connections = {str(conn.id): conn for conn in connections}
+        self.session_factory = lambda: SimulatedSession(self.connections)
+    
+    async def get_active_connections(self, db) -> list:
+        return list(self.connections.values())
+
+
+def build_connections(args) -> list:
+    return [
+        WhatsAppConnection(
+            id=uuid.uuid4(),
+            user_id=uuid.uuid4(),
+            nickname=f"sim-{i:04d}",
+            status="connected",
+            source_groups=[{"name": f"Fonte {j}"} for j in range(args.source_groups)],
+            destination_groups=[{"name": f"Destino {j}"} for j in range(args.dest_groups)],
+            min_interval_per_group=args.min_interval_per_group,
+            min_interval_global=args.min_interval_global,
+            max_messages_per_day=100000,
+            input_mode="char"
+        )
+        for i in range(args.connections)
+    ]
+
+
+def percentile(values: list, pct: float) -> float:
+    """Percentil por nearest-rank."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100 * len(ordered))))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+async def connect_redis(redis_url: str):
+    if redis_url:
+        settings.REDIS_URL = redis_url
+        await redis_client.connect()
+        return
+    
+    try:
+        from fakeredis import aioredis as fake_aioredis
+    except ImportError:
+        sys.exit("fakeredis is not installed: pip install fakeredis lupa, or pass --redis-url")
+    redis_client._redis = fake_aioredis.FakeRedis(decode_responses=True)
+
+
+async def sample(worker: SimulatedWorker, interval: float, started: float, samples: list):
+    """Profundidade das filas (Redis) e atraso do event loop a cada intervalo."""
+    while True:
+        expected = time.monotonic() + interval
+        await asyncio.sleep(interval)
+        loop_lag = max(0.0, time.monotonic() - expected)
+        
+        depths = await worker.queue_manager.get_depth_by_connection()
+        samples.append({
+            "t": round(time.monotonic() - started, 1),
+            "queued": sum(depths.values()),
+            "max_per_connection": max(depths.values(), default=0),
+            "unread": worker.gateway.backlog(),
+            "sent": worker.gateway.stats["sent"],
+            "loop_lag_ms": round(loop_lag * 1000, 1),
+        })
+
+
+async def main(args):
+    # whatsapp_worker configures INFO logging on import: one line per queued message
+    logging.getLogger().setLevel(logging.INFO if args.verbose else logging.WARNING)
+    
+    latencies = {**DEFAULT_LATENCIES, **args.latency}
+    latencies = {op: seconds * args.latency_scale for op, seconds in latencies.items()}
+    gateway = SimulatedWhatsAppGateway(
+        latencies=latencies,
+        arrival_rate=args.rate / 60,
+        products=args.products,
+        send_error_rate=args.send_error_rate,
+        sweep_missing_rate=args.sweep_missing_rate,
+        seed=args.seed
+    )
+    
+    await connect_redis(args.redis_url)
+    connections = build_connections(args)
+    worker = SimulatedWorker(gateway, connections)
+    worker.running = True
+    
+    samples = []
+    started = time.monotonic()
+    cpu_started = time.process_time()
+    tasks = [
+        asyncio.create_task(worker.monitor_cycle()),
+        asyncio.create_task(worker.send_cycle()),
+        asyncio.create_task(sample(worker, args.sample_interval, started, samples)),
+    ]
+    
+    try:
+        await asyncio.sleep(args.duration)
+    finally:
+        worker.running = False
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    
+    elapsed = time.monotonic() - started
+    cpu = time.process_time() - cpu_started
+    coalesce = {}
+    for conn in connections:
+        for decision, count in (await worker.offer_coalescer.get_stats(str(conn.id))).items():
+            coalesce[decision] = coalesce.get(decision, 0) + count
+    
+    report = {
+        "connections": args.connections,
+        "duration_s": round(elapsed, 1),
+        "latencies": latencies,
+        "messages": gateway.stats,
+        "coalesce": coalesce,
+        "cpu": {
+            "seconds": round(cpu, 2),
+            "core_utilization": round(cpu / elapsed, 3),
+            "ms_per_connection_per_s": round(cpu * 1000 / elapsed / max(args.connections, 1), 3),
+        },
+        "latency_s": {
+            name: {
+                "count": len(values),
+                "p50": round(percentile(values, 50), 2),
+                "p90": round(percentile(values, 90), 2),
+                "p99": round(percentile(values, 99), 2),
+                "max": round(max(values, default=0.0), 2),
+            }
+            for name, values in gateway.timings.items()
+        },
+        "samples": samples,
+    }
+    
+    print()
+    print("=" * 72)
+    print(f"Connections: {args.connections}   duration: {elapsed:.0f}s   messages: {gateway.stats}")
+    print(f"Coalescer:   {coalesce}")
+    print(
+        f"CPU:         {cpu:.1f}s ({cpu / elapsed:.0%} of one core), "
+        f"{report['cpu']['ms_per_connection_per_s']} ms/s per connection"
+    )
+    print("-" * 72)
+    print(f"{'latency (s)':18} {'count':>7} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8}")
+    for name, row in report["latency_s"].items():
+        print(f"{name:18} {row['count']:7} {row['p50']:8.2f} {row['p90']:8.2f} {row['p99']:8.2f} {row['max']:8.2f}")
+    print("-" * 72)
+    print(f"{'t (s)':>7} {'queued':>8} {'max/conn':>9} {'unread':>8} {'sent':>7} {'loop lag ms':>12}")
+    for row in samples:
+        print(
+            f"{row['t']:7.0f} {row['queued']:8} {row['max_per_connection']:9} "
+            f"{row['unread']:8} {row['sent']:7} {row['loop_lag_ms']:12.1f}"
+        )
+    print("=" * 72)
+    
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+        print(f"Report written to {args.json}")
+    
+    await redis_client.disconnect()
+
+
+def parse_latency(value: str) -> tuple:
+    operation, _, seconds = value.partition("=")
+    if operation not in DEFAULT_LATENCIES or not seconds:
+        raise argparse.ArgumentTypeError(f"expected one of {sorted(DEFAULT_LATENCIES)}=<seconds>")
+    return operation, float(seconds)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Browserless load test for WhatsAppWorker")
+    parser.add_argument("--connections", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=120)
+    parser.add_argument("--source-groups", type=int, default=5)
+    parser.add_argument("--dest-groups", type=int, default=3)
+    parser.add_argument("--rate", type=float, default=1.0, help="messages/minute per source group (mean)")
+    parser.add_argument("--products", type=int, default=200, help="catalog size (smaller = more duplicates)")
+    parser.add_argument("--latency", type=parse_latency, action="append", default=[],
+                        help="per-operation latency override, e.g. send=6 (repeatable)")
+    parser.add_argument("--latency-scale", type=float, default=1.0)
+    parser.add_argument("--send-error-rate", type=float, default=0.0)
+    parser.add_argument("--sweep-missing-rate", type=float, default=0.0)
+    parser.add_argument("--min-interval-per-group", type=int, default=360)
+    parser.add_argument("--min-interval-global", type=int, default=30)
+    parser.add_argument("--sample-interval", type=float, default=5)
+    parser.add_argument("--redis-url", default="")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--json")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+    args.latency = dict(args.latency)
+    asyncio.run(main(args))
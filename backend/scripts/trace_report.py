@@ -0,0 +1,109 @@
+"""
+Relatório de latência por etapa a partir dos spans exportados (core.tracing).
+
+Uso:
+    python scripts/trace_report.py [TRACE_FILE] [--name send]
+
+O que faz:
+    1. Lê o JSONL de spans (default: TRACE_EXPORT_PATH)
+    2. Agrupa por nome do span e imprime count / p50 / p90 / p99 / max / erros
+    3. Soma por trace o tempo ponta a ponta (início do primeiro span até o
+       fim do último), incluindo a espera nas filas entre processos
+
+Traces incompletos (ex: oferta ainda em queue:dispatch) entram só nas
+etapas que já terminaram.
+"""
+import argparse
+import json
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+# Adicionar diretório pai ao path para imports funcionarem
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.config import settings
+
+
+def percentile(values: list, pct: float) -> float:
+    """Percentil por nearest-rank (values ordenados)."""
+    if not values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(values))))
+    return values[min(rank, len(values)) - 1]
+
+
+def load_spans(path: str) -> list:
+    spans = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                spans.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue  # Linha cortada (processo morto no meio da escrita)
+    return spans
+
+
+def summarize(spans: list) -> dict:
+    """{nome: {count, p50, p90, p99, max, errors}} + "end_to_end"."""
+    durations = defaultdict(list)
+    errors = defaultdict(int)
+    traces = defaultdict(lambda: [float("inf"), 0.0])
+    
+    for record in spans:
+        durations[record["name"]].append(record["duration_ms"])
+        if record.get("error"):
+            errors[record["name"]] += 1
+        
+        bounds = traces[record["trace_id"]]
+        bounds[0] = min(bounds[0], record["start"])
+        bounds[1] = max(bounds[1], record["start"] + record["duration_ms"] / 1000)
+    
+    if traces:
+        durations["end_to_end"] = [(end - start) * 1000 for start, end in traces.values()]
+    
+    report = {}
+    for name, values in durations.items():
+        values.sort()
+        report[name] = {
+            "count": len(values),
+            "p50": percentile(values, 50),
+            "p90": percentile(values, 90),
+            "p99": percentile(values, 99),
+            "max": values[-1],
+            "errors": errors.get(name, 0),
+        }
+    return report
+
+
+def main(args):
+    spans = load_spans(args.trace_file)
+    if args.name:
+        trace_ids = {s["trace_id"] for s in spans if s["name"] == args.name}
+        spans = [s for s in spans if s["trace_id"] in trace_ids]
+    
+    report = summarize(spans)
+    
+    print()
+    print("=" * 78)
+    print(f"{'span':24} {'count':>7} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9} {'err':>5}")
+    print("-" * 78)
+    for name, row in sorted(report.items(), key=lambda item: -item[1]["p50"]):
+        print(
+            f"{name:24} {row['count']:7} {row['p50']:9.1f} {row['p90']:9.1f} "
+            f"{row['p99']:9.1f} {row['max']:9.1f} {row['errors']:5}"
+        )
+    print("=" * 78)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Latency percentiles per pipeline stage")
+    parser.add_argument("trace_file", nargs="?", default=settings.TRACE_EXPORT_PATH)
+    parser.add_argument("--name", help="Only traces that contain a span with this name")
+    args = parser.parse_args()
+    if not args.trace_file:
+        parser.error("no trace file given and TRACE_EXPORT_PATH is empty")
+    main(args)
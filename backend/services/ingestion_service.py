@@ -15,6 +15,8 @@ from datetime import datetime
 from redis.asyncio import Redis
 
 from core.redis_client import get_redis
+from core.metrics import INGESTION_MESSAGES_TOTAL
+from core.tracing import start_trace, span, trace_fields
 
 
 async def normalize_text(text: str) -> str:
@@ -98,8 +100,25 @@ async def process_raw_message(
         timestamp: Timestamp da mensagem (opcional)
     
     Returns:
-        Dict com status: 'accepted' ou 'duplicate' e dedup_hash
+        Dict com status: 'accepted' ou 'duplicate', dedup_hash e trace_id
     """
+    # Raiz do trace da oferta (propagado no payload da fila)
+    with start_trace("ingest", platform=source_platform) as trace:
+        result = await _ingest(
+            user_id, source_platform, source_group_id, raw_text, media_urls, timestamp
+        )
+        trace.set_attribute("status", result["status"])
+        return {**result, "trace_id": trace.trace_id}
+
+
+async def _ingest(
+    user_id: str,
+    source_platform: str,
+    source_group_id: str,
+    raw_text: str,
+    media_urls: Optional[list[str]],
+    timestamp: Optional[datetime]
+) -> dict:
     redis: Redis = await get_redis()
     
     # 1. Normalizar texto
@@ -118,6 +137,7 @@ async def process_raw_message(
     
     if not is_new:
         # Duplicado - retornar sem enfileirar
+        INGESTION_MESSAGES_TOTAL.labels(platform=source_platform, status="duplicate").inc()
         return {
             "status": "duplicate",
             "dedup_hash": dedup_hash
@@ -134,8 +154,11 @@ async def process_raw_message(
         "dedup_hash": dedup_hash
     }
     
-    # 6. Enfileirar em queue:ingestion
-    await redis.rpush("queue:ingestion", json.dumps(message_payload))
+    # 6. Enfileirar em queue:ingestion (o processamento continua o trace)
+    with span("enqueue_ingestion"):
+        message_payload.update(trace_fields())
+        await redis.rpush("queue:ingestion", json.dumps(message_payload))
+    INGESTION_MESSAGES_TOTAL.labels(platform=source_platform, status="accepted").inc()
     
     return {
         "status": "accepted",
@@ -113,6 +113,7 @@ async def mirror_message_playwright(
                     monetized_text=monetized_text,
                     links_found=links_found,
                     preview_generated="yes" if preview_generated else "no",
+                    preview_ms=result.get("preview_ms"),
                     send_duration_ms=duration_ms
                 )
                 
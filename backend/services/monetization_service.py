@@ -13,6 +13,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
 from models.affiliate_tag import AffiliateTag
+from core.tracing import span
 
 
 # ============================================================================
@@ -208,50 +209,51 @@ async def monetize_url(
     Returns:
         Dict with monetized_url and store_slug
     """
-    # Expand short links for Amazon
-    if store_slug == "amazon" and "amzn.to" in original_url:
-        try:
-            original_url = await expand_short_url(original_url)
-        except Exception:
-            pass  # Continue with short URL if expansion fails
-    
-    # No store detected
-    if not store_slug:
-        return {
-            "monetized_url": original_url,
-            "store_slug": "unknown"
+    with span("monetize", store=store_slug or "unknown"):
+        # Expand short links for Amazon
+        if store_slug == "amazon" and "amzn.to" in original_url:
+            try:
+                original_url = await expand_short_url(original_url)
+            except Exception:
+                pass  # Continue with short URL if expansion fails
+        
+        # No store detected
+        if not store_slug:
+            return {
+                "monetized_url": original_url,
+                "store_slug": "unknown"
+            }
+        
+        # Get user's affiliate tag
+        tag_code = await get_affiliate_tag(db, user_id, store_slug)
+        
+        # No tag configured
+        if not tag_code:
+            return {
+                "monetized_url": original_url,
+                "store_slug": store_slug
+            }
+        
+        # Apply store-specific monetization
+        monetizers = {
+            "amazon": monetize_amazon_url,
+            "magalu": monetize_magalu_url,
+            "mercadolivre": monetize_mercadolivre_url,
         }
-    
-    # Get user's affiliate tag
-    tag_code = await get_affiliate_tag(db, user_id, store_slug)
-    
-    # No tag configured
-    if not tag_code:
+        
+        monetizer = monetizers.get(store_slug)
+        
+        if monetizer:
+            return {
+                "monetized_url": monetizer(original_url, tag_code),
+                "store_slug": store_slug
+            }
+        
+        # Unsupported store
         return {
             "monetized_url": original_url,
             "store_slug": store_slug
         }
-    
-    # Apply store-specific monetization
-    monetizers = {
-        "amazon": monetize_amazon_url,
-        "magalu": monetize_magalu_url,
-        "mercadolivre": monetize_mercadolivre_url,
-    }
-    
-    monetizer = monetizers.get(store_slug)
-    
-    if monetizer:
-        return {
-            "monetized_url": monetizer(original_url, tag_code),
-            "store_slug": store_slug
-        }
-    
-    # Unsupported store
-    return {
-        "monetized_url": original_url,
-        "store_slug": store_slug
-    }
 
 
 # ============================================================================
@@ -277,7 +279,8 @@ async def monetize_text(
     Returns:
         Text with monetized URLs
     """
-    from services.ingestion_service import extract_urls, detect_store
+    from services.ingestion_service import extract_urls
+    from services.parsing_service import detect_store
     
     # Extract URLs
     urls = extract_urls(text)
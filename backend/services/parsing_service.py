@@ -7,6 +7,8 @@ import re
 from typing import Optional, Tuple
 import httpx
 
+from core.tracing import span
+
 
 # ============================================================================
 # STORE DETECTION
@@ -211,32 +213,33 @@ async def unshorten_url(short_url: str, max_redirects: int = 5) -> str:
     Returns:
         URL final (ou URL original se falhar)
     """
-    try:
-        async with httpx.AsyncClient(
-            follow_redirects=True,
-            max_redirects=max_redirects,
-            timeout=3.0  # Timeout de 3 segundos
-        ) as client:
-            response = await client.head(short_url)
-            return str(response.url)
-    
-    except httpx.TimeoutException:
-        # Timeout - usar URL original
-        import logging
-        logging.warning(f"Timeout unshortening {short_url}, using original")
-        return short_url
-    
-    except httpx.TooManyRedirects:
-        # Muitos redirects - usar URL original
-        import logging
-        logging.warning(f"Too many redirects for {short_url}, using original")
-        return short_url
-    
-    except Exception as e:
-        # Qualquer outro erro - fallback para original
-        import logging
-        logging.warning(f"Failed to unshorten {short_url}: {e}, using original")
-        return short_url
+    with span("unshorten"):
+        try:
+            async with httpx.AsyncClient(
+                follow_redirects=True,
+                max_redirects=max_redirects,
+                timeout=3.0  # Timeout de 3 segundos
+            ) as client:
+                response = await client.head(short_url)
+                return str(response.url)
+        
+        except httpx.TimeoutException:
+            # Timeout - usar URL original
+            import logging
+            logging.warning(f"Timeout unshortening {short_url}, using original")
+            return short_url
+        
+        except httpx.TooManyRedirects:
+            # Muitos redirects - usar URL original
+            import logging
+            logging.warning(f"Too many redirects for {short_url}, using original")
+            return short_url
+        
+        except Exception as e:
+            # Qualquer outro erro - fallback para original
+            import logging
+            logging.warning(f"Failed to unshorten {short_url}: {e}, using original")
+            return short_url
 
 
 #============================================================================
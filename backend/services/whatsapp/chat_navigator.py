@@ -0,0 +1,144 @@
+"""
+Chat Navigator - Abre chats sem passar pela busca quando possível.
+
+Ordem de tentativa (do mais barato ao mais caro):
+1. Chat já aberto: título no header da conversa == grupo alvo (1 query, 0 esperas)
+2. Linha do chat visível na lista (nome aprendido na descoberta de grupos): clique direto
+3. Fallback: busca completa por nome (digitação + espera de resultados)
+
+O header é a fonte da verdade (nada de cache que possa ficar velho
+se a página navegar por outro motivo).
+"""
+import asyncio
+import time
+import logging
+from typing import Awaitable, Callable, Optional
+from playwright.async_api import Page
+
+from core.metrics import PLAYWRIGHT_OP_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+# Título do chat aberto (com fallback)
+HEADER_TITLE_SELECTORS = [
+    '[data-testid="conversation-header"] [title]',
+    '#main header span[title]',
+]
+
+# Linha do chat na lista lateral (sem busca)
+CHAT_ROW_SELECTORS = [
+    '#pane-side span[title="{name}"]',
+    '[data-testid="chat-list"] span[title="{name}"]',
+]
+
+
+def _same_chat(title: str, group_name: str) -> bool:
+    return title.strip().casefold() == group_name.strip().casefold()
+
+
+def _quote(name: str) -> str:
+    """Escapa aspas para uso dentro de seletor [title="..."]."""
+    return name.replace('\\', '\\\\').replace('"', '\\"')
+
+
+async def get_open_chat_title(page: Page) -> Optional[str]:
+    """
+    Retorna o título do chat aberto (header da conversa).
+    
+    Returns:
+        Nome do chat ou None se nenhum chat estiver aberto
+    """
+    for selector in HEADER_TITLE_SELECTORS:
+        try:
+            elem = await page.query_selector(selector)
+            if elem:
+                title = await elem.get_attribute('title')
+                if title:
+                    return title
+        except Exception:
+            continue
+    return None
+
+
+async def is_chat_open(page: Page, group_name: str) -> bool:
+    """Verifica se o chat alvo já está aberto."""
+    title = await get_open_chat_title(page)
+    return bool(title) and _same_chat(title, group_name)
+
+
+async def open_chat_row(
+    page: Page,
+    group_name: str,
+    confirm_timeout: float = 2.0
+) -> bool:
+    """
+    Clica direto na linha do chat na lista lateral (se estiver visível).
+    
+    Args:
+        page: Página do Playwright
+        group_name: Nome do grupo (display_name da descoberta)
+        confirm_timeout: Tempo máximo para o header confirmar o chat (segundos)
+    
+    Returns:
+        True se o chat abriu e o header confirmou
+    """
+    row = None
+    for selector in CHAT_ROW_SELECTORS:
+        try:
+            row = await page.query_selector(selector.format(name=_quote(group_name)))
+            if row:
+                break
+        except Exception:
+            continue
+    
+    if not row:
+        return False
+    
+    try:
+        await row.click()
+    except Exception as e:
+        logger.debug(f"Chat row click failed for {group_name}: {e}")
+        return False
+    
+    # Confirmar pelo header (sem espera fixa)
+    deadline = time.monotonic() + confirm_timeout
+    while time.monotonic() < deadline:
+        if await is_chat_open(page, group_name):
+            return True
+        await asyncio.sleep(0.1)
+    
+    return False
+
+
+async def open_chat(
+    page: Page,
+    group_name: str,
+    search_fallback: Callable[[Page, str], Awaitable[None]]
+) -> str:
+    """
+    Abre o chat pelo caminho mais barato disponível.
+    
+    Args:
+        page: Página do Playwright
+        group_name: Nome do grupo
+        search_fallback: Função que abre o grupo via busca (levanta exceção se falhar)
+    
+    Returns:
+        "already_open" | "chat_row" | "search"
+    """
+    start_time = time.time()
+    
+    if await is_chat_open(page, group_name):
+        method = "already_open"
+    elif await open_chat_row(page, group_name):
+        method = "chat_row"
+    else:
+        await search_fallback(page, group_name)
+        method = "search"
+    
+    duration = time.time() - start_time
+    PLAYWRIGHT_OP_SECONDS.labels(kind=f"chat_{method}").observe(duration)
+    logger.debug(f"Opened {group_name} via {method} ({int(duration * 1000)}ms)")
+    
+    return method
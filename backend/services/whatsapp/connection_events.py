@@ -0,0 +1,36 @@
+"""
+Connection Events - Eventos de conexão para o stream SSE da API.
+
+O worker publica no canal whatsapp:events:{connection_id}:
+- {"type": "status", "status": "..."}           transição de status
+- {"type": "qr", "qr_code": "...", "hash": "..."}  frame novo de QR
+
+A API repassa cada mensagem como um evento SSE (GET /connections/{id}/events).
+"""
+import json
+import logging
+
+import redis.asyncio as redis
+
+logger = logging.getLogger(__name__)
+
+
+def events_channel(connection_id: str) -> str:
+    return f"whatsapp:events:{connection_id}"
+
+
+def encode_event(event_type: str, **data) -> str:
+    return json.dumps({"type": event_type, **data})
+
+
+async def publish_event(
+    redis_conn: redis.Redis,
+    connection_id: str,
+    event_type: str,
+    **data
+):
+    """Publica evento para quem estiver ouvindo a conexão (sem ouvintes = no-op)."""
+    try:
+        await redis_conn.publish(events_channel(connection_id), encode_event(event_type, **data))
+    except Exception as e:
+        logger.warning(f"Could not publish {event_type} event for {connection_id}: {e}")
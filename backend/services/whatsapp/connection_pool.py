@@ -1,37 +1,149 @@
 """
-Connection Pool - Gerencia persistent contexts do Playwright.
+Connection Pool - Gerencia browser contexts do Playwright.
 
 Um browser context por conexão, com recovery automático.
+
+Modos:
+- persistent: 1 Chromium por conexão (launch_persistent_context, user_data_dir)
+- shared: 1 Chromium para até N conexões, cada uma no seu context isolado.
+  Sessão salva/restaurada via storage_state (cookies + localStorage + IndexedDB,
+  onde o WhatsApp Web guarda as chaves de login)
+
+Hibernação (max_live_contexts > 0):
+- No máximo N contexts vivos; ao abrir mais um, o menos usado recentemente (LRU)
+  e ocioso é fechado (sessão fica em disco)
+- Conexão hibernada é reidratada sob demanda no próximo get_or_create
+  (reabre o context e carrega o WhatsApp Web até a lista de chats), sob o
+  lock da própria conexão: as demais não esperam a reidratação
+- Quem usa a página por vários passos (login, envio) deve usar pool.use(),
+  que protege o context da hibernação enquanto ele estiver em uso
+- Latências de hibernate/wake vão para CONTEXT_LIFECYCLE_SECONDS (core.metrics)
+
+Warm pool (warm_pool_size > 0):
+- Contexts pré-lançados com o WhatsApp Web já carregado (sem sessão)
+- Conexão nova (sem sessão em disco) assume um deles: o diretório de sessão
+  whatsapp_sessions/{connection_id} vira link para o diretório do warm context
+- O QR aparece sem esperar Chromium subir; o pool é reabastecido em background
+- Contexts warm contam no orçamento de contexts vivos (e no limite por browser):
+  sem espaço, o reabastecimento para e, se preciso, warm contexts são
+  descartados antes de hibernar uma conexão
 """
+import asyncio
+import os
+import shutil
+import time
+import uuid
 import logging
-from typing import Dict, Optional
-from playwright.async_api import async_playwright, BrowserContext, Playwright
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+from playwright.async_api import async_playwright, Browser, BrowserContext, Playwright
+
+from core.metrics import CONTEXT_LIFECYCLE_SECONDS
+from services.whatsapp.resource_filter import ResourceFilter
+from services.whatsapp.session_compaction import compact_session
 
 logger = logging.getLogger(__name__)
 
 
+POOL_MODES = ("persistent", "shared")
+
+LAUNCH_ARGS = [
+    '--disable-blink-features=AutomationControlled',
+    '--disable-dev-shm-usage',
+    '--no-sandbox',
+    '--disable-setuid-sandbox',
+]
+
+CONTEXT_OPTIONS = {
+    'viewport': {'width': 1280, 'height': 720},
+    'locale': 'pt-BR',
+    # User agent realista
+    'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+}
+
+STORAGE_STATE_FILE = "storage_state.json"
+WARM_DIR = "_warm"
+
+WHATSAPP_WEB_URL = "https://web.whatsapp.com"
+CHAT_LIST_SELECTOR = '[data-testid="chat-list"], #pane-side'
+WAKE_TIMEOUT_MS = 60000
+
+
 class ConnectionPool:
     """
-    Gerencia conexões WhatsApp via Playwright persistent contexts.
+    Gerencia conexões WhatsApp via Playwright browser contexts.
     
     Características:
-    - 1 persistent context por connection_id
+    - 1 context por connection_id
     - Sessão salva em whatsapp_sessions/{connection_id}/
     - Recovery automático (detecta context morto e recria)
     - Headless por padrão
+    - Modo "shared": divide um Chromium entre até `contexts_per_browser` conexões
+    - Orçamento de contexts vivos com hibernação LRU (`max_live_contexts`)
+    - Warm pool de contexts pré-carregados para conexões novas (`warm_pool_size`)
     """
     
-    def __init__(self, sessions_dir: str = "./whatsapp_sessions"):
+    def __init__(
+        self,
+        sessions_dir: str = "./whatsapp_sessions",
+        mode: str = "persistent",
+        contexts_per_browser: int = 8,
+        max_live_contexts: int = 0,
+        block_resources: bool = False,
+        warm_pool_size: int = 0
+    ):
+        if mode not in POOL_MODES:
+            raise ValueError(f"Invalid pool mode '{mode}' (expected one of {POOL_MODES})")
+        
         self.sessions_dir = sessions_dir
+        self.mode = mode
+        self.contexts_per_browser = max(1, contexts_per_browser)
         self.playwright: Optional[Playwright] = None
-        self.contexts: Dict[str, BrowserContext] = {}
-        logger.info("ConnectionPool initialized")
+        # Ordem = uso recente (mais antigo primeiro)
+        self.contexts: "OrderedDict[str, BrowserContext]" = OrderedDict()
+        
+        # Modo shared: browsers abertos e qual browser hospeda cada conexão
+        self.browsers: List[Browser] = []
+        self._browser_of: Dict[str, Browser] = {}
+        
+        # Hibernação: 0 = sem limite de contexts vivos
+        self.max_live_contexts = max(0, max_live_contexts)
+        self.hibernated: Set[str] = set()
+        self._busy: Dict[str, int] = {}
+        self._create_lock = asyncio.Lock()
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self.stats = {
+            "hibernate_count": 0,
+            "wake_count": 0,
+            "hibernate_ms_total": 0,
+            "hibernate_ms_max": 0,
+            "wake_ms_total": 0,
+            "wake_ms_max": 0,
+            "recycle_count": 0,
+        }
+        
+        # Filtro de imagens/mídia/fontes por context (ver resource_filter)
+        self.block_resources = block_resources
+        self.filters: Dict[str, ResourceFilter] = {}
+        
+        # Warm pool: [(warm_key, context)] prontos para conexões novas
+        self.warm_pool_size = max(0, warm_pool_size)
+        self.warm: List[Tuple[str, BrowserContext]] = []
+        self._warming = 0
+        self._refill_task: Optional[asyncio.Task] = None
+        
+        logger.info(f"ConnectionPool initialized (mode: {mode}, max live: {self.max_live_contexts or 'unlimited'})")
     
     async def start(self):
         """Inicia o Playwright."""
         if not self.playwright:
             self.playwright = await async_playwright().start()
             logger.info("Playwright started")
+        
+        if self.warm_pool_size:
+            self._prune_warm_dirs()
+            self._schedule_refill()
     
     async def get_or_create(
         self,
@@ -39,12 +151,14 @@ class ConnectionPool:
         headless: bool = True
     ) -> BrowserContext:
         """
-        Obtém ou cria persistent context para connection.
+        Obtém ou cria context para connection.
         
         Inclui recovery: se context estiver morto, recria automaticamente.
         
         IMPORTANTE: NÃO navega automaticamente para WhatsApp Web!
         Isso é responsabilidade do login_cycle() no Worker.
+        Exceções: conexão hibernada é reidratada (já estava logada) e conexão
+        nova pode receber um warm context já no WhatsApp Web.
         
         Args:
             connection_id: UUID da WhatsAppConnection
@@ -53,60 +167,534 @@ class ConnectionPool:
         Returns:
             BrowserContext ativo e pronto (sem navegação automática)
         """
-        # Verificar se já existe
-        if connection_id in self.contexts:
-            context = self.contexts[connection_id]
+        # Lock da conexão: quem chega durante a criação/reidratação espera por ela
+        async with self._connection_lock(connection_id):
+            # Verificar se já existe
+            if connection_id in self.contexts:
+                context = self.contexts[connection_id]
+                
+                # RECOVERY: Verificar se context ainda está vivo
+                try:
+                    # Tentar acessar pages (se falhar, context morreu)
+                    pages = context.pages
+                    if pages and len(pages) > 0:
+                        page = pages[0]
+                        if not page.is_closed():
+                            logger.debug(f"Context {connection_id} already exists and is alive")
+                            self.contexts.move_to_end(connection_id)
+                            return context
+                    
+                    logger.warning(f"Context {connection_id} is dead, recreating...")
+                except Exception as e:
+                    logger.error(f"Context {connection_id} check failed: {e}")
+                
+                # Context morreu, remover e recriar
+                try:
+                    await context.close()
+                except:
+                    pass
+                del self.contexts[connection_id]
+                await self._release_browser(connection_id)
             
-            # RECOVERY: Verificar se context ainda está vivo
-            try:
-                # Tentar acessar pages (se falhar, context morreu)
-                pages = context.pages
-                if pages and len(pages) > 0:
-                    page = pages[0]
-                    if not page.is_closed():
-                        logger.debug(f"Context {connection_id} already exists and is alive")
-                        return context
+            waking = connection_id in self.hibernated
+            start_time = time.time()
+            
+            # Lock global só para orçamento + abertura do context (rápido);
+            # a reidratação (até WAKE_TIMEOUT_MS) roda fora dele
+            async with self._create_lock:
+                context = None
+                if not waking:
+                    # Warm context já conta no orçamento: assumi-lo não abre nada novo
+                    context = await self._claim_warm(connection_id)
                 
-                logger.warning(f"Context {connection_id} is dead, recreating...")
-            except Exception as e:
-                logger.error(f"Context {connection_id} check failed: {e}")
+                if context is None:
+                    await self._enforce_budget(exclude=connection_id)
+                    logger.info(f"Creating {self.mode} context for {connection_id}")
+                    context = await self._create_context(connection_id, headless)
+                
+                # Salvar no pool
+                self.contexts[connection_id] = context
+                logger.info(f"✓ Context created and saved: {connection_id}")
+            
+            if waking:
+                # Ocupado durante a reidratação: outra conexão não pode hiberná-lo
+                with self._pinned(connection_id):
+                    await self._rehydrate(connection_id, context)
+                self.hibernated.discard(connection_id)
+                self._record("wake", int((time.time() - start_time) * 1000))
+            
+            return context
+    
+    @asynccontextmanager
+    async def use(
+        self,
+        connection_id: str,
+        headless: bool = True
+    ) -> AsyncIterator[BrowserContext]:
+        """
+        Obtém o context e o protege da hibernação enquanto estiver em uso.
+        
+        Uso:
+            async with pool.use(connection_id) as context:
+                page = context.pages[0]
+        """
+        with self._pinned(connection_id):
+            yield await self.get_or_create(connection_id, headless)
+    
+    def pin(self, connection_id: str):
+        """
+        Protege a conexão da hibernação até o unpin() correspondente.
+        
+        Para fluxos que atravessam vários ciclos (login por QR); dentro de
+        um bloco, prefira pool.use().
+        """
+        self._busy[connection_id] = self._busy.get(connection_id, 0) + 1
+    
+    def unpin(self, connection_id: str):
+        """Desfaz um pin()."""
+        if not self._busy.get(connection_id):
+            return
+        
+        self._busy[connection_id] -= 1
+        if not self._busy[connection_id]:
+            del self._busy[connection_id]
+    
+    @contextmanager
+    def _pinned(self, connection_id: str):
+        """Marca a conexão como ocupada (fora do alcance da hibernação)."""
+        self.pin(connection_id)
+        try:
+            yield
+        finally:
+            self.unpin(connection_id)
+    
+    def _connection_lock(self, connection_id: str) -> asyncio.Lock:
+        if connection_id not in self._locks:
+            self._locks[connection_id] = asyncio.Lock()
+        return self._locks[connection_id]
+    
+    @contextmanager
+    def send_profile(self, connection_id: str):
+        """Relaxa o filtro de recursos durante um envio (preview precisa de imagens)."""
+        resource_filter = self.filters.get(connection_id)
+        if not resource_filter:
+            yield
+            return
+        
+        with resource_filter.sending():
+            yield
+    
+    def _open_count(self) -> int:
+        """Contexts abertos que contam no orçamento: conexões, warm prontos e warm carregando."""
+        return len(self.contexts) + len(self.warm) + self._warming
+    
+    async def _enforce_budget(self, exclude: str):
+        """
+        Libera espaço para mais um context.
+        
+        Descarta primeiro os warm contexts prontos (baratos de recriar) e
+        depois hiberna contexts ociosos (LRU).
+        """
+        if not self.max_live_contexts:
+            return
+        
+        while self.warm and self._open_count() >= self.max_live_contexts:
+            await self._discard_warm(*self.warm.pop())
+            logger.info(f"Warm context discarded to fit the live context budget ({len(self.warm)} left)")
+        
+        while self._open_count() >= self.max_live_contexts:
+            # Lock da vítima ocupado = get_or_create/reidratação em andamento para ela
+            victim = next(
+                (
+                    cid for cid in self.contexts
+                    if cid != exclude
+                    and not self._busy.get(cid)
+                    and not self._connection_lock(cid).locked()
+                ),
+                None
+            )
+            if victim is None:
+                logger.warning(
+                    f"Live context budget exceeded ({self._open_count()}/{self.max_live_contexts}), "
+                    f"all contexts are busy"
+                )
+                return
+            
+            # Lock livre: adquire sem esperar, e ninguém reabre a vítima no meio do close
+            async with self._connection_lock(victim):
+                await self.hibernate(victim)
+    
+    async def hibernate(self, connection_id: str):
+        """
+        Fecha o context mantendo a sessão em disco.
+        
+        A conexão é reidratada automaticamente no próximo get_or_create.
+        """
+        if connection_id not in self.contexts:
+            return
+        
+        start_time = time.time()
+        await self.close(connection_id)
+        self.hibernated.add(connection_id)
+        
+        duration_ms = int((time.time() - start_time) * 1000)
+        self._record("hibernate", duration_ms)
+        logger.info(f"Context hibernated: {connection_id} ({duration_ms}ms)")
+    
+    async def recycle(self, connection_id: str) -> bool:
+        """
+        Fecha e reabre o context (devolve a memória acumulada pelo renderer).
+        
+        Context em uso (envio/monitor) não é reciclado.
+        
+        Returns:
+            True se o context foi reciclado
+        """
+        if connection_id not in self.contexts or self._busy.get(connection_id):
+            return False
+        
+        async with self._connection_lock(connection_id):
+            await self.hibernate(connection_id)
+        await self.get_or_create(connection_id)
+        
+        self.stats["recycle_count"] += 1
+        logger.info(f"Context recycled: {connection_id}")
+        return True
+    
+    async def compact_sessions(self) -> dict:
+        """
+        Poda caches dos perfis sem context vivo (hibernados ou não carregados).
+        
+        Só no modo persistent (no shared a sessão é só o storage_state.json).
+        
+        Returns:
+            {"sessions": int, "reclaimed_bytes": int}
+        """
+        summary = {"sessions": 0, "reclaimed_bytes": 0}
+        
+        if self.mode != "persistent" or not os.path.isdir(self.sessions_dir):
+            return summary
+        
+        for entry in os.scandir(self.sessions_dir):
+            if entry.name == WARM_DIR or not entry.is_dir():
+                continue
+            
+            # Lock: nenhum context é criado para este perfil durante a poda
+            async with self._create_lock:
+                if entry.name in self.contexts:
+                    continue
+                result = await asyncio.to_thread(compact_session, entry.path)
+            
+            if result["removed"]:
+                summary["sessions"] += 1
+                summary["reclaimed_bytes"] += result["reclaimed_bytes"]
+        
+        return summary
+    
+    async def _rehydrate(self, connection_id: str, context: BrowserContext):
+        """Recarrega o WhatsApp Web de uma conexão que estava hibernada."""
+        try:
+            page = context.pages[0]
+            await page.goto(WHATSAPP_WEB_URL, wait_until="domcontentloaded", timeout=WAKE_TIMEOUT_MS)
+            await page.wait_for_selector(CHAT_LIST_SELECTOR, timeout=WAKE_TIMEOUT_MS)
+            logger.info(f"Context woke up: {connection_id}")
+        except Exception as e:
+            # Sessão pode ter expirado: o worker detecta pelo status da página
+            logger.warning(f"Rehydrate incomplete for {connection_id}: {e}")
+    
+    def _record(self, kind: str, duration_ms: int):
+        CONTEXT_LIFECYCLE_SECONDS.labels(kind=kind).observe(duration_ms / 1000)
+        self.stats[f"{kind}_count"] += 1
+        self.stats[f"{kind}_ms_total"] += duration_ms
+        self.stats[f"{kind}_ms_max"] = max(self.stats[f"{kind}_ms_max"], duration_ms)
+    
+    def get_hibernation_stats(self) -> dict:
+        """
+        Métricas de hibernação.
+        
+        Returns:
+            {
+                "live": int, "hibernated": int, "max_live": int,
+                "hibernations": int, "hibernate_ms_avg": int, "hibernate_ms_max": int,
+                "wakes": int, "wake_ms_avg": int, "wake_ms_max": int,
+                "recycles": int
+            }
+        """
+        stats = {
+            "live": len(self.contexts),
+            "hibernated": len(self.hibernated),
+            "max_live": self.max_live_contexts,
+        }
+        for kind, label in (("hibernate", "hibernations"), ("wake", "wakes")):
+            count = self.stats[f"{kind}_count"]
+            stats[label] = count
+            stats[f"{kind}_ms_avg"] = self.stats[f"{kind}_ms_total"] // count if count else 0
+            stats[f"{kind}_ms_max"] = self.stats[f"{kind}_ms_max"]
+        stats["recycles"] = self.stats["recycle_count"]
+        return stats
+    
+    async def _create_context(self, key: str, headless: bool) -> BrowserContext:
+        """Cria context no modo do pool (com filtro de recursos, se ativo)."""
+        if self.mode == "shared":
+            context = await self._create_shared_context(key, headless)
+        else:
+            context = await self._create_persistent_context(key, headless)
+        
+        if self.block_resources:
+            self.filters[key] = await ResourceFilter.attach(context)
+        
+        return context
+    
+    def _has_session(self, connection_id: str) -> bool:
+        session_dir = os.path.join(self.sessions_dir, connection_id)
+        
+        if os.path.islink(session_dir) and not os.path.exists(session_dir):
+            # Link para um warm dir que não existe mais: sessão perdida, recomeça do zero
+            logger.warning(f"Session link for {connection_id} is dangling, removing it")
+            os.unlink(session_dir)
+            return False
+        
+        return os.path.lexists(session_dir)
+    
+    async def _claim_warm(self, connection_id: str) -> Optional[BrowserContext]:
+        """
+        Entrega um warm context para uma conexão nova.
+        
+        Conexões com sessão em disco nunca usam warm context (perderiam o login).
+        Um link de sessão quebrado (warm dir apagado) é removido antes, então a
+        conexão é tratada como nova.
+        
+        Returns:
+            Context já no WhatsApp Web, ou None se não houver warm disponível
+        """
+        if self._has_session(connection_id) or not self.warm:
+            return None
+        
+        warm_key, context = self.warm.pop(0)
+        self._schedule_refill()
+        
+        if not context.pages or context.pages[0].is_closed():
+            await self._discard_warm(warm_key, context)
+            return None
+        
+        # Vincular diretório de sessão ao warm context
+        if self.mode == "shared":
+            self._browser_of[connection_id] = self._browser_of.pop(warm_key)
+        else:
+            os.makedirs(self.sessions_dir, exist_ok=True)
+            os.symlink(warm_key, os.path.join(self.sessions_dir, connection_id))
+        
+        if warm_key in self.filters:
+            self.filters[connection_id] = self.filters.pop(warm_key)
+        
+        logger.info(f"✓ Warm context claimed by {connection_id} ({len(self.warm)} left)")
+        return context
+    
+    def _schedule_refill(self):
+        if self.warm_pool_size and (self._refill_task is None or self._refill_task.done()):
+            self._refill_task = asyncio.create_task(self.fill_warm_pool())
+    
+    async def fill_warm_pool(self, headless: bool = True):
+        """
+        Pré-lança contexts até `warm_pool_size`, já com o WhatsApp Web carregado.
+        
+        Cada context é criado sob o _create_lock (mesmo limite por browser e
+        mesmo orçamento de contexts vivos do get_or_create). Sem espaço no
+        orçamento, ou se um lançamento/pré-carga falhar, o reabastecimento para
+        e só recomeça no próximo warm context assumido (ou no próximo start).
+        """
+        while self.playwright and len(self.warm) < self.warm_pool_size:
+            warm_key = f"{WARM_DIR}/{uuid.uuid4().hex}"
+            start_time = time.time()
+            
+            async with self._create_lock:
+                # Outro reabastecimento pode ter completado o pool enquanto esperávamos
+                if len(self.warm) + self._warming >= self.warm_pool_size:
+                    return
+                
+                if self.max_live_contexts and self._open_count() >= self.max_live_contexts:
+                    logger.info(
+                        f"Warm pool refill paused: live context budget is full "
+                        f"({len(self.warm)}/{self.warm_pool_size} warm ready)"
+                    )
+                    return
+                
+                try:
+                    context = await self._create_context(warm_key, headless)
+                except Exception as e:
+                    logger.error(
+                        f"Could not launch warm context, refill stopped until the next claim "
+                        f"({len(self.warm)}/{self.warm_pool_size} ready): {e}"
+                    )
+                    return
+                
+                # Conta no orçamento enquanto carrega (fora do lock)
+                self._warming += 1
             
-            # Context morreu, remover e recriar
             try:
-                await context.close()
-            except:
-                pass
-            del self.contexts[connection_id]
+                await context.pages[0].goto(
+                    WHATSAPP_WEB_URL,
+                    wait_until="domcontentloaded",
+                    timeout=WAKE_TIMEOUT_MS
+                )
+            except Exception as e:
+                logger.error(
+                    f"Could not preload WhatsApp Web in warm context, refill stopped until the next claim "
+                    f"({len(self.warm)}/{self.warm_pool_size} ready): {e}"
+                )
+                await self._discard_warm(warm_key, context)
+                return
+            finally:
+                self._warming -= 1
+            
+            self.warm.append((warm_key, context))
+            duration_ms = int((time.time() - start_time) * 1000)
+            logger.info(f"Warm context ready ({len(self.warm)}/{self.warm_pool_size}, {duration_ms}ms)")
+    
+    async def _discard_warm(self, warm_key: str, context: BrowserContext):
+        try:
+            await context.close()
+        except Exception:
+            pass
         
-        # Criar novo persistent context
-        user_data_dir = f"{self.sessions_dir}/{connection_id}"
+        self.filters.pop(warm_key, None)
+        await self._release_browser(warm_key)
+        shutil.rmtree(os.path.join(self.sessions_dir, warm_key), ignore_errors=True)
+    
+    def _prune_warm_dirs(self):
+        """Remove diretórios warm de execuções anteriores que nenhuma conexão assumiu."""
+        warm_root = os.path.join(self.sessions_dir, WARM_DIR)
+        if not os.path.isdir(warm_root):
+            return
         
-        logger.info(f"Creating persistent context for {connection_id}")
+        claimed = {
+            os.path.normpath(os.readlink(entry.path))
+            for entry in os.scandir(self.sessions_dir)
+            if entry.is_symlink()
+        }
+        
+        for entry in os.scandir(warm_root):
+            if os.path.normpath(f"{WARM_DIR}/{entry.name}") not in claimed:
+                shutil.rmtree(entry.path, ignore_errors=True)
+    
+    async def _create_persistent_context(
+        self,
+        connection_id: str,
+        headless: bool
+    ) -> BrowserContext:
+        """Um Chromium dedicado com user_data_dir próprio."""
+        user_data_dir = f"{self.sessions_dir}/{connection_id}"
         
-        context = await self.playwright.chromium.launch_persistent_context(
+        return await self.playwright.chromium.launch_persistent_context(
             user_data_dir=user_data_dir,
             headless=headless,
-            viewport={'width': 1280, 'height': 720},
-            locale='pt-BR',
-            args=[
-                '--disable-blink-features=AutomationControlled',
-                '--disable-dev-shm-usage',
-                '--no-sandbox',
-                '--disable-setuid-sandbox',
-            ],
-            # User agent realista
-            user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+            args=LAUNCH_ARGS,
+            **CONTEXT_OPTIONS
+        )
+    
+    async def _create_shared_context(
+        self,
+        connection_id: str,
+        headless: bool
+    ) -> BrowserContext:
+        """Context isolado num Chromium compartilhado, restaurando a sessão salva."""
+        browser = await self._acquire_browser(headless)
+        
+        state_path = self._storage_state_path(connection_id)
+        storage_state = state_path if os.path.exists(state_path) else None
+        
+        context = await browser.new_context(
+            storage_state=storage_state,
+            **CONTEXT_OPTIONS
         )
         
-        # Salvar no pool
-        self.contexts[connection_id] = context
-        logger.info(f"✓ Context created and saved: {connection_id}")
+        try:
+            # Mesmo contrato do persistent context: sempre há pages[0]
+            await context.new_page()
+        except Exception:
+            await context.close()
+            await self._release_browser_slot(browser)
+            raise
         
+        self._browser_of[connection_id] = browser
         return context
     
+    async def _acquire_browser(self, headless: bool) -> Browser:
+        """Retorna o browser menos ocupado com vaga (lança um novo se todos estiverem cheios)."""
+        live = [b for b in self.browsers if b.is_connected()]
+        self.browsers = live
+        
+        if live:
+            browser = min(live, key=lambda b: len(b.contexts))
+            if len(browser.contexts) < self.contexts_per_browser:
+                return browser
+        
+        browser = await self.playwright.chromium.launch(
+            headless=headless,
+            args=LAUNCH_ARGS
+        )
+        self.browsers.append(browser)
+        logger.info(f"Shared browser launched ({len(self.browsers)} running)")
+        return browser
+    
+    async def _release_browser(self, connection_id: str):
+        """Desassocia conexão do browser (fecha o browser se ficou vazio)."""
+        browser = self._browser_of.pop(connection_id, None)
+        if browser:
+            await self._release_browser_slot(browser)
+    
+    async def _release_browser_slot(self, browser: Browser):
+        if browser.contexts:
+            return
+        
+        try:
+            await browser.close()
+        except Exception:
+            pass
+        
+        if browser in self.browsers:
+            self.browsers.remove(browser)
+        logger.info(f"Shared browser closed ({len(self.browsers)} running)")
+    
+    def _storage_state_path(self, connection_id: str) -> str:
+        return os.path.join(self.sessions_dir, connection_id, STORAGE_STATE_FILE)
+    
+    async def save_session(self, connection_id: str) -> bool:
+        """
+        Salva a sessão da conexão em disco (modo shared).
+        
+        No modo persistent o Chromium já grava no user_data_dir, então é no-op.
+        
+        Returns:
+            True se a sessão foi salva
+        """
+        if self.mode != "shared" or connection_id not in self.contexts:
+            return False
+        
+        state_path = self._storage_state_path(connection_id)
+        os.makedirs(os.path.dirname(state_path), exist_ok=True)
+        
+        try:
+            # Grava num arquivo temporário e troca (não corrompe a sessão anterior)
+            tmp_path = f"{state_path}.tmp"
+            await self.contexts[connection_id].storage_state(
+                path=tmp_path,
+                indexed_db=True
+            )
+            os.replace(tmp_path, state_path)
+            logger.debug(f"Session saved: {connection_id}")
+            return True
+        except Exception as e:
+            logger.error(f"Error saving session {connection_id}: {e}")
+            return False
+    
     async def close(self, connection_id: str):
         """Fecha context específico."""
+        self.hibernated.discard(connection_id)
+        
         if connection_id in self.contexts:
+            await self.save_session(connection_id)
+            
             try:
                 await self.contexts[connection_id].close()
                 logger.info(f"Context closed: {connection_id}")
@@ -114,14 +702,29 @@ class ConnectionPool:
                 logger.error(f"Error closing context {connection_id}: {e}")
             finally:
                 del self.contexts[connection_id]
+                self.filters.pop(connection_id, None)
+                await self._release_browser(connection_id)
     
     async def close_all(self):
         """Fecha todos os contexts e o Playwright."""
         logger.info("Closing all contexts...")
         
+        if self._refill_task and not self._refill_task.done():
+            self._refill_task.cancel()
+        
         for connection_id in list(self.contexts.keys()):
             await self.close(connection_id)
         
+        while self.warm:
+            await self._discard_warm(*self.warm.pop())
+        
+        for browser in list(self.browsers):
+            try:
+                await browser.close()
+            except Exception:
+                pass
+        self.browsers = []
+        
         if self.playwright:
             await self.playwright.stop()
             self.playwright = None
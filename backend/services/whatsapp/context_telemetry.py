@@ -0,0 +1,260 @@
+"""
+Context Telemetry - Memória/CPU por conexão dos browsers do Playwright.
+
+Fontes (Linux, lê /proc):
+- persistent: árvore de processos do Chromium da conexão (achado pelo
+  --user-data-dir na linha de comando). RSS somado (memory_mb) e tempo de CPU.
+  O pid do browser fica em cache por user_data_dir; /proc inteiro só é
+  varrido (uma vez por amostragem, fora do event loop) quando falta algum
+- shared: vários contexts dividem os mesmos processos, então a memória
+  por conexão vem do heap JS da página (heap_mb, CDP Performance.getMetrics)
+
+RSS e heap JS não são comparáveis: cada fonte tem o seu orçamento.
+
+Usado pelo worker para exportar amostras por conexão e reciclar contexts
+que passam do orçamento de memória.
+"""
+import asyncio
+import os
+import time
+import logging
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+PROC_ROOT = "/proc"
+
+# Campo de memória comparado ao orçamento, por fonte da amostra
+BUDGET_FIELDS = {"process_tree": "memory_mb", "js_heap": "heap_mb"}
+
+
+def children(pid: int) -> List[int]:
+    """Filhos diretos de um processo (via /proc/<pid>/task/*/children)."""
+    result = []
+    task_dir = f"{PROC_ROOT}/{pid}/task"
+    try:
+        for tid in os.listdir(task_dir):
+            with open(f"{task_dir}/{tid}/children") as f:
+                result.extend(int(c) for c in f.read().split())
+    except (FileNotFoundError, ProcessLookupError, PermissionError):
+        pass
+    return result
+
+
+def descendants(pid: int) -> List[int]:
+    """Todos os descendentes de um processo."""
+    pids, stack = [], children(pid)
+    while stack:
+        child = stack.pop()
+        pids.append(child)
+        stack.extend(children(child))
+    return pids
+
+
+def read_kb(path: str, field: str) -> int:
+    """Lê um campo em kB de /proc/<pid>/status ou smaps_rollup."""
+    try:
+        with open(path) as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except (FileNotFoundError, ProcessLookupError, PermissionError):
+        pass
+    return 0
+
+
+def cpu_seconds(pid: int) -> float:
+    """Tempo de CPU (user + system) consumido pelo processo."""
+    try:
+        with open(f"{PROC_ROOT}/{pid}/stat") as f:
+            # O nome do processo pode ter espaços: campos começam após ')'
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+    except (FileNotFoundError, ProcessLookupError, PermissionError, IndexError):
+        return 0.0
+
+
+def browser_user_data_dir(pid: int) -> Optional[str]:
+    """
+    user_data_dir (realpath) do processo, se ele for o processo principal de um Chromium.
+    
+    Filhos (renderer/gpu/...) têm --type na linha de comando e retornam None.
+    """
+    try:
+        with open(f"{PROC_ROOT}/{pid}/cmdline", "rb") as f:
+            args = f.read().split(b"\0")
+    except (FileNotFoundError, ProcessLookupError, PermissionError):
+        return None
+    
+    if any(arg.startswith(b"--type=") for arg in args):
+        return None
+    
+    for arg in args:
+        if arg.startswith(b"--user-data-dir="):
+            return os.path.realpath(arg.split(b"=", 1)[1].decode(errors="ignore"))
+    return None
+
+
+def browser_pids() -> Dict[str, int]:
+    """Varre /proc uma vez: {user_data_dir (realpath): pid do processo principal}."""
+    try:
+        pids = [int(p) for p in os.listdir(PROC_ROOT) if p.isdigit()]
+    except FileNotFoundError:
+        return {}
+    
+    result = {}
+    for pid in pids:
+        user_data_dir = browser_user_data_dir(pid)
+        if user_data_dir:
+            result[user_data_dir] = pid
+    return result
+
+
+def find_browser_pid(user_data_dir: str) -> Optional[int]:
+    """Acha o processo principal do Chromium que usa um user_data_dir."""
+    return browser_pids().get(os.path.realpath(user_data_dir))
+
+
+def sample_process_tree(root_pid: int) -> Dict[str, float]:
+    """RSS (MB) e CPU (s) do processo e de todos os descendentes."""
+    pids = [root_pid] + descendants(root_pid)
+    rss_kb = sum(read_kb(f"{PROC_ROOT}/{p}/status", "VmRSS") for p in pids)
+    return {
+        "processes": len(pids),
+        "memory_mb": round(rss_kb / 1024, 1),
+        "cpu_seconds": round(sum(cpu_seconds(p) for p in pids), 2),
+    }
+
+
+class ContextTelemetry:
+    """
+    Amostra memória/CPU de cada context vivo do ConnectionPool.
+    
+    Guarda a última amostra por conexão para calcular % de CPU entre amostras
+    e o pid do browser por user_data_dir (validado a cada amostra).
+    """
+    
+    def __init__(self, pool):
+        self.pool = pool
+        self.samples: Dict[str, dict] = {}
+        self._pids: Dict[str, int] = {}
+    
+    async def sample(self) -> Dict[str, dict]:
+        """
+        Amostra todas as conexões com context vivo.
+        
+        Returns:
+            {connection_id: {
+                "source": "process_tree" | "js_heap",
+                "memory_mb": float,   # process_tree: RSS da árvore
+                "heap_mb": float,     # js_heap: heap JS da página
+                "cpu_percent": float | None,
+                ...
+            }}
+        """
+        now = time.time()
+        connection_ids = list(self.pool.contexts.keys())
+        
+        if self.pool.mode == "persistent":
+            # Só leitura de /proc: tudo numa thread, sem travar o event loop
+            raw = await asyncio.to_thread(self._sample_persistent, connection_ids)
+        else:
+            raw = {}
+            for connection_id in connection_ids:
+                try:
+                    raw[connection_id] = await self._sample_shared(connection_id)
+                except Exception as e:
+                    logger.debug(f"Telemetry sample failed for {connection_id}: {e}")
+        
+        samples = {}
+        for connection_id, sample in raw.items():
+            if sample is None:
+                continue
+            
+            sample["sampled_at"] = now
+            sample["cpu_percent"] = self._cpu_percent(connection_id, sample)
+            samples[connection_id] = sample
+        
+        self.samples = samples
+        return samples
+    
+    def _sample_persistent(self, connection_ids: List[str]) -> Dict[str, Optional[dict]]:
+        dirs = {
+            connection_id: os.path.realpath(os.path.join(self.pool.sessions_dir, connection_id))
+            for connection_id in connection_ids
+        }
+        
+        # Pid em cache só vale se ainda for o browser desse diretório (pid reusado, restart)
+        pids = {
+            user_data_dir: pid
+            for user_data_dir, pid in self._pids.items()
+            if user_data_dir in dirs.values() and browser_user_data_dir(pid) == user_data_dir
+        }
+        if any(d not in pids for d in dirs.values()):
+            pids.update({d: pid for d, pid in browser_pids().items() if d in dirs.values()})
+        self._pids = pids
+        
+        samples = {}
+        for connection_id, user_data_dir in dirs.items():
+            pid = pids.get(user_data_dir)
+            if pid is None:
+                continue
+            
+            try:
+                samples[connection_id] = {"source": "process_tree", "pid": pid, **sample_process_tree(pid)}
+            except Exception as e:
+                logger.debug(f"Telemetry sample failed for {connection_id}: {e}")
+        return samples
+    
+    async def _sample_shared(self, connection_id: str) -> Optional[dict]:
+        context = self.pool.contexts.get(connection_id)
+        if not context or not context.pages:
+            return None
+        
+        page = context.pages[0]
+        cdp = await context.new_cdp_session(page)
+        try:
+            await cdp.send("Performance.enable")
+            metrics = await cdp.send("Performance.getMetrics")
+        finally:
+            await cdp.detach()
+        
+        values = {m["name"]: m["value"] for m in metrics.get("metrics", [])}
+        return {
+            "source": "js_heap",
+            "heap_mb": round(values.get("JSHeapTotalSize", 0) / (1024 * 1024), 1),
+            # TaskDuration = tempo de CPU gasto pela página (segundos)
+            "cpu_seconds": round(values.get("TaskDuration", 0.0), 2),
+        }
+    
+    def _cpu_percent(self, connection_id: str, sample: dict) -> Optional[float]:
+        previous = self.samples.get(connection_id)
+        if not previous or previous.get("source") != sample["source"]:
+            return None
+        
+        elapsed = sample["sampled_at"] - previous["sampled_at"]
+        used = sample["cpu_seconds"] - previous["cpu_seconds"]
+        if elapsed <= 0 or used < 0:
+            return None
+        
+        return round(100 * used / elapsed, 1)
+    
+    def over_budget(self, memory_budget_mb: float, heap_budget_mb: float = 0) -> List[str]:
+        """
+        Conexões cuja última amostra passou do orçamento da sua fonte.
+        
+        Args:
+            memory_budget_mb: RSS da árvore de processos (persistent); 0 = sem limite
+            heap_budget_mb: heap JS da página (shared); 0 = sem limite
+        """
+        budgets = {"process_tree": memory_budget_mb, "js_heap": heap_budget_mb}
+        
+        return [
+            connection_id
+            for connection_id, sample in self.samples.items()
+            if budgets[sample["source"]]
+            and sample[BUDGET_FIELDS[sample["source"]]] > budgets[sample["source"]]
+        ]
@@ -3,7 +3,7 @@ WhatsApp Gateway - Interface abstrata para providers WhatsApp.
 
 Permite trocar implementação (Playwright, Evolution, Cloud API) sem mudar código do domínio.
 """
-from typing import Protocol, List, Optional
+from typing import Protocol, Dict, List, Optional
 from dataclasses import dataclass
 from datetime import datetime
 
@@ -81,6 +81,20 @@ class WhatsAppGateway(Protocol):
         """
         ...
     
+    async def sweep_source_groups(
+        self,
+        connection_id: str,
+        source_groups: List[str]
+    ) -> Optional[Dict[str, List[str]]]:
+        """
+        Descobre quais grupos fonte mudaram sem abri-los (ex: contador de não lidas).
+        
+        Returns:
+            {"changed": [...], "unchanged": [...], "missing": [...]}
+            ou None se o provider não suporta / a varredura falhou
+        """
+        ...
+    
     async def get_connection_status(
         self,
         connection_id: str
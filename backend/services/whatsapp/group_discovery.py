@@ -0,0 +1,98 @@
+"""
+Group Discovery - Lista os grupos da conta rolando a lista de chats.
+
+A lista do WhatsApp Web é virtualizada (só as linhas visíveis existem no
+DOM), então os grupos são acumulados a cada passo de rolagem.
+
+Cada passo é um único page.evaluate: extrai as linhas visíveis, rola uma
+tela e espera o próximo frame. A rolagem para quando a lista para de
+crescer (fim da lista e nenhum grupo novo por alguns passos).
+"""
+import time
+import logging
+from typing import Dict, Optional
+from playwright.async_api import ElementHandle, Page
+
+from core.metrics import PLAYWRIGHT_OP_SECONDS, track_duration
+
+logger = logging.getLogger(__name__)
+
+
+CHAT_LIST_SELECTOR = '[data-testid="chat-list"], #pane-side'
+
+# Passos sem crescer (no fim da lista) antes de desistir; dá tempo ao
+# WhatsApp de carregar o próximo lote de chats
+STABLE_STEPS = 3
+STABLE_WAIT_MS = 300
+MAX_STEPS = 500
+
+# Extrai as linhas visíveis, rola uma tela e espera a lista renderizar
+SCROLL_STEP_JS = """
+async (list) => {
+    const rows = [];
+    for (const row of list.querySelectorAll('[data-testid^="cell-frame-container"], [role="listitem"]')) {
+        if (!row.querySelector('[data-icon="group"], [data-icon="default-group"]')) continue;
+        const title = row.querySelector('span[title]');
+        if (!title || !title.getAttribute('title')) continue;
+        const preview = row.querySelector('.selectable-text:not([title])');
+        rows.push({
+            display_name: title.getAttribute('title'),
+            preview: preview ? preview.textContent.slice(0, 200) : null,
+        });
+    }
+    const before = list.scrollTop;
+    list.scrollBy(0, list.clientHeight);
+    await new Promise(r => requestAnimationFrame(() => requestAnimationFrame(r)));
+    return {rows, moved: list.scrollTop !== before};
+}
+"""
+
+
+async def collect_groups(
+    page: Page,
+    chat_list: Optional[ElementHandle] = None,
+    max_steps: int = MAX_STEPS
+) -> Dict[str, Optional[str]]:
+    """
+    Rola a lista de chats do topo ao fim acumulando os grupos.
+    
+    Args:
+        page: Página do WhatsApp Web (lista de chats visível)
+        chat_list: Container rolável (achado pelo seletor se omitido)
+        max_steps: Limite de segurança de passos de rolagem
+    
+    Returns:
+        {display_name: last_message_preview}
+    """
+    if chat_list is None:
+        chat_list = await page.wait_for_selector(CHAT_LIST_SELECTOR, timeout=20000)
+    
+    await chat_list.evaluate("list => list.scrollTo(0, 0)")
+    
+    groups: Dict[str, Optional[str]] = {}
+    idle = 0
+    steps = 0
+    started = time.time()
+    
+    for steps in range(1, max_steps + 1):
+        with track_duration(PLAYWRIGHT_OP_SECONDS, kind="discovery_scroll"):
+            result = await chat_list.evaluate(SCROLL_STEP_JS)
+        
+        before = len(groups)
+        for row in result["rows"]:
+            groups.setdefault(row["display_name"], row["preview"])
+        
+        if result["moved"] or len(groups) > before:
+            idle = 0
+            continue
+        
+        idle += 1
+        if idle >= STABLE_STEPS:
+            break
+        await page.wait_for_timeout(STABLE_WAIT_MS)
+    
+    logger.info(
+        f"Group discovery: {len(groups)} groups in {steps} steps "
+        f"({time.time() - started:.1f}s)"
+    )
+    return groups
@@ -2,8 +2,8 @@
 Humanized Sender - Envia mensagens simulando comportamento humano.
 
 Características:
-- Typing char-by-char com delays aleatórios
-- Aguarda preview carregar (2-4s)  
+- Typing configurável por conexão (char / chunk / paste, ver text_input)
+- Aguarda o nó de preview aparecer (com deadline, ver link_preview)
 - Random delays entre ações
 - Fallback de seletores
 """
@@ -13,6 +13,19 @@ import logging
 from typing import Optional
 from playwright.async_api import Page
 
+from services.whatsapp.chat_navigator import open_chat
+from services.whatsapp.link_preview import (
+    DEFAULT_PREVIEW_TIMEOUT,
+    has_link,
+    wait_for_link_preview,
+)
+from services.whatsapp.text_input import (
+    DEFAULT_INPUT_MODE,
+    type_text,
+    verify_composed_text,
+    clear_compose_box,
+)
+
 logger = logging.getLogger(__name__)
 
 
@@ -26,17 +39,19 @@ class HumanizedSender:
     - Usa delays aleatórios
     """
     
-    def __init__(self):
-        self.min_char_delay = 0.03  # 30ms mínimo entre caracteres
-        self.max_char_delay = 0.12  # 120ms máximo
-        self.preview_wait_min = 2.5  # 2.5s mínimo para preview
-        self.preview_wait_max = 4.0  # 4s máximo
+    # Se o texto composto não bater, redigita com o modo mais lento seguinte
+    FALLBACK_MODE = {"paste": "chunk", "chunk": "char"}
+    
+    def __init__(self, preview_timeout: float = DEFAULT_PREVIEW_TIMEOUT):
+        self.preview_timeout = preview_timeout  # deadline para o preview aparecer
     
     async def send_with_preview(
         self,
         page: Page,
         group_name: str,
-        text: str
+        text: str,
+        input_mode: str = DEFAULT_INPUT_MODE,
+        wait_for_preview: bool = True
     ) -> dict:
         """
         Envia mensagem aguardando preview carregar.
@@ -45,12 +60,19 @@ class HumanizedSender:
             page: Página do Playwright
             group_name: Nome do grupo
             text: Texto da mensagem
+            input_mode: Estratégia de digitação ("char" | "chunk" | "paste")
             
         Returns:
             {
                 "status": "sent" | "error",
                 "preview_generated": bool,
+                "preview_ms": int,
                 "duration_ms": int,
+                "input_mode": str,
+                "typing_ms": int,
+                "chars_per_second": float,
+                "text_verified": bool,
+                "open_method": "already_open" | "chat_row" | "search",
                 "error": str (opcional)
             }
         """
@@ -58,26 +80,24 @@ class HumanizedSender:
         start_time = time.time()
         
         try:
-            # 1. Abrir grupo
-            await self._open_group(page, group_name)
-            await asyncio.sleep(random.uniform(0.5, 1.0))
+            # 1. Abrir grupo (pula tudo se já estiver aberto)
+            open_method = await open_chat(page, group_name, self._open_group)
+            if open_method != "already_open":
+                await asyncio.sleep(random.uniform(0.5, 1.0))
             
             # 2. Clicar no input
             input_elem = await self._get_input_element(page)
             await input_elem.click()
             await asyncio.sleep(random.uniform(0.2, 0.4))
             
-            # 3. Digitar NATURALMENTE (char por char)
-            for char in text:
-                await page.keyboard.type(char)
-                # Delay humano entre teclas
-                delay = random.uniform(self.min_char_delay, self.max_char_delay)
-                await asyncio.sleep(delay)
+            # 3. Digitar (estratégia da conexão) e conferir o texto composto
+            typing = await self._type_verified(page, input_elem, text, input_mode)
             
-            # 4. AGUARDAR PREVIEW GERAR (CRÍTICO!)
-            preview_wait = random.uniform(self.preview_wait_min, self.preview_wait_max)
-            logger.debug(f"Waiting {preview_wait:.2f}s for preview...")
-            await asyncio.sleep(preview_wait)
+            # 4. AGUARDAR PREVIEW GERAR (CRÍTICO!) - nó real no DOM, com deadline
+            preview = {"preview_generated": False, "preview_ms": 0}
+            if wait_for_preview and has_link(text):
+                preview = await wait_for_link_preview(page, self.preview_timeout)
+                await asyncio.sleep(random.uniform(0.2, 0.5))
             
             # 5. Enviar (Enter)
             await page.keyboard.press('Enter')
@@ -85,12 +105,19 @@ class HumanizedSender:
             
             duration_ms = int((time.time() - start_time) * 1000)
             
-            logger.info(f"[OK] Message sent to {group_name} (preview: yes, {duration_ms}ms)")
+            logger.info(
+                f"[OK] Message sent to {group_name} "
+                f"(preview: {'yes' if preview['preview_generated'] else 'no'} "
+                f"in {preview['preview_ms']}ms, total {duration_ms}ms, "
+                f"{typing['input_mode']} {typing['chars_per_second']} chars/s)"
+            )
             
             return {
                 "status": "sent",
-                "preview_generated": True,
-                "duration_ms": duration_ms
+                "duration_ms": duration_ms,
+                **preview,
+                "open_method": open_method,
+                **typing
             }
             
         except Exception as e:
@@ -104,10 +131,47 @@ class HumanizedSender:
                 "error": str(e)
             }
     
+    async def _type_verified(
+        self,
+        page: Page,
+        input_elem,
+        text: str,
+        input_mode: str
+    ) -> dict:
+        """
+        Digita o texto e confere o compose box antes do envio.
+        
+        Se o texto não bater, limpa e redigita com um modo mais lento.
+        
+        Returns:
+            Estatísticas de digitação + "text_verified"
+            
+        Raises:
+            Exception se nenhum modo produzir o texto correto
+        """
+        mode = input_mode
+        
+        while True:
+            typing = await type_text(page, text, mode)
+            
+            if await verify_composed_text(input_elem, text):
+                return {**typing, "text_verified": True}
+            
+            await clear_compose_box(page, input_elem)
+            
+            fallback = self.FALLBACK_MODE.get(mode)
+            if not fallback:
+                raise Exception(f"Composed text mismatch (input mode: {input_mode})")
+            
+            logger.warning(f"Composed text mismatch with mode '{mode}', retyping with '{fallback}'")
+            mode = fallback
+    
     async def _open_group(self, page: Page, group_name: str):
         """
         Abre grupo via busca por nome.
         
+        Fallback de chat_navigator.open_chat (chat não aberto nem visível na lista).
+        
         Args:
             page: Página do Playwright
             group_name: Nome do grupo
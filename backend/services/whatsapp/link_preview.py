@@ -0,0 +1,76 @@
+"""
+Link Preview - Detecta quando o preview do link aparece no compose box.
+
+Em vez de dormir um tempo fixo (2.5-4s) antes do Enter:
+- Espera o nó de preview aparecer no rodapé da conversa
+- Com deadline (preview que não aparece não trava o envio)
+- Mede a latência para o OfferLog (preview_generated verdadeiro)
+"""
+import re
+import time
+import logging
+from playwright.async_api import Page, TimeoutError as PlaywrightTimeoutError
+
+from core.metrics import PLAYWRIGHT_OP_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+# Card de preview acima do compose box (com fallback)
+PREVIEW_SELECTORS = [
+    '#main footer [data-testid="link-preview"]',
+    '#main footer [data-testid="compose-box-link-preview"]',
+    '#main footer div[role="button"] img[src^="blob:"]',
+]
+
+DEFAULT_PREVIEW_TIMEOUT = 6.0  # segundos
+
+_LINK_PATTERN = re.compile(r'https?://', re.IGNORECASE)
+
+
+def has_link(text: str) -> bool:
+    """Verifica se o texto tem link (sem link não há preview a esperar)."""
+    return bool(_LINK_PATTERN.search(text or ""))
+
+
+async def wait_for_link_preview(
+    page: Page,
+    timeout: float = DEFAULT_PREVIEW_TIMEOUT
+) -> dict:
+    """
+    Aguarda o preview do link ficar visível no compose box.
+    
+    Args:
+        page: Página do Playwright (texto já digitado)
+        timeout: Deadline em segundos
+    
+    Returns:
+        {
+            "preview_generated": bool,
+            "preview_ms": int  (latência até aparecer, ou tempo esperado até o deadline)
+        }
+    """
+    start_time = time.time()
+    
+    try:
+        await page.wait_for_selector(
+            ', '.join(PREVIEW_SELECTORS),
+            state='visible',
+            timeout=int(timeout * 1000)
+        )
+        preview_generated = True
+    except PlaywrightTimeoutError:
+        preview_generated = False
+    
+    preview_ms = int((time.time() - start_time) * 1000)
+    PLAYWRIGHT_OP_SECONDS.labels(kind="link_preview").observe(preview_ms / 1000)
+    
+    if preview_generated:
+        logger.debug(f"Link preview ready in {preview_ms}ms")
+    else:
+        logger.warning(f"Link preview did not appear within {timeout:.1f}s")
+    
+    return {
+        "preview_generated": preview_generated,
+        "preview_ms": preview_ms
+    }
@@ -7,20 +7,36 @@ Características:
 - Extração de mensagens do DOM
 - Fallback de seletores
 - Healthcheck automático
+- Persistência em lote (INSERT ... ON CONFLICT DO NOTHING)
 """
+import asyncio
 import hashlib
 import logging
-from typing import List, Optional, Dict
+import uuid
+from datetime import datetime
+from typing import Callable, List, Optional, Dict, Set, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
 from playwright.async_api import Page
 
+from core.database import AsyncSessionLocal
 from models.message_log import MessageLog
 from services.whatsapp.gateway import WhatsAppMessage
+from services.whatsapp.chat_navigator import open_chat
+from core.metrics import PLAYWRIGHT_OP_SECONDS, track_duration
 
 logger = logging.getLogger(__name__)
 
 
+# Tentativas de gravar uma linha antes de desistir dela (linha ruim não trava o buffer)
+MAX_FLUSH_ATTEMPTS = 5
+
+
+def _row_key(row: dict) -> Tuple[str, str, str]:
+    return (row["connection_id"], row["group_name"], row["message_id"])
+
+
 class MessageMonitor:
     """
     Monitora grupos WhatsApp fonte por novas mensagens.
@@ -30,13 +46,33 @@ class MessageMonitor:
     2. Database (fonte da verdade, sobrevive restart)
     
     Connection-scoped: Cada conexão tem seu próprio log.
+    
+    Marcações de "processada" são bufferizadas e gravadas em lote a cada
+    flush_interval segundos, sem segurar a página esperando commit. O flush
+    roda em background com uma sessão própria (session_factory): uma
+    AsyncSession não aceita operações concorrentes, e self.db segue em uso
+    por _is_new_message no loop do monitor.
     """
     
-    def __init__(self, db: AsyncSession):
+    def __init__(
+        self,
+        db: AsyncSession,
+        flush_interval: float = 0.3,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal
+    ):
         self.db = db
+        self.session_factory = session_factory
         # Cache por connection_id
         self.cache: Dict[str, Dict[str, dict]] = {}
         # cache[connection_id][group_name] = {"message_id": "...", "timestamp": 123}
+        
+        # Buffer de MessageLogs ainda não gravados no DB
+        self.flush_interval = flush_interval
+        self._pending: List[dict] = []
+        self._pending_keys: Set[Tuple[str, str, str]] = set()
+        self._attempts: Dict[Tuple[str, str, str], int] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
     
     async def check_group(
         self,
@@ -56,11 +92,12 @@ class MessageMonitor:
             WhatsAppMessage se encontrou nova, None caso contrário
         """
         try:
-            # Abrir grupo
-            await self._open_group(page, group_name)
+            # Abrir grupo (header/lista primeiro, busca como fallback)
+            await open_chat(page, group_name, self._open_group)
             
             # Extrair última mensagem
-            msg = await self._extract_last_message(page, group_name)
+            with track_duration(PLAYWRIGHT_OP_SECONDS, kind="last_message"):
+                msg = await self._extract_last_message(page, group_name)
             
             if not msg:
                 logger.debug(f"No message found in {group_name}")
@@ -99,7 +136,11 @@ class MessageMonitor:
                 if msg.id == cached.get("message_id"):
                     return False
         
-        # 2. Verificar DB (fonte da verdade)
+        # 2. Verificar buffer ainda não gravado
+        if (connection_id, group_name, msg.id) in self._pending_keys:
+            return False
+        
+        # 3. Verificar DB (fonte da verdade)
         result = await self.db.execute(
             select(MessageLog).where(
                 MessageLog.connection_id == connection_id,
@@ -119,26 +160,28 @@ class MessageMonitor:
         msg: WhatsAppMessage
     ):
         """
-        Marca mensagem como processada (DB + cache).
+        Marca mensagem como processada (buffer + cache).
+        
+        A gravação no DB acontece em lote no próximo flush.
         
         Args:
             connection_id: UUID da conexão
             group_name: Nome do grupo
             msg: Mensagem processada
         """
-        # Salvar no DB
         text_hash = hashlib.md5(msg.text.encode()).hexdigest()
         
-        log = MessageLog(
-            connection_id=connection_id,
-            group_name=group_name,
-            message_id=msg.id,
-            text_hash=text_hash,
-            timestamp=msg.timestamp
-        )
-        
-        self.db.add(log)
-        await self.db.commit()
+        self._pending.append({
+            "id": uuid.uuid4(),
+            "connection_id": connection_id,
+            "group_name": group_name,
+            "message_id": msg.id,
+            "text_hash": text_hash,
+            "timestamp": msg.timestamp,
+            "processed_at": datetime.utcnow()
+        })
+        self._pending_keys.add((connection_id, group_name, msg.id))
+        self._ensure_flusher()
         
         # Atualizar cache
         if connection_id not in self.cache:
@@ -151,6 +194,87 @@ class MessageMonitor:
         
         logger.debug(f"Marked as processed: {group_name} - {msg.id}")
     
+    def _ensure_flusher(self):
+        """Inicia a task de flush periódico (se ainda não estiver rodando)."""
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_loop())
+    
+    async def _flush_loop(self):
+        """Grava o buffer a cada flush_interval enquanto houver pendências."""
+        try:
+            while self._pending:
+                await asyncio.sleep(self.flush_interval)
+                await self.flush()
+        except asyncio.CancelledError:
+            pass
+    
+    async def flush(self) -> int:
+        """
+        Grava todos os MessageLogs pendentes em um único INSERT.
+        
+        Usa ON CONFLICT DO NOTHING em uq_message_per_connection: se outra
+        task/processo já gravou a mesma mensagem, a linha é simplesmente ignorada.
+        
+        Returns:
+            Número de linhas enviadas ao DB
+        """
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            
+            rows = self._pending
+            self._pending = []
+            
+            try:
+                stmt = insert(MessageLog).values(rows).on_conflict_do_nothing(
+                    constraint="uq_message_per_connection"
+                )
+                # Sessão própria: sair do bloco com erro faz o rollback só dela
+                async with self.session_factory() as session:
+                    await session.execute(stmt)
+                    await session.commit()
+            except Exception as e:
+                logger.error(f"Error flushing {len(rows)} message log(s): {e}")
+                self._retry_later(rows)
+                return 0
+            
+            for row in rows:
+                self._pending_keys.discard(_row_key(row))
+                self._attempts.pop(_row_key(row), None)
+            
+            logger.debug(f"Flushed {len(rows)} message log(s)")
+            return len(rows)
+    
+    def _retry_later(self, rows: List[dict]):
+        """Devolve o lote ao buffer, descartando linhas que já falharam demais."""
+        retry = []
+        for row in rows:
+            key = _row_key(row)
+            attempts = self._attempts.get(key, 0) + 1
+            if attempts >= MAX_FLUSH_ATTEMPTS:
+                self._attempts.pop(key, None)
+                self._pending_keys.discard(key)
+            else:
+                self._attempts[key] = attempts
+                retry.append(row)
+        
+        dropped = len(rows) - len(retry)
+        if dropped:
+            logger.error(f"Dropped {dropped} message log(s) after {MAX_FLUSH_ATTEMPTS} failed flushes")
+        
+        self._pending = retry + self._pending
+    
+    async def close(self):
+        """Para o flush periódico e grava o que restou no buffer."""
+        if self._flush_task and not self._flush_task.done():
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+        self._flush_task = None
+        await self.flush()
+    
     async def _open_group(self, page: Page, group_name: str):
         """
         Abre grupo via busca por nome.
@@ -0,0 +1,152 @@
+"""
+Offer Coalescer - Junta a mesma oferta vinda de grupos fonte diferentes.
+
+Vários grupos fonte costumam postar o mesmo produto com minutos de
+diferença. Antes de chegar no QueueManager, cada cópia passa por aqui,
+por (conexão, grupo destino, product_unique_id), dentro de uma janela:
+
+- primeira cópia: segue para a fila normalmente
+- cópias seguintes (política "first"): descartadas
+- cópias seguintes (política "best_price"): se o preço for menor, substituem
+  a mensagem que ainda está na fila; senão são descartadas
+
+Ofertas sem product_unique_id (loja não reconhecida) não são agrupadas.
+
+Chaves:
+- coalesce:whatsapp:{connection_id}:{group_name}:{product_unique_id}
+  HASH {price, text}, TTL = janela (contada da primeira cópia)
+- stats:whatsapp:coalesce:{connection_id}  HASH de decisões
+"""
+import logging
+from typing import Optional, Tuple
+
+import redis.asyncio as redis
+
+from core.redis_client import redis_client
+from services.ingestion_service import extract_urls
+from services.parsing_service import (
+    create_product_unique_id,
+    detect_store,
+    extract_product_id,
+)
+
+logger = logging.getLogger(__name__)
+
+
+COALESCE_POLICIES = ("best_price", "first")
+
+# Decide (atômico entre workers): new | replace | drop
+# Preço 0 = desconhecido (qualquer preço conhecido é melhor)
+COALESCE_SCRIPT = """
+local current = redis.call('HGET', KEYS[1], 'price')
+if not current then
+    redis.call('HSET', KEYS[1], 'price', ARGV[1], 'text', ARGV[2])
+    redis.call('EXPIRE', KEYS[1], ARGV[3])
+    return {'new', ''}
+end
+
+local price, best = tonumber(ARGV[1]), tonumber(current)
+if ARGV[4] == 'best_price' and price > 0 and (best == 0 or price < best) then
+    local previous = redis.call('HGET', KEYS[1], 'text')
+    redis.call('HSET', KEYS[1], 'price', ARGV[1], 'text', ARGV[2])
+    return {'replace', previous}
+end
+return {'drop', ''}
+"""
+
+
+def product_key(text: str) -> Optional[str]:
+    """
+    product_unique_id do primeiro link de produto reconhecido no texto.
+    
+    Usa o texto já monetizado (links curtos já expandidos), sem rede.
+    """
+    for url in extract_urls(text):
+        store_slug = detect_store(url)
+        if not store_slug:
+            continue
+        
+        product_id = extract_product_id(store_slug, url)
+        if product_id:
+            return create_product_unique_id(store_slug, product_id)
+    return None
+
+
+def _coalesce_key(connection_id: str, group_name: str, product_unique_id: str) -> str:
+    return f"coalesce:whatsapp:{connection_id}:{group_name}:{product_unique_id}"
+
+
+def _stats_key(connection_id: str) -> str:
+    return f"stats:whatsapp:coalesce:{connection_id}"
+
+
+class OfferCoalescer:
+    """
+    Decide se uma cópia de oferta entra na fila, substitui outra ou é descartada.
+    
+    window_seconds = 0 desliga o agrupamento (tudo é "new").
+    """
+    
+    def __init__(
+        self,
+        redis_conn: Optional[redis.Redis] = None,
+        window_seconds: int = 600,
+        policy: str = "best_price"
+    ):
+        if policy not in COALESCE_POLICIES:
+            raise ValueError(f"policy must be one of {COALESCE_POLICIES}, got {policy!r}")
+        
+        # None = usar redis_client global (conectado no start do worker)
+        self._redis = redis_conn
+        self.window_seconds = window_seconds
+        self.policy = policy
+    
+    @property
+    def redis(self) -> redis.Redis:
+        return self._redis or redis_client.client
+    
+    async def admit(
+        self,
+        connection_id: str,
+        group_name: str,
+        product_unique_id: Optional[str],
+        text: str,
+        price_cents: Optional[int] = None
+    ) -> Tuple[str, Optional[str]]:
+        """
+        Decide o destino de uma cópia da oferta para um grupo destino.
+        
+        Returns:
+            ("new", None) - enfileirar
+            ("replace", texto_anterior) - trocar a mensagem anterior na fila
+            ("drop", None) - descartar
+        """
+        if not product_unique_id or not self.window_seconds:
+            return "new", None
+        
+        decision, previous = await self.redis.eval(
+            COALESCE_SCRIPT,
+            1,
+            _coalesce_key(connection_id, group_name, product_unique_id),
+            price_cents or 0,
+            text,
+            self.window_seconds,
+            self.policy
+        )
+        
+        await self.redis.hincrby(_stats_key(connection_id), decision, 1)
+        
+        if decision != "new":
+            logger.info(f"Coalesced {product_unique_id} for {group_name}: {decision}")
+        
+        return decision, previous or None
+    
+    async def forget(self, connection_id: str, group_name: str, product_unique_id: Optional[str]):
+        """Libera o produto (ex: a fila recusou a primeira cópia)."""
+        if product_unique_id:
+            await self.redis.delete(_coalesce_key(connection_id, group_name, product_unique_id))
+    
+    async def get_stats(self, connection_id: str) -> dict:
+        """Decisões de agrupamento por tipo (new / replace / drop)."""
+        stats = await self.redis.hgetall(_stats_key(connection_id))
+        return {decision: int(count) for decision, count in stats.items()}
@@ -5,10 +5,11 @@ Une todos os componentes:
 - ConnectionPool (gerencia contexts)
 - MessageMonitor (detecta novas mensagens)
 - HumanizedSender (envia com preview)
+- UnreadSweep (quais grupos fonte mudaram, sem abrir)
 - QueueManager (rate limit)
 """
 import logging
-from typing import List, Optional
+from typing import Dict, List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from services.whatsapp.gateway import (
@@ -19,6 +20,8 @@ from services.whatsapp.gateway import (
 from services.whatsapp.connection_pool import ConnectionPool
 from services.whatsapp.message_monitor import MessageMonitor
 from services.whatsapp.humanized_sender import HumanizedSender
+from services.whatsapp.unread_sweep import UnreadSweep
+from services.whatsapp.text_input import DEFAULT_INPUT_MODE
 
 logger = logging.getLogger(__name__)
 
@@ -37,12 +40,25 @@ class PlaywrightWhatsAppGateway:
     def __init__(
         self,
         db: AsyncSession,
-        sessions_dir: str = "./whatsapp_sessions"
+        sessions_dir: str = "./whatsapp_sessions",
+        pool_mode: str = "persistent",
+        contexts_per_browser: int = 8,
+        max_live_contexts: int = 0,
+        block_resources: bool = False,
+        warm_pool_size: int = 0
     ):
         self.db = db
-        self.pool = ConnectionPool(sessions_dir=sessions_dir)
+        self.pool = ConnectionPool(
+            sessions_dir=sessions_dir,
+            mode=pool_mode,
+            contexts_per_browser=contexts_per_browser,
+            max_live_contexts=max_live_contexts,
+            block_resources=block_resources,
+            warm_pool_size=warm_pool_size
+        )
         self.monitor = MessageMonitor(db=db)
         self.sender = HumanizedSender()
+        self.unread_sweep = UnreadSweep()
         
         logger.info("PlaywrightWhatsAppGateway initialized")
     
@@ -55,24 +71,31 @@ class PlaywrightWhatsAppGateway:
         connection_id: str,
         group_name: str,
         text: str,
-        wait_for_preview: bool = True
+        wait_for_preview: bool = True,
+        input_mode: str = DEFAULT_INPUT_MODE
     ) -> dict:
         """
         Envia mensagem para grupo.
         
         Implementa WhatsAppGateway.send_message()
+        
+        Args extras:
+            input_mode: Estratégia de digitação ("char" | "chunk" | "paste")
         """
         try:
-            # Obter context
-            context = await self.pool.get_or_create(connection_id)
-            page = context.pages[0]
-            
-            # Enviar com preview
-            result = await self.sender.send_with_preview(
-                page=page,
-                group_name=group_name,
-                text=text
-            )
+            # Obter context (protegido da hibernação durante o envio)
+            async with self.pool.use(connection_id) as context:
+                page = context.pages[0]
+                
+                # Enviar com preview (filtro de recursos no perfil "send")
+                with self.pool.send_profile(connection_id):
+                    result = await self.sender.send_with_preview(
+                        page=page,
+                        group_name=group_name,
+                        text=text,
+                        input_mode=input_mode,
+                        wait_for_preview=wait_for_preview
+                    )
             
             return result
             
@@ -97,25 +120,25 @@ class PlaywrightWhatsAppGateway:
         new_messages = []
         
         try:
-            # Obter context
-            context = await self.pool.get_or_create(connection_id)
-            page = context.pages[0]
-            
-            # Verificar cada grupo fonte
-            for group_name in source_groups:
-                try:
-                    msg = await self.monitor.check_group(
-                        connection_id=connection_id,
-                        page=page,
-                        group_name=group_name
-                    )
-                    
-                    if msg:
-                        new_messages.append(msg)
+            # Obter context (protegido da hibernação durante a varredura)
+            async with self.pool.use(connection_id) as context:
+                page = context.pages[0]
+                
+                # Verificar cada grupo fonte
+                for group_name in source_groups:
+                    try:
+                        msg = await self.monitor.check_group(
+                            connection_id=connection_id,
+                            page=page,
+                            group_name=group_name
+                        )
                         
-                except Exception as e:
-                    logger.error(f"Error checking {group_name}: {e}")
-                    continue
+                        if msg:
+                            new_messages.append(msg)
+                            
+                    except Exception as e:
+                        logger.error(f"Error checking {group_name}: {e}")
+                        continue
             
             return new_messages
             
@@ -123,6 +146,32 @@ class PlaywrightWhatsAppGateway:
             logger.error(f"Get new messages error: {e}")
             return []
     
+    async def sweep_source_groups(
+        self,
+        connection_id: str,
+        source_groups: List[str]
+    ) -> Optional[Dict[str, List[str]]]:
+        """
+        Lê contadores de não lidas da lista de chats (um evaluate, nenhum grupo aberto).
+        
+        Implementa WhatsAppGateway.sweep_source_groups()
+        """
+        # Context hibernado: acordá-lo custaria mais que a checagem normal
+        if connection_id not in self.pool.contexts:
+            return None
+        
+        try:
+            async with self.pool.use(connection_id) as context:
+                return await self.unread_sweep.sweep(
+                    context.pages[0],
+                    connection_id,
+                    source_groups
+                )
+        
+        except Exception as e:
+            logger.warning(f"Unread sweep failed for {connection_id}: {e}")
+            return None
+    
     async def get_connection_status(
         self,
         connection_id: str
@@ -143,46 +192,46 @@ class PlaywrightWhatsAppGateway:
                     error="Context not healthy"
                 )
             
-            # Obter context e verificar WhatsApp
-            context = await self.pool.get_or_create(connection_id)
-            page = context.pages[0]
-            
-            # Verificar se está na tela de QR Code
-            try:
-                qr_elem = await page.wait_for_selector(
-                    'canvas[aria-label="Scan this QR code to link a device!"]',
-                    timeout=2000
-                )
+            # Obter context (protegido da hibernação) e verificar WhatsApp
+            async with self.pool.use(connection_id) as context:
+                page = context.pages[0]
                 
-                if qr_elem:
-                    # Precisa fazer QR Code
-                    return ConnectionStatus(
-                        status="qr_needed",
-                        is_authenticated=False
+                # Verificar se está na tela de QR Code
+                try:
+                    qr_elem = await page.wait_for_selector(
+                        'canvas[aria-label="Scan this QR code to link a device!"]',
+                        timeout=2000
                     )
-            except:
-                pass
-            
-            # Verificar se está autenticado (tem lista de chats)
-            try:
-                chats = await page.wait_for_selector(
-                    'div[data-testid="chat-list"]',
-                    timeout=3000
-                )
+                    
+                    if qr_elem:
+                        # Precisa fazer QR Code
+                        return ConnectionStatus(
+                            status="qr_needed",
+                            is_authenticated=False
+                        )
+                except:
+                    pass
                 
-                if chats:
-                    return ConnectionStatus(
-                        status="connected",
-                        is_authenticated=True
+                # Verificar se está autenticado (tem lista de chats)
+                try:
+                    chats = await page.wait_for_selector(
+                        'div[data-testid="chat-list"]',
+                        timeout=3000
                     )
-            except:
-                pass
-            
-            # Estado desconhecido
-            return ConnectionStatus(
-                status="disconnected",
-                is_authenticated=False
-            )
+                    
+                    if chats:
+                        return ConnectionStatus(
+                            status="connected",
+                            is_authenticated=True
+                        )
+                except:
+                    pass
+                
+                # Estado desconhecido
+                return ConnectionStatus(
+                    status="disconnected",
+                    is_authenticated=False
+                )
             
         except Exception as e:
             logger.error(f"Get connection status error: {e}")
@@ -203,6 +252,7 @@ class PlaywrightWhatsAppGateway:
         """
         try:
             await self.pool.close(connection_id)
+            self.unread_sweep.forget(connection_id)
             logger.info(f"Disconnected: {connection_id}")
         except Exception as e:
             logger.error(f"Disconnect error: {e}")
@@ -220,33 +270,33 @@ class PlaywrightWhatsAppGateway:
             QR Code em base64 ou None
         """
         try:
-            context = await self.pool.get_or_create(connection_id)
-            page = context.pages[0]
-            
-            # Verificar se tela de QR existe
-            qr_selector = 'canvas[aria-label="Scan this QR code to link a device!"]'
-            
-            try:
-                qr_elem = await page.wait_for_selector(qr_selector, timeout=5000)
+            async with self.pool.use(connection_id) as context:
+                page = context.pages[0]
                 
-                if qr_elem:
-                    # Capturar screenshot do QR Code
-                    qr_screenshot = await qr_elem.screenshot()
-                    
-                    # Converter para base64
-                    import base64
-                    qr_base64 = base64.b64encode(qr_screenshot).decode('utf-8')
-                    
-                    logger.info(f"QR Code generated for {connection_id}")
-                    return qr_base64
+                # Verificar se tela de QR existe
+                qr_selector = 'canvas[aria-label="Scan this QR code to link a device!"]'
+                
+                try:
+                    qr_elem = await page.wait_for_selector(qr_selector, timeout=5000)
                     
-            except:
-                # Não está na tela de QR (pode já estar autenticado)
-                logger.info(f"No QR Code needed for {connection_id}")
+                    if qr_elem:
+                        # Capturar screenshot do QR Code
+                        qr_screenshot = await qr_elem.screenshot()
+                        
+                        # Converter para base64
+                        import base64
+                        qr_base64 = base64.b64encode(qr_screenshot).decode('utf-8')
+                        
+                        logger.info(f"QR Code generated for {connection_id}")
+                        return qr_base64
+                        
+                except:
+                    # Não está na tela de QR (pode já estar autenticado)
+                    logger.info(f"No QR Code needed for {connection_id}")
+                    return None
+                
                 return None
             
-            return None
-            
         except Exception as e:
             logger.error(f"Get QR Code error: {e}")
             return None
@@ -254,4 +304,5 @@ class PlaywrightWhatsAppGateway:
     async def shutdown(self):
         """Desliga tudo gracefully."""
         logger.info("Shutting down PlaywrightWhatsAppGateway...")
+        await self.monitor.close()
         await self.pool.close_all()
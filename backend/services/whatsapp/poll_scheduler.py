@@ -0,0 +1,160 @@
+"""
+Poll Scheduler - Prioriza checagem de grupos fonte pela atividade.
+
+Cada (conexão, grupo) mantém uma taxa de chegada estimada (EWMA com
+decaimento no tempo, em mensagens/s). O orçamento de checagens da conexão
+é o mesmo de antes (todos os grupos a cada base_interval), mas dividido
+em proporção à taxa:
+
+- cada grupo tem um piso de 1 / max_staleness (grupo quieto nunca fica
+  mais que max_staleness sem ser checado)
+- o resto do orçamento vai para os grupos ativos, proporcional à taxa
+- sem histórico (taxas zeradas) todos ficam em base_interval
+
+Estado em memória: após restart as taxas são reaprendidas.
+"""
+import math
+import time
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class GroupActivity:
+    """Taxa estimada e última checagem de um grupo."""
+    rate: float = 0.0                    # mensagens/s (EWMA)
+    last_checked: Optional[float] = None
+
+
+class PollScheduler:
+    """
+    Decide quais grupos fonte checar a cada tick do monitor.
+    
+    Uso:
+        due = scheduler.due_groups(connection_id, source_groups)
+        ... checar grupos em `due` ...
+        scheduler.observe(connection_id, group_name, found=1)
+    """
+    
+    def __init__(
+        self,
+        base_interval: float = 30,
+        max_staleness: float = 300,
+        min_interval: float = 5,
+        half_life: float = 3600
+    ):
+        self.base_interval = base_interval
+        self.max_staleness = max(max_staleness, base_interval)
+        self.min_interval = min(min_interval, base_interval)
+        # Constante de tempo do decaimento (meia-vida -> tau)
+        self.tau = half_life / math.log(2)
+        self.groups: Dict[Tuple[str, str], GroupActivity] = {}
+    
+    def _activity(self, connection_id: str, group_name: str) -> GroupActivity:
+        key = (connection_id, group_name)
+        if key not in self.groups:
+            self.groups[key] = GroupActivity()
+        return self.groups[key]
+    
+    def observe(
+        self,
+        connection_id: str,
+        group_name: str,
+        found: int,
+        now: Optional[float] = None
+    ):
+        """Registra uma checagem que achou `found` mensagens novas."""
+        now = now if now is not None else time.time()
+        activity = self._activity(connection_id, group_name)
+        
+        if activity.last_checked is not None:
+            decay = math.exp(-(now - activity.last_checked) / self.tau)
+            activity.rate *= decay
+        activity.rate += found / self.tau
+        activity.last_checked = now
+    
+    def intervals(self, connection_id: str, source_groups: List[str]) -> Dict[str, float]:
+        """Intervalo de checagem de cada grupo (segundos)."""
+        if not source_groups:
+            return {}
+        
+        rates = {g: self._activity(connection_id, g).rate for g in source_groups}
+        total_rate = sum(rates.values())
+        
+        # Mesmo trabalho de browser que checar todos a cada base_interval
+        budget = len(source_groups) / self.base_interval
+        floor = 1 / self.max_staleness
+        spare = budget - floor * len(source_groups)
+        
+        intervals = {}
+        for group_name, rate in rates.items():
+            if total_rate > 0:
+                share = floor + max(spare, 0) * rate / total_rate
+            else:
+                share = budget / len(source_groups)
+            intervals[group_name] = min(max(1 / share, self.min_interval), self.max_staleness)
+        return intervals
+    
+    def due_groups(
+        self,
+        connection_id: str,
+        source_groups: List[str],
+        now: Optional[float] = None
+    ) -> List[str]:
+        """
+        Grupos que devem ser checados agora, mais atrasados primeiro.
+        
+        Grupos nunca checados estão sempre vencidos.
+        """
+        now = now if now is not None else time.time()
+        intervals = self.intervals(connection_id, source_groups)
+        
+        overdue = []
+        for group_name, interval in intervals.items():
+            last_checked = self._activity(connection_id, group_name).last_checked
+            if last_checked is None:
+                overdue.append((math.inf, group_name))
+                continue
+            
+            ratio = (now - last_checked) / interval
+            if ratio >= 1:
+                overdue.append((ratio, group_name))
+        
+        overdue.sort(key=lambda item: item[0], reverse=True)
+        return [group_name for _, group_name in overdue]
+    
+    def stale_groups(
+        self,
+        connection_id: str,
+        source_groups: List[str],
+        now: Optional[float] = None
+    ) -> List[str]:
+        """Grupos sem checagem há max_staleness segundos (ou nunca checados)."""
+        now = now if now is not None else time.time()
+        stale = []
+        for group_name in source_groups:
+            last_checked = self._activity(connection_id, group_name).last_checked
+            if last_checked is None or now - last_checked >= self.max_staleness:
+                stale.append(group_name)
+        return stale
+    
+    def forget(self, connection_id: str, keep: List[str]):
+        """Descarta estado de grupos que deixaram de ser fonte."""
+        keep_set = set(keep)
+        for key in [k for k in self.groups if k[0] == connection_id and k[1] not in keep_set]:
+            del self.groups[key]
+    
+    def get_stats(self, connection_id: str) -> Dict[str, dict]:
+        """Taxa (mensagens/hora) e intervalo atual de cada grupo da conexão."""
+        source_groups = [g for (cid, g) in self.groups if cid == connection_id]
+        intervals = self.intervals(connection_id, source_groups)
+        return {
+            group_name: {
+                "rate_per_hour": round(self.groups[(connection_id, group_name)].rate * 3600, 2),
+                "interval": round(interval, 1),
+            }
+            for group_name, interval in intervals.items()
+        }
@@ -0,0 +1,123 @@
+"""
+QR Store - QR Codes de login no Redis (fora do Postgres).
+
+O worker publica um frame só quando o QR muda (hash do conteúdo);
+quadros iguais apenas renovam o TTL. A API lê direto do Redis, e frames
+novos também vão para o canal de eventos da conexão (stream SSE).
+
+Chaves:
+- qr:whatsapp:{connection_id}        hash {qr_code, hash, generated_at}, TTL curto
+- qr:whatsapp:{connection_id}:regen  marcador para não repetir REGENERATE_QR
+"""
+import hashlib
+import time
+import logging
+from typing import Optional, Union
+
+import redis.asyncio as redis
+
+from services.whatsapp.connection_events import encode_event, events_channel
+
+logger = logging.getLogger(__name__)
+
+
+# WhatsApp Web troca o QR a cada ~20s; sem renovação o frame expira sozinho
+QR_TTL_SECONDS = 60
+REGEN_COOLDOWN_SECONDS = 30
+
+
+def _qr_key(connection_id: str) -> str:
+    return f"qr:whatsapp:{connection_id}"
+
+
+def qr_fingerprint(content: Union[str, bytes]) -> str:
+    """Hash do conteúdo do QR (data-ref do WhatsApp ou bytes do screenshot)."""
+    if isinstance(content, str):
+        content = content.encode()
+    return hashlib.sha256(content).hexdigest()
+
+
+async def publish_qr(
+    redis_conn: redis.Redis,
+    connection_id: str,
+    qr_base64: str,
+    fingerprint: str
+) -> bool:
+    """
+    Grava o QR no Redis se ele mudou (senão só renova o TTL).
+    
+    Returns:
+        True se um frame novo foi gravado
+    """
+    key = _qr_key(connection_id)
+    
+    if await redis_conn.hget(key, "hash") == fingerprint:
+        await redis_conn.expire(key, QR_TTL_SECONDS)
+        return False
+    
+    pipe = redis_conn.pipeline()
+    pipe.hset(key, mapping={
+        "qr_code": qr_base64,
+        "hash": fingerprint,
+        "generated_at": time.time(),
+    })
+    pipe.expire(key, QR_TTL_SECONDS)
+    pipe.publish(
+        events_channel(connection_id),
+        encode_event("qr", qr_code=qr_base64, hash=fingerprint)
+    )
+    await pipe.execute()
+    return True
+
+
+async def touch_qr(redis_conn: redis.Redis, connection_id: str, fingerprint: str) -> bool:
+    """
+    Renova o TTL se o QR publicado ainda é o mesmo (sem screenshot).
+    
+    Returns:
+        True se o QR publicado tem esse fingerprint
+    """
+    key = _qr_key(connection_id)
+    if await redis_conn.hget(key, "hash") != fingerprint:
+        return False
+    
+    await redis_conn.expire(key, QR_TTL_SECONDS)
+    return True
+
+
+async def get_qr(redis_conn: redis.Redis, connection_id: str) -> Optional[dict]:
+    """
+    Retorna o QR atual.
+    
+    Returns:
+        {"qr_code": str, "hash": str, "generated_at": float} ou None
+    """
+    data = await redis_conn.hgetall(_qr_key(connection_id))
+    if not data or not data.get("qr_code"):
+        return None
+    
+    return {
+        "qr_code": data["qr_code"],
+        "hash": data.get("hash"),
+        "generated_at": float(data.get("generated_at", 0)),
+    }
+
+
+async def clear_qr(redis_conn: redis.Redis, connection_id: str):
+    """Remove o QR (login concluído ou QR recarregado)."""
+    await redis_conn.delete(_qr_key(connection_id))
+
+
+async def claim_regeneration(redis_conn: redis.Redis, connection_id: str) -> bool:
+    """
+    Marca que um REGENERATE_QR foi pedido (no máximo um por cooldown).
+    
+    Returns:
+        True se quem chamou deve publicar o comando
+    """
+    return bool(await redis_conn.set(
+        f"{_qr_key(connection_id)}:regen",
+        "1",
+        nx=True,
+        ex=REGEN_COOLDOWN_SECONDS
+    ))
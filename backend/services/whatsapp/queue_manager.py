@@ -4,16 +4,186 @@ Queue Manager - Gerencia filas de envio com rate limit duplo.
 Rate limit em dois níveis:
 1. Por grupo destino (6-10 min entre mensagens)
 2. Global por conexão (máx 1 msg a cada 30s, independente do grupo)
+
+Persistência no Redis (sobrevive restart/deploy):
+- queue:whatsapp:{connection_id}:{group_name}  -> LIST de QueuedMessage (JSON)
+- inflight:whatsapp:{connection_id}:{group_name} -> mensagem sendo enviada agora
+                                                   (fora da fila: overflow/replace não a tocam)
+- queue:whatsapp:ready                          -> ZSET "{connection_id}|{group_name}"
+                                                   score = quando o grupo pode enviar
+- last_sent:connection:{connection_id}:group:{group_name} -> último envio no grupo
+- last_sent:connection:{connection_id}          -> último envio da conexão
+- lock:whatsapp:send:{connection_id}            -> lease de envio (multi-worker)
+- quota:whatsapp:{connection_id}:{YYYY-MM-DD}   -> envios no dia (fuso da cota)
+- stats:whatsapp:queue:{connection_id}          -> HASH de admissões por resultado
+
+Filas são por (connection_id, grupo): duas conexões com grupo destino de
+mesmo nome NÃO compartilham fila nem rate limit.
+
+Admissão: cada fila tem tamanho máximo; ao encher, a política decide
+- drop_oldest: descarta a mais antiga (a que expiraria primeiro)
+- drop_lowest: descarta a de menor valor (preço), podendo ser a nova
+- reject: recusa a nova
 """
+import json
 import time
+import uuid
 import logging
-from typing import Dict, Deque, Optional
-from collections import deque
-from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Optional, List, Tuple
+from dataclasses import dataclass, asdict
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+import redis.asyncio as redis
+
+from core.redis_client import redis_client
 
 logger = logging.getLogger(__name__)
 
 
+READY_INDEX_KEY = "queue:whatsapp:ready"
+
+OVERFLOW_POLICIES = ("drop_oldest", "drop_lowest", "reject")
+
+# Enfileira respeitando o tamanho máximo (atômico)
+# Retorna {resultado, tamanho da fila, mensagem descartada ou ''}
+ADD_SCRIPT = """
+local size = redis.call('LLEN', KEYS[1])
+local max_size = tonumber(ARGV[4])
+local outcome = 'queued'
+local dropped = ''
+
+if max_size > 0 and size >= max_size then
+    local policy = ARGV[5]
+    if policy == 'reject' then
+        return {'rejected', size, ARGV[1]}
+    elseif policy == 'drop_lowest' then
+        local items = redis.call('LRANGE', KEYS[1], 0, -1)
+        local lowest, lowest_value = nil, tonumber(ARGV[6])
+        for _, item in ipairs(items) do
+            local value = tonumber(cjson.decode(item)['value']) or 0
+            if value < lowest_value then
+                lowest, lowest_value = item, value
+            end
+        end
+        if not lowest then
+            return {'rejected', size, ARGV[1]}
+        end
+        redis.call('LREM', KEYS[1], 1, lowest)
+        dropped = lowest
+    else
+        dropped = redis.call('LPOP', KEYS[1])
+    end
+    outcome = 'dropped'
+end
+
+size = redis.call('RPUSH', KEYS[1], ARGV[1])
+redis.call('ZADD', KEYS[2], 'NX', ARGV[3], ARGV[2])
+return {outcome, size, dropped}
+"""
+
+# Move a cabeça da fila para a chave em andamento (atômico)
+# Mensagem já em andamento (envio interrompido por crash) volta primeiro
+TAKE_SCRIPT = """
+local current = redis.call('GET', KEYS[2])
+if current then
+    return current
+end
+local value = redis.call('LPOP', KEYS[1])
+if value then
+    redis.call('SET', KEYS[2], value)
+end
+return value
+"""
+
+# Envio confirmado: descarta a mensagem em andamento; fila vazia sai do índice
+ACK_SCRIPT = """
+redis.call('DEL', KEYS[2])
+if redis.call('LLEN', KEYS[1]) == 0 then
+    redis.call('ZREM', KEYS[3], ARGV[1])
+end
+return 1
+"""
+
+# Envio falhou: a mensagem em andamento volta para a cabeça da fila
+REQUEUE_SCRIPT = """
+local value = redis.call('GET', KEYS[2])
+if not value then
+    return 0
+end
+redis.call('LPUSH', KEYS[1], value)
+redis.call('DEL', KEYS[2])
+redis.call('ZADD', KEYS[3], 'NX', ARGV[2], ARGV[1])
+return 1
+"""
+
+# Remove da fila e tira do índice se ela ficou vazia (atômico)
+POP_SCRIPT = """
+local value = redis.call('LPOP', KEYS[1])
+if redis.call('LLEN', KEYS[1]) == 0 then
+    redis.call('ZREM', KEYS[2], ARGV[1])
+end
+return value
+"""
+
+# Troca a cópia de um produto ainda na fila (mesma posição), procurando pelo
+# product_key gravado na mensagem. Retorna replaced | in_flight | missing
+REPLACE_SCRIPT = """
+local items = redis.call('LRANGE', KEYS[1], 0, -1)
+for i, item in ipairs(items) do
+    if cjson.decode(item)['product_key'] == ARGV[1] then
+        redis.call('LSET', KEYS[1], i - 1, ARGV[2])
+        return 'replaced'
+    end
+end
+local current = redis.call('GET', KEYS[2])
+if current and cjson.decode(current)['product_key'] == ARGV[1] then
+    return 'in_flight'
+end
+return 'missing'
+"""
+
+# Remove da cabeça as mensagens criadas antes do corte; fila vazia (e nada
+# em andamento) sai do índice. Retorna as idades removidas, em segundos
+TRIM_SCRIPT = """
+local cutoff, now = tonumber(ARGV[2]), tonumber(ARGV[3])
+local removed = {}
+while true do
+    local head = redis.call('LINDEX', KEYS[1], 0)
+    if not head then
+        break
+    end
+    local created_at = tonumber(cjson.decode(head)['created_at']) or 0
+    if created_at >= cutoff then
+        break
+    end
+    redis.call('LPOP', KEYS[1])
+    table.insert(removed, tostring(now - created_at))
+end
+if redis.call('LLEN', KEYS[1]) == 0 and redis.call('EXISTS', KEYS[3]) == 0 then
+    redis.call('ZREM', KEYS[2], ARGV[1])
+end
+return removed
+"""
+
+# Descarta a fila inteira (inclusive a mensagem em andamento) e tira do índice.
+# Retorna quantas mensagens foram descartadas
+PURGE_SCRIPT = """
+local removed = redis.call('LLEN', KEYS[1]) + redis.call('DEL', KEYS[2])
+redis.call('DEL', KEYS[1])
+redis.call('ZREM', KEYS[3], ARGV[1])
+return removed
+"""
+
+# Libera o lease apenas se ainda for nosso
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
 @dataclass
 class QueuedMessage:
     """Mensagem na fila para ser enviada."""
@@ -21,10 +191,66 @@ class QueuedMessage:
     group_name: str
     text: str
     created_at: float = None
+    value: float = 0.0  # usado pela política drop_lowest (ex: preço em centavos)
+    product_key: Optional[str] = None  # product_unique_id, usado pelo replace()
     
     def __post_init__(self):
         if self.created_at is None:
             self.created_at = time.time()
+    
+    def to_json(self) -> str:
+        """Serializa para armazenar no Redis."""
+        return json.dumps(asdict(self))
+    
+    @classmethod
+    def from_json(cls, raw: str) -> "QueuedMessage":
+        """Desserializa mensagem lida do Redis."""
+        return cls(**json.loads(raw))
+
+
+def _queue_key(connection_id: str, group_name: str) -> str:
+    return f"queue:whatsapp:{connection_id}:{group_name}"
+
+
+def _member(connection_id: str, group_name: str) -> str:
+    return f"{connection_id}|{group_name}"
+
+
+def _split_member(member: str) -> Tuple[str, str]:
+    connection_id, group_name = member.split("|", 1)
+    return connection_id, group_name
+
+
+def _inflight_key(connection_id: str, group_name: str) -> str:
+    return f"inflight:whatsapp:{connection_id}:{group_name}"
+
+
+def _last_sent_group_key(connection_id: str, group_name: str) -> str:
+    return f"last_sent:connection:{connection_id}:group:{group_name}"
+
+
+def _last_sent_connection_key(connection_id: str) -> str:
+    return f"last_sent:connection:{connection_id}"
+
+
+def _lease_key(connection_id: str) -> str:
+    return f"lock:whatsapp:send:{connection_id}"
+
+
+def _quota_key(connection_id: str, day: str) -> str:
+    return f"quota:whatsapp:{connection_id}:{day}"
+
+
+def _stats_key(connection_id: str) -> str:
+    return f"stats:whatsapp:queue:{connection_id}"
+
+
+def _load_timezone(name: str):
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        logger.warning(f"Unknown quota timezone {name!r}, using UTC")
+        return ZoneInfo("UTC")
 
 
 class QueueManager:
@@ -34,48 +260,131 @@ class QueueManager:
     Garante:
     - Intervalo mínimo entre mensagens no MESMO grupo
     - Intervalo mínimo global para a CONEXÃO (evita burst)
+    - Cota diária por conexão (zera à meia-noite do fuso configurado)
+    - Filas limitadas (max_queue_size + overflow_policy)
+    - Filas duráveis no Redis, compartilháveis entre vários workers
     """
     
-    def __init__(self):
-        # Filas por grupo
-        self.queues: Dict[str, Deque[QueuedMessage]] = {}
-        
-        # Último envio por grupo
-        self.last_sent_per_group: Dict[str, float] = {}
+    def __init__(
+        self,
+        redis_conn: Optional[redis.Redis] = None,
+        max_queue_size: int = 0,
+        overflow_policy: str = "drop_oldest",
+        quota_timezone: str = "UTC"
+    ):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow_policy must be one of {OVERFLOW_POLICIES}, got {overflow_policy!r}")
         
-        # Último envio por conexão (GLOBAL)
-        self.last_sent_per_connection: Dict[str, float] = {}
+        # None = usar redis_client global (conectado no start do worker)
+        self._redis = redis_conn
+        self._worker_token = uuid.uuid4().hex
+        self.max_queue_size = max_queue_size  # 0 = sem limite
+        self.overflow_policy = overflow_policy
+        self.quota_timezone = _load_timezone(quota_timezone)
         
         logger.info("QueueManager initialized")
     
-    def add(
+    @property
+    def redis(self) -> redis.Redis:
+        return self._redis or redis_client.client
+    
+    async def add(
         self,
         connection_id: str,
         group_name: str,
-        text: str
-    ) -> None:
+        text: str,
+        min_interval_per_group: int = 360,
+        value: float = 0.0,
+        product_key: Optional[str] = None
+    ) -> str:
         """
-        Adiciona mensagem à fila do grupo.
+        Adiciona mensagem à fila do grupo (respeitando o tamanho máximo).
         
         Args:
             connection_id: ID da conexão WhatsApp
             group_name: Nome do grupo destino
             text: Texto da mensagem
+            min_interval_per_group: Intervalo mínimo por grupo (segundos)
+            value: Valor da oferta (política drop_lowest descarta o menor)
+            product_key: Produto da oferta (permite replace() depois)
+        
+        Returns:
+            "queued" | "dropped" (outra mensagem saiu) | "rejected" (nova recusada)
         """
         msg = QueuedMessage(
             connection_id=connection_id,
             group_name=group_name,
-            text=text
+            text=text,
+            value=value,
+            product_key=product_key
+        )
+        
+        # Grupo fica pronto quando a fila recebe a primeira mensagem
+        # (ou quando o rate limit do grupo liberar, o que vier depois)
+        last_group = await self.redis.get(_last_sent_group_key(connection_id, group_name))
+        ready_at = max(msg.created_at, float(last_group or 0) + min_interval_per_group)
+        
+        outcome, size, dropped = await self.redis.eval(
+            ADD_SCRIPT,
+            2,
+            _queue_key(connection_id, group_name),
+            READY_INDEX_KEY,
+            msg.to_json(),
+            _member(connection_id, group_name),
+            ready_at,
+            self.max_queue_size,
+            self.overflow_policy,
+            value
         )
         
-        # Criar fila se não existir
-        if group_name not in self.queues:
-            self.queues[group_name] = deque()
+        await self.redis.hincrby(_stats_key(connection_id), outcome, 1)
         
-        self.queues[group_name].append(msg)
-        logger.debug(f"Message queued for {group_name} (queue size: {len(self.queues[group_name])})")
+        if outcome == "queued":
+            logger.debug(f"Message queued for {group_name} (queue size: {size})")
+        else:
+            age = time.time() - QueuedMessage.from_json(dropped).created_at
+            logger.warning(
+                f"Queue for {group_name} full ({size}/{self.max_queue_size}, "
+                f"{self.overflow_policy}): {outcome} message queued {age:.0f}s ago"
+            )
+        
+        return outcome
     
-    def can_send(
+    async def replace(
+        self,
+        connection_id: str,
+        group_name: str,
+        product_key: str,
+        text: str,
+        value: float = 0.0
+    ) -> str:
+        """
+        Substitui a cópia de um produto que ainda não foi enviada, mantendo a posição.
+        
+        A cópia é encontrada pelo product_key gravado no add(), não pelo texto.
+        
+        Returns:
+            "replaced" - a cópia estava na fila e foi trocada
+            "in_flight" - a cópia está sendo enviada agora (não dá mais para trocar)
+            "missing" - nenhuma cópia do produto na fila nem em andamento
+        """
+        msg = QueuedMessage(
+            connection_id=connection_id,
+            group_name=group_name,
+            text=text,
+            value=value,
+            product_key=product_key
+        )
+        return await self.redis.eval(
+            REPLACE_SCRIPT,
+            2,
+            _queue_key(connection_id, group_name),
+            _inflight_key(connection_id, group_name),
+            product_key,
+            msg.to_json()
+        )
+    
+    async def can_send(
         self,
         connection_id: str,
         group_name: str,
@@ -90,14 +399,14 @@ class QueueManager:
             group_name: Nome do grupo
             min_interval_per_group: Intervalo mínimo por grupo (segundos)
             min_interval_global: Intervalo mínimo global (segundos)
-            
+        
         Returns:
             True se pode enviar agora
         """
         now = time.time()
+        last_group, last_conn = await self._get_last_sent(connection_id, group_name)
         
         # 1. Verificar intervalo POR GRUPO
-        last_group = self.last_sent_per_group.get(group_name, 0)
         time_since_last_group = now - last_group
         
         if time_since_last_group < min_interval_per_group:
@@ -108,7 +417,6 @@ class QueueManager:
             return False
         
         # 2. Verificar intervalo GLOBAL da conexão
-        last_conn = self.last_sent_per_connection.get(connection_id, 0)
         time_since_last_conn = now - last_conn
         
         if time_since_last_conn < min_interval_global:
@@ -120,70 +428,269 @@ class QueueManager:
         
         return True
     
-    def mark_sent(
+    async def mark_sent(
         self,
         connection_id: str,
-        group_name: str
-    ) -> None:
+        group_name: str,
+        min_interval_per_group: int = 360
+    ) -> int:
         """
-        Marca que mensagem foi enviada (atualiza ambos os contadores).
+        Marca que mensagem foi enviada (atualiza ambos os contadores e a cota).
+        
+        Também reagenda o grupo no índice de prontos para now + intervalo.
         
         Args:
             connection_id: ID da conexão
             group_name: Nome do grupo
+            min_interval_per_group: Intervalo mínimo por grupo (segundos)
+        
+        Returns:
+            Envios da conexão no dia (após este)
         """
         now = time.time()
-        self.last_sent_per_group[group_name] = now
-        self.last_sent_per_connection[connection_id] = now
+        day, reset_at = self._quota_day(now)
+        quota_key = _quota_key(connection_id, day)
+        
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.incr(quota_key)
+            # Mantém o dia anterior por mais 24h (consulta/depuração)
+            pipe.expireat(quota_key, int(reset_at) + 86400)
+            # TTL de 24h (depois disso não importa mais)
+            pipe.set(_last_sent_group_key(connection_id, group_name), now, ex=86400)
+            pipe.set(_last_sent_connection_key(connection_id), now, ex=86400)
+            pipe.zadd(
+                READY_INDEX_KEY,
+                {_member(connection_id, group_name): now + min_interval_per_group},
+                xx=True
+            )
+            sent_today, *_ = await pipe.execute()
         
-        logger.debug(f"Sent marked for {group_name} (connection {connection_id})")
+        logger.debug(f"Sent marked for {group_name} (connection {connection_id}, {sent_today} today)")
+        return sent_today
+    
+    def _quota_day(self, now: Optional[float] = None) -> Tuple[str, float]:
+        """Dia da cota (YYYY-MM-DD no fuso configurado) e timestamp da próxima virada."""
+        now = now if now is not None else time.time()
+        local = datetime.fromtimestamp(now, self.quota_timezone)
+        midnight = datetime.combine(
+            local.date() + timedelta(days=1),
+            datetime.min.time(),
+            tzinfo=self.quota_timezone
+        )
+        return local.date().isoformat(), midnight.timestamp()
     
-    def get_next(
+    async def get_sent_today(self, connection_id: str, now: Optional[float] = None) -> int:
+        """Envios da conexão no dia corrente (fuso da cota)."""
+        day, _ = self._quota_day(now)
+        return int(await self.redis.get(_quota_key(connection_id, day)) or 0)
+    
+    async def get_quota_wait(
         self,
+        connection_id: str,
+        max_messages_per_day: Optional[int],
+        now: Optional[float] = None
+    ) -> float:
+        """
+        Segundos até a conexão poder enviar de novo pela cota diária.
+        
+        Returns:
+            0 se ainda há cota (ou sem limite), senão segundos até a meia-noite
+        """
+        if not max_messages_per_day:
+            return 0
+        
+        now = now if now is not None else time.time()
+        if await self.get_sent_today(connection_id, now) < max_messages_per_day:
+            return 0
+        
+        _, reset_at = self._quota_day(now)
+        return max(0.0, reset_at - now)
+    
+    async def get_admission_stats(self, connection_id: str) -> Dict[str, int]:
+        """Admissões na fila por resultado (queued / dropped / rejected)."""
+        stats = await self.redis.hgetall(_stats_key(connection_id))
+        return {outcome: int(count) for outcome, count in stats.items()}
+    
+    async def get_next(
+        self,
+        connection_id: str,
         group_name: str
     ) -> Optional[QueuedMessage]:
         """
         Obtém próxima mensagem da fila do grupo (sem remover).
         
         Args:
+            connection_id: ID da conexão
             group_name: Nome do grupo
-            
+        
         Returns:
             Próxima mensagem ou None se fila vazia
         """
-        queue = self.queues.get(group_name)
-        if queue and len(queue) > 0:
-            return queue[0]
-        return None
+        raw = await self.redis.lindex(_queue_key(connection_id, group_name), 0)
+        return QueuedMessage.from_json(raw) if raw else None
     
-    def pop(
+    async def pop(
         self,
+        connection_id: str,
         group_name: str
     ) -> Optional[QueuedMessage]:
         """
         Remove e retorna próxima mensagem da fila.
         
         Args:
+            connection_id: ID da conexão
             group_name: Nome do grupo
-            
+        
         Returns:
             Mensagem removida ou None
         """
-        queue = self.queues.get(group_name)
-        if queue and len(queue) > 0:
-            return queue.popleft()
-        return None
+        raw = await self.redis.eval(
+            POP_SCRIPT,
+            2,
+            _queue_key(connection_id, group_name),
+            READY_INDEX_KEY,
+            _member(connection_id, group_name)
+        )
+        return QueuedMessage.from_json(raw) if raw else None
+    
+    async def take(
+        self,
+        connection_id: str,
+        group_name: str
+    ) -> Optional[QueuedMessage]:
+        """
+        Tira a próxima mensagem da fila para enviar (fica "em andamento").
+        
+        Enquanto o envio acontece, a mensagem não está mais na LIST: um add()
+        com overflow ou um replace() não a alcançam. Confirmar com ack() ou
+        devolver com requeue(). Uma mensagem que ficou em andamento (worker
+        morreu no meio do envio) é devolvida de novo por aqui.
+        
+        Returns:
+            Mensagem a enviar ou None se fila vazia
+        """
+        raw = await self.redis.eval(
+            TAKE_SCRIPT,
+            2,
+            _queue_key(connection_id, group_name),
+            _inflight_key(connection_id, group_name)
+        )
+        return QueuedMessage.from_json(raw) if raw else None
+    
+    async def ack(self, connection_id: str, group_name: str) -> None:
+        """Envio confirmado: descarta a mensagem em andamento."""
+        await self.redis.eval(
+            ACK_SCRIPT,
+            3,
+            _queue_key(connection_id, group_name),
+            _inflight_key(connection_id, group_name),
+            READY_INDEX_KEY,
+            _member(connection_id, group_name)
+        )
+    
+    async def requeue(self, connection_id: str, group_name: str) -> bool:
+        """
+        Envio falhou: devolve a mensagem em andamento para a cabeça da fila.
+        
+        Returns:
+            True se havia mensagem em andamento
+        """
+        requeued = await self.redis.eval(
+            REQUEUE_SCRIPT,
+            3,
+            _queue_key(connection_id, group_name),
+            _inflight_key(connection_id, group_name),
+            READY_INDEX_KEY,
+            _member(connection_id, group_name),
+            time.time()
+        )
+        return bool(requeued)
+    
+    async def purge(self, connection_id: str, group_name: str) -> int:
+        """
+        Descarta a fila de um grupo que deixou de ser destino.
+        
+        Remove também a mensagem em andamento e a entrada no índice de
+        prontos, para o par não voltar a ser escolhido.
+        
+        Returns:
+            Quantidade de mensagens descartadas
+        """
+        return await self.redis.eval(
+            PURGE_SCRIPT,
+            3,
+            _queue_key(connection_id, group_name),
+            _inflight_key(connection_id, group_name),
+            READY_INDEX_KEY,
+            _member(connection_id, group_name)
+        )
     
-    def get_queue_size(self, group_name: str) -> int:
+    async def get_queue_size(self, connection_id: str, group_name: str) -> int:
         """Retorna tamanho da fila de um grupo."""
-        queue = self.queues.get(group_name)
-        return len(queue) if queue else 0
+        return await self.redis.llen(_queue_key(connection_id, group_name))
     
-    def get_total_queued(self) -> int:
+    async def get_total_queued(self) -> int:
         """Retorna total de mensagens em todas as filas."""
-        return sum(len(q) for q in self.queues.values())
+        members = await self.redis.zrange(READY_INDEX_KEY, 0, -1)
+        if not members:
+            return 0
+        
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for member in members:
+                pipe.llen(_queue_key(*_split_member(member)))
+            sizes = await pipe.execute()
+        
+        return sum(sizes)
+    
+    async def get_depth_by_connection(self) -> Dict[str, int]:
+        """Total de mensagens na fila por conexão (somando os grupos)."""
+        members = await self.redis.zrange(READY_INDEX_KEY, 0, -1)
+        if not members:
+            return {}
+        
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for member in members:
+                pipe.llen(_queue_key(*_split_member(member)))
+            sizes = await pipe.execute()
+        
+        depths: Dict[str, int] = {}
+        for member, size in zip(members, sizes):
+            connection_id, _ = _split_member(member)
+            depths[connection_id] = depths.get(connection_id, 0) + size
+        return depths
     
-    def get_time_until_next_send(
+    async def get_ready(
+        self,
+        now: Optional[float] = None,
+        limit: int = 100
+    ) -> List[Tuple[str, str]]:
+        """
+        Lista filas não vazias cujo rate limit POR GRUPO já liberou.
+        
+        O intervalo global da conexão ainda deve ser checado via can_send().
+        
+        Returns:
+            Lista de (connection_id, group_name), mais antigas primeiro
+        """
+        now = now if now is not None else time.time()
+        members = await self.redis.zrangebyscore(
+            READY_INDEX_KEY, "-inf", now, start=0, num=limit
+        )
+        return [_split_member(m) for m in members]
+    
+    async def get_scheduled(self) -> List[Tuple[str, str, float]]:
+        """
+        Lista todas as filas não vazias com o horário em que ficam prontas.
+        
+        Usado para (re)construir o agendamento do worker após restart.
+        
+        Returns:
+            Lista de (connection_id, group_name, ready_at)
+        """
+        entries = await self.redis.zrange(READY_INDEX_KEY, 0, -1, withscores=True)
+        return [(*_split_member(member), score) for member, score in entries]
+    
+    async def get_time_until_next_send(
         self,
         connection_id: str,
         group_name: str,
@@ -197,19 +704,34 @@ class QueueManager:
             Segundos até liberar (0 se já pode enviar)
         """
         now = time.time()
+        last_group, last_conn = await self._get_last_sent(connection_id, group_name)
         
         # Verificar por grupo
-        last_group = self.last_sent_per_group.get(group_name, 0)
         wait_group = max(0, min_interval_per_group - (now - last_group))
         
         # Verificar global
-        last_conn = self.last_sent_per_connection.get(connection_id, 0)
         wait_global = max(0, min_interval_global - (now - last_conn))
         
         # Retornar o maior dos dois
         return int(max(wait_group, wait_global))
     
-    def clear_old_queues(self, max_age_hours: int = 24):
+    async def claim_connection(self, connection_id: str, lease_seconds: int = 120) -> bool:
+        """
+        Reserva a conexão para envio (evita dois workers enviando pela mesma).
+        
+        Returns:
+            True se este worker obteve o lease
+        """
+        acquired = await self.redis.set(
+            _lease_key(connection_id), self._worker_token, ex=lease_seconds, nx=True
+        )
+        return bool(acquired)
+    
+    async def release_connection(self, connection_id: str) -> None:
+        """Libera o lease de envio (se ainda pertencer a este worker)."""
+        await self.redis.eval(RELEASE_SCRIPT, 1, _lease_key(connection_id), self._worker_token)
+    
+    async def clear_old_queues(self, max_age_hours: int = 24):
         """
         Remove filas antigas (mensagens que estão há muito tempo esperando).
         
@@ -219,13 +741,28 @@ class QueueManager:
         now = time.time()
         max_age_seconds = max_age_hours * 3600
         
-        for group_name, queue in list(self.queues.items()):
-            if queue:
-                # Remover mensagens muito antigas
-                while queue and (now - queue[0].created_at) > max_age_seconds:
-                    old_msg = queue.popleft()
-                    logger.warning(f"Removed old message from {group_name} queue (age: {(now - old_msg.created_at) / 3600:.1f}h)")
-                
-                # Remover fila se vazia
-                if len(queue) == 0:
-                    del self.queues[group_name]
+        for member in await self.redis.zrange(READY_INDEX_KEY, 0, -1):
+            connection_id, group_name = _split_member(member)
+            
+            # Mensagens muito antigas (fila é FIFO), checadas e removidas no
+            # mesmo script: um add/take concorrente não muda o que sai
+            ages = await self.redis.eval(
+                TRIM_SCRIPT,
+                3,
+                _queue_key(connection_id, group_name),
+                READY_INDEX_KEY,
+                _inflight_key(connection_id, group_name),
+                member,
+                now - max_age_seconds,
+                now
+            )
+            for age in ages:
+                logger.warning(f"Removed old message from {group_name} queue (age: {float(age) / 3600:.1f}h)")
+    
+    async def _get_last_sent(self, connection_id: str, group_name: str) -> Tuple[float, float]:
+        """Retorna (último envio no grupo, último envio da conexão)."""
+        last_group, last_conn = await self.redis.mget(
+            _last_sent_group_key(connection_id, group_name),
+            _last_sent_connection_key(connection_id)
+        )
+        return float(last_group or 0), float(last_conn or 0)
@@ -0,0 +1,114 @@
+"""
+Resource Filter - Bloqueia recursos pesados que o worker não precisa.
+
+O worker só lê texto e digita ofertas: avatares, stickers, miniaturas de
+mídia, vídeo/áudio e fontes são banda, CPU e memória desperdiçados.
+
+Perfis (trocados dinamicamente, a mesma página monitora e envia):
+- monitor: agressivo - imagens viram GIF 1x1, mídia e fontes abortadas
+- send: mantém imagens fora dos CDNs de avatar/mídia do WhatsApp
+  (o card de preview do link precisa delas); mídia e fontes abortadas
+"""
+import re
+import logging
+from contextlib import contextmanager
+from typing import Dict
+from playwright.async_api import BrowserContext, Route
+
+logger = logging.getLogger(__name__)
+
+
+# Só interceptamos URLs candidatas (o resto segue direto, sem ida ao Python)
+CANDIDATE_URL_PATTERN = re.compile(
+    r'(pps\.whatsapp\.net|mmg\.whatsapp\.net|media[\w.-]*\.whatsapp\.net'
+    r'|\.(png|jpe?g|gif|webp|svg|ico|woff2?|ttf|otf|mp4|webm|ogg|opus|mp3)(\?|$))',
+    re.IGNORECASE
+)
+
+# CDNs de avatar (pps) e mídia das conversas (mmg / media-*)
+WHATSAPP_MEDIA_HOSTS = re.compile(
+    r'^https://(pps|mmg|media[\w.-]*)\.whatsapp\.net/',
+    re.IGNORECASE
+)
+
+# GIF transparente 1x1 (stub: layout e onload continuam funcionando)
+TRANSPARENT_GIF = (
+    b'GIF89a\x01\x00\x01\x00\x80\x00\x00\x00\x00\x00\x00\x00\x00'
+    b'!\xf9\x04\x01\x00\x00\x00\x00,\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02D\x01\x00;'
+)
+
+
+class ResourceFilter:
+    """
+    Filtro de requests de um browser context.
+    
+    Usa o perfil "monitor" por padrão; durante envios (`sending()`)
+    troca para "send", que preserva o que o preview de link precisa.
+    """
+    
+    def __init__(self):
+        self._sending = 0
+        self.blocked: Dict[str, int] = {}
+        self.stubbed: Dict[str, int] = {}
+    
+    @property
+    def profile(self) -> str:
+        return "send" if self._sending else "monitor"
+    
+    @classmethod
+    async def attach(cls, context: BrowserContext) -> "ResourceFilter":
+        """Cria o filtro e registra a rota no context."""
+        resource_filter = cls()
+        await context.route(CANDIDATE_URL_PATTERN, resource_filter._handle)
+        return resource_filter
+    
+    @contextmanager
+    def sending(self):
+        """Relaxa o filtro enquanto um envio estiver em andamento."""
+        self._sending += 1
+        try:
+            yield
+        finally:
+            self._sending -= 1
+    
+    def decide(self, resource_type: str, url: str) -> str:
+        """
+        Decide o que fazer com um request.
+        
+        Returns:
+            "continue" | "stub" | "abort"
+        """
+        if resource_type in ("media", "font"):
+            return "abort"
+        
+        if resource_type == "image":
+            if self.profile == "monitor" or WHATSAPP_MEDIA_HOSTS.match(url):
+                return "stub"
+        
+        return "continue"
+    
+    async def _handle(self, route: Route):
+        request = route.request
+        resource_type = request.resource_type
+        action = self.decide(resource_type, request.url)
+        
+        try:
+            if action == "abort":
+                self.blocked[resource_type] = self.blocked.get(resource_type, 0) + 1
+                await route.abort()
+            elif action == "stub":
+                self.stubbed[resource_type] = self.stubbed.get(resource_type, 0) + 1
+                await route.fulfill(status=200, content_type="image/gif", body=TRANSPARENT_GIF)
+            else:
+                await route.continue_()
+        except Exception as e:
+            # Página fechada/navegou durante o request
+            logger.debug(f"Route handling failed for {request.url}: {e}")
+    
+    def get_stats(self) -> dict:
+        """Requests evitados por tipo de recurso."""
+        return {
+            "profile": self.profile,
+            "blocked": dict(self.blocked),
+            "stubbed": dict(self.stubbed),
+        }
@@ -0,0 +1,141 @@
+"""
+Send Scheduler - Agenda envios pelo próximo horário elegível.
+
+Min-heap de (deadline, connection_id, group_name):
+- deadline = quando o par (conexão, grupo) pode enviar de novo
+  (calculado via QueueManager.get_time_until_next_send)
+- O loop de envio dorme até o deadline mais próximo
+- Só pares realmente prontos são tocados (sem polling de todos os grupos)
+"""
+import asyncio
+import heapq
+import time
+import logging
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SendScheduler:
+    """
+    Agenda (connection_id, group_name) pelo próximo horário de envio.
+    
+    Cada par tem no máximo um deadline válido. Reagendar substitui o
+    deadline anterior (entradas antigas no heap são descartadas ao sair).
+    """
+    
+    def __init__(self):
+        self._heap: List[Tuple[float, str, str]] = []
+        self._deadlines: Dict[Tuple[str, str], float] = {}
+        self._wakeup = asyncio.Event()
+    
+    def __len__(self) -> int:
+        return len(self._deadlines)
+    
+    def __contains__(self, key: Tuple[str, str]) -> bool:
+        return key in self._deadlines
+    
+    def schedule(
+        self,
+        connection_id: str,
+        group_name: str,
+        delay: float = 0,
+        now: Optional[float] = None
+    ) -> None:
+        """
+        Agenda par para daqui a `delay` segundos.
+        
+        Args:
+            connection_id: ID da conexão
+            group_name: Nome do grupo destino
+            delay: Segundos até poder enviar (ex: get_time_until_next_send)
+            now: Timestamp base (default: time.time())
+        """
+        now = now if now is not None else time.time()
+        self.schedule_at(connection_id, group_name, now + max(0, delay))
+    
+    def schedule_at(
+        self,
+        connection_id: str,
+        group_name: str,
+        deadline: float
+    ) -> None:
+        """Agenda par para um timestamp absoluto (substitui o anterior)."""
+        key = (connection_id, group_name)
+        previous = self._deadlines.get(key)
+        
+        self._deadlines[key] = deadline
+        heapq.heappush(self._heap, (deadline, connection_id, group_name))
+        self._compact()
+        
+        # Acordar o loop se o próximo deadline ficou mais cedo
+        if previous is None or deadline < previous:
+            self._wakeup.set()
+    
+    def cancel(self, connection_id: str, group_name: str) -> None:
+        """Remove par do agendamento."""
+        self._deadlines.pop((connection_id, group_name), None)
+    
+    def next_deadline(self) -> Optional[float]:
+        """Retorna o deadline mais próximo (None se não houver nada agendado)."""
+        self._drop_stale()
+        return self._heap[0][0] if self._heap else None
+    
+    def pop_due(self, now: Optional[float] = None) -> List[Tuple[str, str]]:
+        """
+        Remove e retorna todos os pares com deadline <= now.
+        
+        Returns:
+            Lista de (connection_id, group_name), mais antigos primeiro
+        """
+        now = now if now is not None else time.time()
+        due = []
+        
+        while True:
+            self._drop_stale()
+            if not self._heap or self._heap[0][0] > now:
+                break
+            
+            _, connection_id, group_name = heapq.heappop(self._heap)
+            del self._deadlines[(connection_id, group_name)]
+            due.append((connection_id, group_name))
+        
+        return due
+    
+    async def wait(self, max_wait: float) -> None:
+        """
+        Dorme até o próximo deadline, no máximo `max_wait` segundos.
+        
+        Acorda antes se algo for agendado para mais cedo.
+        """
+        self._wakeup.clear()
+        
+        deadline = self.next_deadline()
+        timeout = max_wait
+        if deadline is not None:
+            timeout = min(max_wait, deadline - time.time())
+        
+        if timeout <= 0:
+            return
+        
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+    
+    def _drop_stale(self) -> None:
+        """Descarta do topo do heap entradas substituídas ou canceladas."""
+        while self._heap:
+            deadline, connection_id, group_name = self._heap[0]
+            if self._deadlines.get((connection_id, group_name)) == deadline:
+                return
+            heapq.heappop(self._heap)
+    
+    def _compact(self) -> None:
+        """Reconstrói o heap se acumulou muitas entradas antigas."""
+        if len(self._heap) > 2 * len(self._deadlines) + 64:
+            self._heap = [
+                (deadline, connection_id, group_name)
+                for (connection_id, group_name), deadline in self._deadlines.items()
+            ]
+            heapq.heapify(self._heap)
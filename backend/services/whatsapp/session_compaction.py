@@ -0,0 +1,122 @@
+"""
+Session Compaction - Poda caches regeneráveis dos perfis do Chromium.
+
+Cada whatsapp_sessions/{connection_id} acumula centenas de MB de cache
+(HTTP, V8 code cache, GPU/shader, CacheStorage do Service Worker).
+Nada disso é necessário para manter o login: as chaves ficam em IndexedDB,
+Local Storage e Cookies, que nunca são tocados.
+
+Só roda com o perfil fechado (Chromium mantém o SingletonLock enquanto aberto).
+O ScriptCache do Service Worker também fica: o registro em
+"Service Worker/Database" aponta para os scripts guardados ali.
+"""
+import os
+import socket
+import shutil
+import logging
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+# Caches regeneráveis (relativos ao user_data_dir)
+PRUNABLE_PATHS = [
+    "Default/Cache",
+    "Default/Code Cache",
+    "Default/GPUCache",
+    "Default/DawnCache",
+    "Default/DawnGraphiteCache",
+    "Default/DawnWebGPUCache",
+    "Default/Service Worker/CacheStorage",
+    "GrShaderCache",
+    "GraphiteDawnCache",
+    "ShaderCache",
+]
+
+# Symlink "{hostname}-{pid}" do Chromium que abriu o perfil. Sobra depois de
+# um crash/kill, então só vale enquanto o pid estiver vivo
+LOCK_FILE = "SingletonLock"
+
+
+def dir_size(path: str) -> int:
+    """Tamanho total (bytes) de um diretório, sem seguir symlinks internos."""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                continue
+    return total
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # existe, mas é de outro usuário
+    return True
+
+
+def is_profile_open(user_data_dir: str) -> bool:
+    """
+    True se o SingletonLock aponta para um Chromium vivo nesta máquina.
+    
+    Lock de outro host (volume compartilhado) ou ilegível conta como aberto.
+    """
+    try:
+        target = os.readlink(os.path.join(user_data_dir, LOCK_FILE))
+    except FileNotFoundError:
+        return False
+    except OSError:
+        return True
+    
+    host, _, pid = target.rpartition("-")
+    if host != socket.gethostname() or not pid.isdigit():
+        return True
+    return _pid_alive(int(pid))
+
+
+def compact_session(user_data_dir: str) -> Dict[str, object]:
+    """
+    Remove caches regeneráveis de um perfil fechado.
+    
+    Args:
+        user_data_dir: Diretório do perfil (whatsapp_sessions/{connection_id})
+    
+    Returns:
+        {
+            "compacted": bool,
+            "reclaimed_bytes": int,
+            "removed": [caminhos relativos removidos],
+            "reason": str (se não compactou)
+        }
+    """
+    if not os.path.isdir(user_data_dir):
+        return {"compacted": False, "reclaimed_bytes": 0, "removed": [], "reason": "not_found"}
+    
+    if is_profile_open(user_data_dir):
+        return {"compacted": False, "reclaimed_bytes": 0, "removed": [], "reason": "profile_open"}
+    
+    reclaimed = 0
+    removed: List[str] = []
+    
+    for relative in PRUNABLE_PATHS:
+        path = os.path.join(user_data_dir, relative)
+        if not os.path.isdir(path) or os.path.islink(path):
+            continue
+        
+        size = dir_size(path)
+        shutil.rmtree(path, ignore_errors=True)
+        reclaimed += size
+        removed.append(relative)
+    
+    if removed:
+        logger.info(
+            f"Compacted {user_data_dir}: {reclaimed / (1024 * 1024):.1f}MB reclaimed "
+            f"({', '.join(removed)})"
+        )
+    
+    return {"compacted": True, "reclaimed_bytes": reclaimed, "removed": removed}
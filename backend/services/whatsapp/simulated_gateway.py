@@ -0,0 +1,267 @@
+"""
+Simulated Gateway - WhatsAppGateway em memória para teste de carga (sem browser).
+
+Cada grupo fonte recebe mensagens num processo de Poisson com taxa própria,
+sorteada em torno de arrival_rate (grupos quentes e frios, como na vida real,
+para o PollScheduler ter o que priorizar). Cada operação dorme a latência
+configurada (com jitter) no lugar do trabalho do Playwright.
+
+As ofertas saem de um catálogo limitado de produtos, então o mesmo produto
+aparece em grupos diferentes (exercita o OfferCoalescer).
+
+O texto de cada mensagem termina com um marcador "#sim<n>" (a monetização
+só troca URLs), e send_message usa o marcador para medir:
+- detect: chegada no grupo fonte -> leitura pelo worker
+- capture_to_send: leitura -> envio no grupo destino
+- end_to_end: chegada -> envio
+
+Uso: scripts/load_whatsapp_worker.py
+"""
+import re
+import time
+import random
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from services.whatsapp.gateway import WhatsAppMessage, ConnectionStatus
+from services.whatsapp.text_input import DEFAULT_INPUT_MODE
+
+logger = logging.getLogger(__name__)
+
+
+# Latências médias por operação (segundos), perto do Playwright em produção
+DEFAULT_LATENCIES = {
+    "sweep": 0.05,       # um evaluate na lista de chats
+    "open_group": 0.4,   # abrir um grupo fonte e ler as mensagens
+    "send": 6.0,         # abrir chat destino, digitar, esperar preview, enviar
+}
+
+OFFER_TITLES = [
+    "Echo Dot 5ª geração",
+    "Fone JBL Tune 520BT",
+    "Kindle 11ª Geração 16GB",
+    "Airfryer Mondial 4L",
+    "SSD Kingston NV2 1TB",
+    "Controle DualSense PS5",
+    "Whey Protein 1kg",
+    "Cafeteira Nespresso Essenza",
+]
+
+MARKER_PATTERN = re.compile(r"#sim(\d+)")
+
+
+@dataclass
+class SimulatedGroup:
+    """Grupo fonte: taxa de chegada, próxima chegada e mensagens não lidas."""
+    rate: float                      # mensagens/s
+    next_arrival: float
+    pending: List[WhatsAppMessage] = field(default_factory=list)
+
+
+class SimulatedWhatsAppGateway:
+    """
+    Implementa o protocolo WhatsAppGateway sem browser.
+    
+    Latências: dict operação -> segundos (ver DEFAULT_LATENCIES), cada uma
+    sorteada em ±jitter. arrival_rate é a taxa média por grupo fonte
+    (mensagens/s). clock permite tempo simulado nos testes.
+    """
+    
+    def __init__(
+        self,
+        latencies: Optional[Dict[str, float]] = None,
+        arrival_rate: float = 1 / 60,
+        jitter: float = 0.2,
+        products: int = 200,
+        send_error_rate: float = 0.0,
+        sweep_missing_rate: float = 0.0,
+        seed: Optional[int] = None,
+        clock: Callable[[], float] = time.time
+    ):
+        self.latencies = {**DEFAULT_LATENCIES, **(latencies or {})}
+        self.arrival_rate = arrival_rate
+        self.jitter = jitter
+        self.send_error_rate = send_error_rate
+        self.sweep_missing_rate = sweep_missing_rate
+        self.clock = clock
+        self.random = random.Random(seed)
+        
+        self.catalog = [
+            (
+                "B0" + "".join(self.random.choices("ABCDEFGHJKLMNPQRSTUVWXYZ0123456789", k=8)),
+                self.random.choice(OFFER_TITLES),
+                self.random.randint(1990, 299990)
+            )
+            for _ in range(products)
+        ]
+        
+        self.groups: Dict[Tuple[str, str], SimulatedGroup] = {}
+        self._sequence = 0
+        # marcador -> (chegada, leitura)
+        self._messages: Dict[int, Tuple[float, Optional[float]]] = {}
+        
+        self.timings: Dict[str, List[float]] = {"detect": [], "capture_to_send": [], "end_to_end": []}
+        self.sent_by_connection: Dict[str, int] = {}
+        self.stats = {"generated": 0, "read": 0, "sent": 0, "send_errors": 0, "sweeps": 0}
+    
+    async def _pause(self, operation: str):
+        base = self.latencies.get(operation, 0)
+        if base > 0:
+            await asyncio.sleep(base * self.random.uniform(1 - self.jitter, 1 + self.jitter))
+    
+    def _group(self, connection_id: str, group_name: str) -> SimulatedGroup:
+        key = (connection_id, group_name)
+        if key not in self.groups:
+            # Taxa do grupo sorteada em torno da média (poucos grupos quentes)
+            rate = self.random.expovariate(1 / self.arrival_rate) if self.arrival_rate > 0 else 0.0
+            first = self.clock() + (self.random.expovariate(rate) if rate > 0 else float("inf"))
+            self.groups[key] = SimulatedGroup(rate=rate, next_arrival=first)
+        return self.groups[key]
+    
+    def _arrivals(self, connection_id: str, group_name: str) -> SimulatedGroup:
+        """Materializa as chegadas do grupo até agora."""
+        group = self._group(connection_id, group_name)
+        now = self.clock()
+        
+        while group.next_arrival <= now:
+            self._sequence += 1
+            asin, title, price = self.random.choice(self.catalog)
+            text = (
+                f"🔥 {title}\n"
+                f"R$ {price // 100},{price % 100:02d}\n"
+                f"https://www.amazon.com.br/dp/{asin}\n"
+                f"#sim{self._sequence}"
+            )
+            group.pending.append(WhatsAppMessage(
+                id=f"sim-{self._sequence}",
+                group_id=group_name,
+                sender="+5511900000000",
+                text=text,
+                timestamp=int(group.next_arrival)
+            ))
+            self._messages[self._sequence] = (group.next_arrival, None)
+            self.stats["generated"] += 1
+            group.next_arrival += self.random.expovariate(group.rate)
+        
+        return group
+    
+    async def send_message(
+        self,
+        connection_id: str,
+        group_name: str,
+        text: str,
+        wait_for_preview: bool = True,
+        input_mode: str = DEFAULT_INPUT_MODE
+    ) -> dict:
+        """Implementa WhatsAppGateway.send_message() (dorme a latência de "send")."""
+        started = time.perf_counter()
+        await self._pause("send")
+        duration_ms = int((time.perf_counter() - started) * 1000)
+        
+        if self.random.random() < self.send_error_rate:
+            self.stats["send_errors"] += 1
+            return {
+                "status": "error",
+                "preview_generated": False,
+                "duration_ms": duration_ms,
+                "error": "Simulated send failure"
+            }
+        
+        self.stats["sent"] += 1
+        self.sent_by_connection[connection_id] = self.sent_by_connection.get(connection_id, 0) + 1
+        
+        marker = MARKER_PATTERN.search(text)
+        if marker and int(marker.group(1)) in self._messages:
+            arrived, read = self._messages[int(marker.group(1))]
+            now = self.clock()
+            self.timings["end_to_end"].append(now - arrived)
+            if read is not None:
+                self.timings["capture_to_send"].append(now - read)
+        
+        return {
+            "status": "sent",
+            "preview_generated": wait_for_preview,
+            "preview_ms": 0,
+            "duration_ms": duration_ms,
+            "input_mode": input_mode
+        }
+    
+    async def get_new_messages(
+        self,
+        connection_id: str,
+        source_groups: List[str]
+    ) -> List[WhatsAppMessage]:
+        """Implementa WhatsAppGateway.get_new_messages() (um "open_group" por grupo)."""
+        messages = []
+        for group_name in source_groups:
+            await self._pause("open_group")
+            group = self._arrivals(connection_id, group_name)
+            now = self.clock()
+            
+            for msg in group.pending:
+                sequence = int(MARKER_PATTERN.search(msg.text).group(1))
+                arrived, _ = self._messages[sequence]
+                self._messages[sequence] = (arrived, now)
+                self.timings["detect"].append(now - arrived)
+            
+            messages.extend(group.pending)
+            self.stats["read"] += len(group.pending)
+            group.pending = []
+        return messages
+    
+    async def sweep_source_groups(
+        self,
+        connection_id: str,
+        source_groups: List[str]
+    ) -> Optional[Dict[str, List[str]]]:
+        """
+        Implementa WhatsAppGateway.sweep_source_groups().
+        
+        changed = grupos com mensagens não lidas; sweep_missing_rate simula
+        linhas fora da área renderizada da lista.
+        """
+        await self._pause("sweep")
+        self.stats["sweeps"] += 1
+        
+        result = {"changed": [], "unchanged": [], "missing": []}
+        for group_name in source_groups:
+            if self.random.random() < self.sweep_missing_rate:
+                result["missing"].append(group_name)
+            elif self._arrivals(connection_id, group_name).pending:
+                result["changed"].append(group_name)
+            else:
+                result["unchanged"].append(group_name)
+        return result
+    
+    async def get_connection_status(
+        self,
+        connection_id: str
+    ) -> ConnectionStatus:
+        """Implementa WhatsAppGateway.get_connection_status() (sempre conectado)."""
+        return ConnectionStatus(
+            status="connected",
+            is_authenticated=True,
+            last_seen=datetime.utcnow()
+        )
+    
+    async def disconnect(
+        self,
+        connection_id: str
+    ) -> None:
+        """Implementa WhatsAppGateway.disconnect() (descarta os grupos da conexão)."""
+        for key in [k for k in self.groups if k[0] == connection_id]:
+            del self.groups[key]
+    
+    async def get_qr_code(
+        self,
+        connection_id: str
+    ) -> Optional[str]:
+        """Implementa WhatsAppGateway.get_qr_code() (nunca precisa de QR)."""
+        return None
+    
+    def backlog(self) -> int:
+        """Mensagens que chegaram e ainda não foram lidas pelo worker."""
+        return sum(len(group.pending) for group in self.groups.values())
@@ -0,0 +1,157 @@
+"""
+Text Input - Estratégias de digitação no compose box do WhatsApp Web.
+
+Modos (configuráveis por conexão via WhatsAppConnection.input_mode):
+- char:  caractere por caractere, 30-120ms entre teclas (mais humano, mais lento)
+- chunk: rajadas por palavra, pausa curta entre palavras
+- paste: um único insert_text (mais rápido, menos "humano")
+
+Todos os modos:
+- Quebras de linha via Shift+Enter (Enter puro enviaria a mensagem)
+- Medem a vazão (chars/s) para o operador comparar stealth x velocidade
+- Conferem o texto composto antes do envio (o preview depende do link correto)
+"""
+import asyncio
+import random
+import re
+import time
+import logging
+import unicodedata
+from typing import Optional
+from playwright.async_api import Page
+
+logger = logging.getLogger(__name__)
+
+
+INPUT_MODES = ("char", "chunk", "paste")
+DEFAULT_INPUT_MODE = "char"
+
+# Delays por modo (segundos)
+CHAR_DELAY = (0.03, 0.12)       # entre caracteres
+CHUNK_DELAY = (0.08, 0.25)      # entre palavras
+CHUNK_KEY_DELAY_MS = 8          # entre teclas dentro da palavra
+
+_WORD_PATTERN = re.compile(r'\S+\s*|\s+')
+
+# Seletores de variação (U+FE0E/U+FE0F): o WhatsApp os descarta ao renderizar emojis
+_VARIATION_SELECTORS = re.compile('[\ufe0e\ufe0f]')
+
+# Texto do compose box com emojis: o WhatsApp troca cada emoji por <img alt="😀">,
+# que inner_text() perde
+COMPOSED_TEXT_JS = """el => {
+    const parts = [];
+    const walk = node => {
+        if (node.nodeType === Node.TEXT_NODE) {
+            parts.push(node.textContent);
+        } else if (node.nodeName === 'IMG') {
+            parts.push(node.alt || '');
+        } else if (node.nodeName === 'BR') {
+            parts.push('\\n');
+        } else {
+            if (['DIV', 'P'].includes(node.nodeName) && parts.length) parts.push('\\n');
+            node.childNodes.forEach(walk);
+        }
+    };
+    walk(el);
+    return parts.join('');
+}"""
+
+
+async def type_text(
+    page: Page,
+    text: str,
+    mode: str = DEFAULT_INPUT_MODE
+) -> dict:
+    """
+    Digita texto no elemento focado usando a estratégia escolhida.
+    
+    Args:
+        page: Página do Playwright (compose box já focado)
+        text: Texto da mensagem
+        mode: "char" | "chunk" | "paste"
+    
+    Returns:
+        {
+            "input_mode": str,
+            "typing_ms": int,
+            "chars_per_second": float
+        }
+    """
+    if mode not in INPUT_MODES:
+        logger.warning(f"Unknown input mode '{mode}', falling back to {DEFAULT_INPUT_MODE}")
+        mode = DEFAULT_INPUT_MODE
+    
+    start_time = time.time()
+    
+    lines = text.split('\n')
+    for i, line in enumerate(lines):
+        if mode == "char":
+            await _type_char(page, line)
+        elif mode == "chunk":
+            await _type_chunk(page, line)
+        else:
+            await page.keyboard.insert_text(line)
+        
+        # Quebra de linha (exceto última)
+        if i < len(lines) - 1:
+            await page.keyboard.press('Shift+Enter')
+    
+    typing_ms = int((time.time() - start_time) * 1000)
+    chars_per_second = round(len(text) / max(typing_ms / 1000, 0.001), 1)
+    
+    logger.debug(f"Typed {len(text)} chars in {typing_ms}ms ({chars_per_second} chars/s, mode={mode})")
+    
+    return {
+        "input_mode": mode,
+        "typing_ms": typing_ms,
+        "chars_per_second": chars_per_second
+    }
+
+
+async def _type_char(page: Page, line: str):
+    """Caractere por caractere com delay humano."""
+    for char in line:
+        await page.keyboard.type(char)
+        await asyncio.sleep(random.uniform(*CHAR_DELAY))
+
+
+async def _type_chunk(page: Page, line: str):
+    """Uma rajada por palavra (com o espaço seguinte), pausa entre palavras."""
+    for chunk in _WORD_PATTERN.findall(line):
+        await page.keyboard.type(chunk, delay=CHUNK_KEY_DELAY_MS)
+        await asyncio.sleep(random.uniform(*CHUNK_DELAY))
+
+
+def _normalize(text: str) -> str:
+    """Normaliza para comparação (WhatsApp troca espaços/quebras e a forma dos emojis no DOM)."""
+    text = _VARIATION_SELECTORS.sub('', unicodedata.normalize('NFC', text))
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+async def verify_composed_text(input_elem, expected: str) -> bool:
+    """
+    Confere se o compose box contém exatamente o texto esperado.
+    
+    Garante que o link (e portanto o preview) é o correto antes do Enter.
+    
+    Args:
+        input_elem: ElementHandle do compose box
+        expected: Texto que deveria ter sido digitado
+    
+    Returns:
+        True se o texto bate (ignorando diferenças de espaço e de forma dos emojis)
+    """
+    try:
+        composed: Optional[str] = await input_elem.evaluate(COMPOSED_TEXT_JS)
+    except Exception as e:
+        logger.warning(f"Could not read compose box: {e}")
+        return False
+    
+    return _normalize(composed or "") == _normalize(expected)
+
+
+async def clear_compose_box(page: Page, input_elem):
+    """Apaga todo o conteúdo do compose box."""
+    await input_elem.click()
+    await page.keyboard.press('Control+A')
+    await page.keyboard.press('Backspace')
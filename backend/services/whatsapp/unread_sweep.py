@@ -0,0 +1,121 @@
+"""
+Unread Sweep - Descobre quais grupos fonte mudaram sem abrir nenhum.
+
+Um único page.evaluate lê, na lista de chats, o contador de não lidas,
+o horário e o preview da última mensagem de todos os grupos fonte.
+Só os grupos que mudaram desde a varredura anterior precisam ser abertos.
+
+Resultado por grupo:
+- changed: contador de não lidas > 0 ou horário/preview diferentes
+  (primeira vez que o grupo aparece também conta como mudança)
+- unchanged: mesma assinatura da varredura anterior, nada a abrir
+- missing: linha não renderizada (lista virtualizada) - sem informação,
+  o chamador decide (ex: checagem periódica do PollScheduler)
+"""
+import logging
+from typing import Dict, List, Optional, Tuple
+from playwright.async_api import Page
+
+from core.metrics import PLAYWRIGHT_OP_SECONDS, track_duration
+
+logger = logging.getLogger(__name__)
+
+
+# Lê as linhas renderizadas dos grupos pedidos (nomes comparados sem caixa)
+SWEEP_JS = """
+(names) => {
+    const wanted = new Map(names.map(n => [n.trim().toLowerCase(), n]));
+    const found = {};
+    const rows = document.querySelectorAll(
+        '#pane-side [role="listitem"], [data-testid="chat-list"] [data-testid^="cell-frame-container"]'
+    );
+    for (const row of rows) {
+        const title = row.querySelector('span[title]');
+        if (!title) continue;
+        const name = wanted.get((title.getAttribute('title') || '').trim().toLowerCase());
+        if (!name || name in found) continue;
+        
+        const badge = row.querySelector(
+            '[data-testid="icon-unread-count"], span[aria-label*="unread" i], span[aria-label*="não lida" i]'
+        );
+        const time = row.querySelector('[data-testid="cell-frame-primary-detail"]');
+        const preview = row.querySelector('[data-testid="last-msg-status"], span.selectable-text:not([title])');
+        const count = badge ? parseInt(badge.textContent, 10) : 0;
+        
+        found[name] = {
+            unread: badge ? (isNaN(count) ? 1 : count) : 0,
+            last_time: time ? time.textContent.trim() : null,
+            preview: preview ? preview.textContent.trim().slice(0, 200) : null,
+        };
+    }
+    return found;
+}
+"""
+
+
+class UnreadSweep:
+    """
+    Compara cada varredura com a anterior, por (conexão, grupo).
+    
+    A assinatura guardada é (horário, preview): abrir o grupo zera o
+    contador mas não muda a assinatura, então na próxima varredura o
+    grupo já aparece como unchanged.
+    """
+    
+    def __init__(self):
+        self.signatures: Dict[Tuple[str, str], Tuple[Optional[str], Optional[str]]] = {}
+        self.sweeps = 0
+        self.skipped = 0
+    
+    async def sweep(
+        self,
+        page: Page,
+        connection_id: str,
+        source_groups: List[str]
+    ) -> Dict[str, List[str]]:
+        """
+        Varre a lista de chats uma vez.
+        
+        Returns:
+            {"changed": [...], "unchanged": [...], "missing": [...]}
+        """
+        rows = {}
+        if source_groups:
+            with track_duration(PLAYWRIGHT_OP_SECONDS, kind="unread_sweep"):
+                rows = await page.evaluate(SWEEP_JS, source_groups)
+        return self.classify(connection_id, source_groups, rows)
+    
+    def classify(
+        self,
+        connection_id: str,
+        source_groups: List[str],
+        rows: Dict[str, dict]
+    ) -> Dict[str, List[str]]:
+        """Classifica os grupos a partir das linhas lidas do DOM."""
+        result = {"changed": [], "unchanged": [], "missing": []}
+        
+        for group_name in source_groups:
+            row = rows.get(group_name)
+            if row is None:
+                result["missing"].append(group_name)
+                continue
+            
+            key = (connection_id, group_name)
+            signature = (row.get("last_time"), row.get("preview"))
+            previous = self.signatures.get(key)
+            self.signatures[key] = signature
+            
+            if row.get("unread") or previous != signature:
+                result["changed"].append(group_name)
+            else:
+                result["unchanged"].append(group_name)
+        
+        self.sweeps += 1
+        self.skipped += len(result["unchanged"])
+        return result
+    
+    def forget(self, connection_id: str, group_name: Optional[str] = None):
+        """Descarta assinaturas (da conexão toda ou de um grupo)."""
+        for key in list(self.signatures):
+            if key[0] == connection_id and group_name in (None, key[1]):
+                del self.signatures[key]
@@ -0,0 +1,270 @@
+"""
+Micro-benchmarks for the parsing / monetization hot path (ingestion and workers).
+
+Run (prints ops/s and allocation per call, compares with the stored baseline):
+    RUN_BENCHMARKS=1 python -m pytest -q tests/benchmarks -s
+    python tests/benchmarks/test_parsing_benchmark.py [--update-baseline]
+
+Each benchmark walks a corpus of real-looking Brazilian offer messages,
+repeated until a round takes MIN_ROUND_SECONDS, and keeps the best of
+ROUNDS rounds. Allocation is
+the tracemalloc peak above the starting point of each call, averaged over
+the corpus; unlike ops/s it does not depend on the machine.
+
+A benchmark regresses when ops/s falls below baseline * (1 - threshold) or
+allocation grows above baseline * (1 + threshold) + ALLOC_SLACK_BYTES.
+Threshold: BENCH_THRESHOLD (default 0.25). ops/s is machine-dependent, so
+regenerate the baseline (--update-baseline) on the machine that compares.
+"""
+import asyncio
+import inspect
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from services.ingestion_service import create_dedup_hash, extract_urls, normalize_text
+from services.monetization_service import monetize_amazon_url, monetize_text
+from services.parsing_service import detect_store, extract_price_from_text, extract_product_id
+
+BASELINE_PATH = Path(__file__).with_name("parsing_baseline.json")
+THRESHOLD = float(os.environ.get("BENCH_THRESHOLD", "0.25"))
+ALLOC_SLACK_BYTES = 64
+ROUNDS = 7
+MIN_ROUND_SECONDS = 0.1
+
+USER_ID = "3f0c9a52-5d1e-4b8f-9c71-2a6e0d4b7e11"
+TAG_CODE = "autopromo0b-20"
+
+
+# What source groups actually post: emojis, "de/por" prices, coupons, short
+# and tracking-laden long links, several stores and chatter without links
+OFFER_MESSAGES = [
+    "🔥 Echo Dot 5ª geração | Smart speaker com Alexa\n\nDe R$ 429,00\n💰 Por R$ 284,05 à vista\n\n🛒 https://www.amazon.com.br/Echo-Dot-5%C2%AA-gera%C3%A7%C3%A3o-Cor/dp/B09B8VGCR8?pd_rd_w=Kx9aP&pf_rd_p=8f1c&ref_=pd_gw_ci_mcx_mr_hp_d",
+    "⚡ BAIXOU! Kindle 11ª Geração 16GB\nR$ 474,05\nhttps://amzn.to/3QxKm2L",
+    "Fritadeira Airfryer Mondial 4L Family\npor R$ 279,90 no PIX 😱\nhttps://www.magazineluiza.com.br/fritadeira-airfryer-mondial-family/p/237163100/ep/efsf/?seller_id=magazineluiza&utm_source=telegram",
+    "CUPOM: BEMVINDO10 🎟️\nSmart TV 50\" Samsung Crystal UHD 4K\n👉 R$ 2.199,00 em 10x sem juros\nhttps://produto.mercadolivre.com.br/MLB-3468291055-smart-tv-samsung-50-crystal-uhd-4k-_JM",
+    "Whey Protein Growth 1kg 🏋️\nSó R$ 89,90\n\nhttps://www.amazon.com.br/gp/product/B07XKZ2VXN?th=1&psc=1",
+    "🚨 ERRO DE PREÇO?? Fone JBL Tune 520BT\nde 349,90 por 179,90 reais\nhttps://www.magazineluiza.com.br/produto/235719200?utm_medium=whatsapp",
+    "Cadeira Gamer ThunderX3 TGC12 Preta\n➡️ R$ 699,99\nhttps://www.mercadolivre.com.br/cadeira-gamer-thunderx3-tgc12/p/MLB19733456?pdp_filters=deal%3AMLB779362-1",
+    "Bom dia grupo! Hoje tem ofertas a partir das 10h, fiquem ligados 👀",
+    "Kit 3 Camisetas Hering Básicas\nR$ 99,90 | frete grátis Prime\nhttps://www.amazon.com.br/dp/B0CHX1W1XY",
+    "Notebook Lenovo IdeaPad 1 Ryzen 5 8GB 256GB SSD\n💸 R$ 2.349,00 à vista\n🔗 https://www.americanas.com.br/produto/7490212945?opn=YSMESP&sellerid=00776574000156",
+    "Jogo de Panelas Tramontina Turim 10 peças\nR$ 349,90\nhttps://shopee.com.br/Jogo-de-Panelas-Tramontina-Turim-i.369820014.19852734921",
+    "🎮 Controle DualSense PS5 Branco\nPOR R$ 349,00\nhttps://amzn.to/48ZcLq1\n\nSe esgotar, avisamos aqui!",
+    "Tênis Olympikus Corre 3 masculino\nR$ 239,99 (use o cupom CORRE15)\nhttps://www.netshoes.com.br/tenis-olympikus-corre-3-masculino-azul-D22-5291-008",
+    "Sabão Líquido Omo 5L refil 🧺\nR$ 64,90 na recorrência\nhttps://www.amazon.com.br/Sab%C3%A3o-L%C3%ADquido-Omo-Lavagem-Perfeita/dp/B08L5Y3N3B/ref=sr_1_3?keywords=omo",
+    "Galaxy A15 128GB 4GB RAM\nDe R$ 1.299,00 por R$ 899,00\nhttps://www.magazineluiza.com.br/smartphone-samsung-galaxy-a15/p/237476900/te/ga15/\nhttps://www.amazon.com.br/dp/B0CN1Q7HSZ",
+    "Mouse Logitech G203 Lightsync\n🔥 R$ 99,90 🔥\nhttps://produto.mercadolivre.com.br/MLB-2056347101-mouse-gamer-logitech-g203-lightsync-rgb-_JM?matt_tool=18956390",
+    "ÚLTIMAS UNIDADES\n\nCafeteira Nespresso Essenza Mini\n299,00 reais\nhttps://www.amazon.com.br/Cafeteira-Nespresso-Essenza-Mini-Preta/dp/B07Q4V6MKV?tag=outroafiliado-20",
+    "Liquidificador Philco PLQ1400 1400W\nR$ 119,90\nhttps://www.magalu.com.br/produto/225533900",
+    "Alguém sabe se a promo do Prime Day já começou?",
+    "🍫 Caixa Bombom Garoto 250g\nR$ 8,99 (leve 3 pague 2)\nhttps://amzn.to/3tN0qxR",
+    "Monitor LG UltraGear 24\" 144Hz IPS\nPor apenas R$ 799,00\n\nhttps://www.amazon.com.br/gp/product/B0BVXW3F1C/ref=ox_sc_act_title_1?smid=A1ZZFT5FULY4LN&psc=1",
+    "Ventilador Arno Turbo Silence 40cm\nR$ 189,90\nhttps://www.americanas.com.br/produto/3014271003",
+    "SSD Kingston NV2 1TB NVMe\nR$ 379,90 ⚡\nhttps://www.mercadolivre.com.br/ssd-kingston-nv2-1tb/p/MLB19605345",
+    "Fralda Pampers Confort Sec XG 64un\nR$ 77,39 na assinatura\nhttps://www.amazon.com.br/dp/B09TQZ3JPX?smid=A1ZZFT5FULY4LN",
+]
+
+
+class StubTagSession:
+    """Just enough AsyncSession for get_affiliate_tag: every store has a tag, no database."""
+    
+    _tag = SimpleNamespace(tag_code=TAG_CODE)
+    
+    async def execute(self, statement):
+        return self
+    
+    def scalar_one_or_none(self):
+        return self._tag
+
+
+def _urls() -> list:
+    return [url for message in OFFER_MESSAGES for url in extract_urls(message)]
+
+
+def _build_benchmarks() -> dict:
+    """{name: (function, list of per-call argument tuples)}"""
+    urls = _urls()
+    store_urls = [(detect_store(url), url) for url in urls if detect_store(url)]
+    normalized = [asyncio.run(normalize_text(message)) for message in OFFER_MESSAGES]
+    session = StubTagSession()
+    
+    return {
+        "detect_store": (detect_store, [(url,) for url in urls]),
+        "extract_product_id": (extract_product_id, store_urls),
+        "extract_price_from_text": (extract_price_from_text, [(m,) for m in OFFER_MESSAGES]),
+        "extract_urls": (extract_urls, [(m,) for m in OFFER_MESSAGES]),
+        "monetize_amazon_url": (
+            monetize_amazon_url,
+            [(url, TAG_CODE) for store, url in store_urls if store == "amazon" and "amzn.to" not in url]
+        ),
+        # amzn.to links would be expanded over the network: left out
+        "monetize_text": (
+            monetize_text,
+            [(session, m, USER_ID) for m in OFFER_MESSAGES if "amzn.to" not in m]
+        ),
+        "create_dedup_hash": (
+            create_dedup_hash,
+            [(USER_ID, (extract_urls(m) or [""])[0], n) for m, n in zip(OFFER_MESSAGES, normalized)]
+        ),
+        "normalize_text": (normalize_text, [(m,) for m in OFFER_MESSAGES]),
+    }
+
+
+BENCHMARKS = _build_benchmarks()
+
+
+async def _timed_pass(fn, calls: list, repeat: int) -> float:
+    is_async = inspect.iscoroutinefunction(fn)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for args in calls:
+            result = fn(*args)
+            if is_async:
+                await result
+    return time.perf_counter() - started
+
+
+async def _alloc_pass(fn, calls: list) -> float:
+    is_async = inspect.iscoroutinefunction(fn)
+    total = 0
+    for args in calls:
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        result = fn(*args)
+        if is_async:
+            await result
+        total += tracemalloc.get_traced_memory()[1] - current
+    return total / len(calls)
+
+
+def measure(name: str) -> dict:
+    """ops/s (best round) and bytes allocated per call."""
+    fn, calls = BENCHMARKS[name]
+    # Warm-up (regex cache) doubles as calibration of the round size
+    single = asyncio.run(_timed_pass(fn, calls, 1))
+    repeat = max(1, int(MIN_ROUND_SECONDS / max(single, 1e-6)))
+    
+    best = min(asyncio.run(_timed_pass(fn, calls, repeat)) for _ in range(ROUNDS))
+    
+    tracemalloc.start()
+    try:
+        alloc_bytes = asyncio.run(_alloc_pass(fn, calls))
+    finally:
+        tracemalloc.stop()
+    
+    return {
+        "ops_per_sec": round(len(calls) * repeat / best),
+        "alloc_bytes": round(alloc_bytes),
+    }
+
+
+def regressions(name: str, result: dict, baseline: dict) -> list:
+    """Regression messages for one benchmark against the baseline (empty = ok)."""
+    expected = baseline.get(name)
+    if not expected:
+        return []
+    
+    problems = []
+    min_ops = expected["ops_per_sec"] * (1 - THRESHOLD)
+    if result["ops_per_sec"] < min_ops:
+        problems.append(
+            f"{name}: {result['ops_per_sec']} ops/s < {min_ops:.0f} "
+            f"(baseline {expected['ops_per_sec']}, threshold {THRESHOLD:.0%})"
+        )
+    max_alloc = expected["alloc_bytes"] * (1 + THRESHOLD) + ALLOC_SLACK_BYTES
+    if result["alloc_bytes"] > max_alloc:
+        problems.append(
+            f"{name}: {result['alloc_bytes']} B/call > {max_alloc:.0f} "
+            f"(baseline {expected['alloc_bytes']})"
+        )
+    return problems
+
+
+def load_baseline() -> dict:
+    if not BASELINE_PATH.exists():
+        return {}
+    return json.loads(BASELINE_PATH.read_text())["benchmarks"]
+
+
+# ============================================================================
+# PYTEST
+# ============================================================================
+
+def test_baseline_covers_every_benchmark():
+    assert set(load_baseline()) == set(BENCHMARKS)
+
+
+def test_corpus_exercises_the_parsers():
+    assert all(calls for _, calls in BENCHMARKS.values())
+    prices = [extract_price_from_text(m) for m in OFFER_MESSAGES]
+    # Misses: chatter without a price and "R$ 2.199,00" (thousands separator, not parsed today)
+    assert sum(p is not None for p in prices) >= len(OFFER_MESSAGES) - 4
+
+
+@pytest.mark.asyncio
+async def test_monetize_text_with_stub_tags():
+    text = "Echo Dot R$ 284,05 https://www.amazon.com.br/Echo-Dot/dp/B09B8VGCR8?ref_=x"
+    
+    result = await monetize_text(StubTagSession(), text, USER_ID)
+    
+    assert result == f"Echo Dot R$ 284,05 https://www.amazon.com.br/dp/B09B8VGCR8?tag={TAG_CODE}"
+
+
+@pytest.mark.skipif(not os.environ.get("RUN_BENCHMARKS"), reason="set RUN_BENCHMARKS=1 to run benchmarks")
+@pytest.mark.parametrize("name", list(BENCHMARKS))
+def test_benchmark(name):
+    result = measure(name)
+    print(f"\n{name:24} {result['ops_per_sec']:>10} ops/s {result['alloc_bytes']:>8} B/call")
+    
+    assert not regressions(name, result, load_baseline())
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def main(update_baseline: bool) -> int:
+    baseline = load_baseline()
+    results = {}
+    problems = []
+    
+    print()
+    print("=" * 72)
+    print(f"{'benchmark':24} {'ops/s':>12} {'baseline':>12} {'B/call':>9} {'baseline':>9}")
+    print("-" * 72)
+    for name in BENCHMARKS:
+        results[name] = measure(name)
+        expected = baseline.get(name, {})
+        print(
+            f"{name:24} {results[name]['ops_per_sec']:>12} {expected.get('ops_per_sec', '-'):>12} "
+            f"{results[name]['alloc_bytes']:>9} {expected.get('alloc_bytes', '-'):>9}"
+        )
+        problems += regressions(name, results[name], baseline)
+    print("=" * 72)
+    
+    if update_baseline:
+        BASELINE_PATH.write_text(json.dumps({
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "benchmarks": results,
+        }, indent=2) + "\n")
+        print(f"Baseline written to {BASELINE_PATH}")
+        return 0
+    
+    for problem in problems:
+        print(f"REGRESSION {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main("--update-baseline" in sys.argv[1:]))
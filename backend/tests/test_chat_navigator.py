@@ -0,0 +1,135 @@
+"""
+Testes para a abertura de chats (já aberto, linha da lista, busca).
+"""
+import pytest
+from prometheus_client import REGISTRY
+
+from services.whatsapp.chat_navigator import is_chat_open, open_chat, open_chat_row
+
+
+class FakeElement:
+    def __init__(self, page, title):
+        self.page = page
+        self.title = title
+    
+    async def get_attribute(self, name):
+        return self.title if name == "title" else None
+    
+    async def click(self):
+        self.page.clicks.append(self.title)
+        if self.page.row_opens_chat:
+            self.page.open_title = self.title
+
+
+class FakePage:
+    """Lista lateral com `rows` visíveis e, opcionalmente, um chat aberto no header."""
+    
+    def __init__(self, rows=(), open_title=None, row_opens_chat=True):
+        self.rows = list(rows)
+        self.open_title = open_title
+        self.row_opens_chat = row_opens_chat
+        self.clicks = []
+        self.queries = []
+    
+    async def query_selector(self, selector):
+        self.queries.append(selector)
+        if "header" in selector:
+            return FakeElement(self, self.open_title) if self.open_title else None
+        for title in self.rows:
+            if f'span[title="{title}"]' in selector:
+                return FakeElement(self, title)
+        return None
+
+
+class FakeSearch:
+    def __init__(self):
+        self.calls = []
+    
+    async def __call__(self, page, group_name):
+        self.calls.append(group_name)
+        page.open_title = group_name
+
+
+def opened_via(method):
+    return REGISTRY.get_sample_value(
+        "autopromo_playwright_op_seconds_count", {"kind": f"chat_{method}"}
+    ) or 0
+
+
+@pytest.mark.asyncio
+class TestIsChatOpen:
+    
+    async def test_matches_header_title_ignoring_case_and_spaces(self):
+        page = FakePage(open_title=" Promoções VIP ")
+        
+        assert await is_chat_open(page, "promoções vip")
+        assert not await is_chat_open(page, "Promoções")
+    
+    async def test_no_chat_open(self):
+        assert not await is_chat_open(FakePage(), "Promoções VIP")
+
+
+@pytest.mark.asyncio
+class TestOpenChatRow:
+    
+    async def test_clicks_visible_row_and_confirms_by_header(self):
+        page = FakePage(rows=["Outro grupo", "Promoções VIP"])
+        
+        assert await open_chat_row(page, "Promoções VIP")
+        assert page.clicks == ["Promoções VIP"]
+    
+    async def test_row_not_visible(self):
+        page = FakePage(rows=["Outro grupo"])
+        
+        assert not await open_chat_row(page, "Promoções VIP")
+        assert page.clicks == []
+    
+    async def test_header_never_confirms(self):
+        page = FakePage(rows=["Promoções VIP"], row_opens_chat=False)
+        
+        assert not await open_chat_row(page, "Promoções VIP", confirm_timeout=0.2)
+        assert page.clicks == ["Promoções VIP"]
+    
+    async def test_quotes_in_name_are_escaped(self):
+        page = FakePage()
+        
+        await open_chat_row(page, 'Ofertas "Top"')
+        
+        assert '#pane-side span[title="Ofertas \\"Top\\""]' in page.queries
+
+
+@pytest.mark.asyncio
+class TestOpenChat:
+    
+    async def test_already_open_short_circuits(self):
+        page = FakePage(rows=["Promoções VIP"], open_title="Promoções VIP")
+        search = FakeSearch()
+        before = opened_via("already_open")
+        
+        assert await open_chat(page, "Promoções VIP", search) == "already_open"
+        
+        assert page.clicks == [] and search.calls == []
+        assert all("header" in q for q in page.queries)
+        assert opened_via("already_open") == before + 1
+    
+    async def test_visible_row_is_clicked(self):
+        page = FakePage(rows=["Promoções VIP"], open_title="Outro grupo")
+        search = FakeSearch()
+        
+        assert await open_chat(page, "Promoções VIP", search) == "chat_row"
+        assert search.calls == []
+    
+    async def test_falls_back_to_search(self):
+        page = FakePage(rows=["Outro grupo"])
+        search = FakeSearch()
+        
+        assert await open_chat(page, "Promoções VIP", search) == "search"
+        assert search.calls == ["Promoções VIP"]
+        assert page.clicks == []
+    
+    async def test_search_failure_propagates(self):
+        async def failing_search(page, group_name):
+            raise Exception(f"Group '{group_name}' not found in search results")
+        
+        with pytest.raises(Exception, match="not found in search results"):
+            await open_chat(FakePage(), "Promoções VIP", failing_search)
@@ -0,0 +1,123 @@
+"""
+Testes para o endpoint SSE de eventos da conexão (auth, dono, primeiros frames).
+
+O endpoint não pode segurar uma sessão do banco com o stream aberto: toda
+sessão aberta por ele precisa estar fechada antes do primeiro frame.
+"""
+import json
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from api import whatsapp_connections
+from api.deps import get_current_user_detached
+from core.redis_client import redis_client
+from models.whatsapp_connection import WhatsAppConnection
+from services.whatsapp.qr_store import publish_qr
+
+fakeredis = pytest.importorskip("fakeredis")
+
+OWNER = uuid.uuid4()
+CONNECTION = SimpleNamespace(id=uuid.uuid4(), user_id=OWNER, status="qr_needed")
+
+
+class FakeSession:
+    """Responde os selects de colunas do endpoint a partir de CONNECTION."""
+    
+    open_sessions = 0
+    
+    async def __aenter__(self):
+        FakeSession.open_sessions += 1
+        return self
+    
+    async def __aexit__(self, *exc):
+        FakeSession.open_sessions -= 1
+        return False
+    
+    async def scalar(self, statement):
+        params = statement.compile().params
+        if params.get("id_1") != CONNECTION.id or params.get("user_id_1", OWNER) != OWNER:
+            return None
+        column = statement.selected_columns[0]
+        assert column.table is WhatsAppConnection.__table__
+        return getattr(CONNECTION, column.key)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(whatsapp_connections, "AsyncSessionLocal", FakeSession)
+    monkeypatch.setattr(redis_client, "_redis", fakeredis.aioredis.FakeRedis(decode_responses=True))
+    
+    app = FastAPI()
+    app.include_router(whatsapp_connections.router)
+    with TestClient(app) as test_client:
+        yield app, test_client
+    FakeSession.open_sessions = 0
+
+
+def as_user(app, user_id):
+    app.dependency_overrides[get_current_user_detached] = lambda: SimpleNamespace(id=user_id)
+
+
+def first_frames(response, count):
+    frames, lines = [], []
+    for line in response.iter_lines():
+        if line:
+            lines.append(line)
+            continue
+        frames.append({k: v for k, v in (l.split(": ", 1) for l in lines)})
+        lines = []
+        if len(frames) == count:
+            return frames
+    return frames
+
+
+def test_requires_a_token(client):
+    app, test_client = client
+    
+    assert test_client.get(f"/api/v1/connections/{CONNECTION.id}/events").status_code == 401
+    
+    response = test_client.get(
+        f"/api/v1/connections/{CONNECTION.id}/events",
+        headers={"Authorization": "Bearer not-a-jwt"}
+    )
+    assert response.status_code == 401
+
+
+def test_other_users_connection_is_not_found(client):
+    app, test_client = client
+    as_user(app, uuid.uuid4())
+    
+    response = test_client.get(f"/api/v1/connections/{CONNECTION.id}/events")
+    
+    assert response.status_code == 404
+    assert FakeSession.open_sessions == 0
+
+
+def test_stream_starts_with_status_and_qr_snapshot(client, monkeypatch):
+    app, test_client = client
+    sessions_while_streaming = []
+    
+    # TestClient lê o corpo inteiro: encerra o stream logo depois do snapshot
+    async def disconnected(self):
+        sessions_while_streaming.append(FakeSession.open_sessions)
+        return True
+    monkeypatch.setattr(Request, "is_disconnected", disconnected)
+    as_user(app, OWNER)
+    test_client.portal.call(publish_qr, redis_client.client, str(CONNECTION.id), "data:image/png;base64,QR", "fp-1")
+    
+    with test_client.stream("GET", f"/api/v1/connections/{CONNECTION.id}/events") as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        status_frame, qr_frame = first_frames(response, 2)
+    
+    # A sessão usada para o dono e o snapshot foi fechada antes do stream
+    assert sessions_while_streaming == [0]
+    
+    assert status_frame["event"] == "status"
+    assert json.loads(status_frame["data"]) == {"status": "qr_needed"}
+    assert qr_frame["event"] == "qr"
+    assert json.loads(qr_frame["data"])["qr_code"] == "data:image/png;base64,QR"
@@ -0,0 +1,483 @@
+"""
+Testes para o ConnectionPool com browser contexts falsos (sem Chromium).
+
+Testa o orçamento de contexts vivos (hibernação LRU), a proteção de
+contexts em uso, a reidratação de conexões hibernadas, o warm pool e a
+sessão salva via storage_state no modo shared.
+"""
+import asyncio
+import copy
+import json
+import logging
+import os
+from types import SimpleNamespace
+
+import pytest
+from prometheus_client import REGISTRY
+
+from services.whatsapp.connection_pool import CHAT_LIST_SELECTOR, WARM_DIR, WHATSAPP_WEB_URL, ConnectionPool
+from workers.whatsapp_worker import WhatsAppWorker
+
+
+class FakePage:
+    def __init__(self):
+        self.closed = False
+        self.url = "about:blank"
+        self.visited = []
+        # Travado: goto() espera até ser liberado (simula um wake lento)
+        self.gate = None
+    
+    def is_closed(self):
+        return self.closed
+    
+    async def goto(self, url, **kwargs):
+        if self.gate:
+            await self.gate.wait()
+        self.url = url
+        self.visited.append(url)
+    
+    async def wait_for_selector(self, selector, **kwargs):
+        return selector
+
+
+class FakeContext:
+    def __init__(self, key):
+        self.key = key
+        self.pages = [FakePage()]
+        self.closed = False
+    
+    async def close(self):
+        self.closed = True
+        for page in self.pages:
+            page.closed = True
+
+
+class FakeLauncher:
+    """Substitui _create_context: registra os contexts abertos por chave."""
+    
+    def __init__(self):
+        self.created = []
+        # Chave -> Event que o próximo context dessa chave vai esperar no goto()
+        self.gates = {}
+    
+    async def __call__(self, key, headless):
+        context = FakeContext(key)
+        context.pages[0].gate = self.gates.pop(key, None)
+        self.created.append(context)
+        return context
+
+
+def wake_count():
+    return REGISTRY.get_sample_value(
+        "autopromo_browser_context_lifecycle_seconds_count", {"kind": "wake"}
+    ) or 0
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = ConnectionPool(sessions_dir=str(tmp_path), max_live_contexts=2)
+    pool._create_context = FakeLauncher()
+    return pool
+
+
+@pytest.mark.asyncio
+class TestHibernation:
+    """Testes do orçamento de contexts vivos."""
+    
+    async def test_least_recently_used_context_is_hibernated(self, pool):
+        first = await pool.get_or_create("a")
+        await pool.get_or_create("b")
+        # "a" volta a ser o mais recente
+        assert await pool.get_or_create("a") is first
+        
+        await pool.get_or_create("c")
+        
+        assert list(pool.contexts) == ["a", "c"]
+        assert pool.hibernated == {"b"}
+        assert pool.get_hibernation_stats()["hibernations"] == 1
+    
+    async def test_busy_context_is_skipped(self, pool):
+        async with pool.use("a") as context:
+            await pool.get_or_create("b")
+            await pool.get_or_create("c")
+            
+            assert not context.closed
+            assert list(pool.contexts) == ["a", "c"]
+            assert pool.hibernated == {"b"}
+    
+    async def test_context_with_get_or_create_in_progress_is_skipped(self, pool):
+        first = await pool.get_or_create("a")
+        await pool.get_or_create("b")
+        
+        # Outra task está no meio de um get_or_create("a") (segura o lock da conexão)
+        async with pool._connection_lock("a"):
+            await pool.get_or_create("c")
+        
+        assert not first.closed
+        assert list(pool.contexts) == ["a", "c"]
+        assert pool.hibernated == {"b"}
+    
+    async def test_pinned_context_stays_until_unpinned(self, pool):
+        await pool.get_or_create("a")
+        pool.pin("a")
+        await pool.get_or_create("b")
+        await pool.get_or_create("c")
+        assert "a" in pool.contexts and pool.hibernated == {"b"}
+        
+        pool.unpin("a")
+        pool.unpin("a")  # unpin extra não deixa contador negativo
+        await pool.get_or_create("d")
+        
+        assert "a" in pool.hibernated
+        assert pool._busy == {}
+    
+    async def test_login_contexts_are_pinned_across_cycles(self, pool):
+        worker = WhatsAppWorker()
+        worker.gateway = SimpleNamespace(pool=pool)
+        
+        worker._pin_login_contexts({"a", "b"})
+        worker._pin_login_contexts({"a", "b"})
+        assert pool._busy == {"a": 1, "b": 1}
+        
+        # "b" conectou: sai do login e volta a poder hibernar
+        worker._pin_login_contexts({"a"})
+        assert pool._busy == {"a": 1}
+        
+        worker._pin_login_contexts(set())
+        assert pool._busy == {}
+    
+    async def test_budget_is_exceeded_when_everything_is_busy(self, pool):
+        async with pool.use("a"), pool.use("b"):
+            await pool.get_or_create("c")
+        
+        assert len(pool.contexts) == 3
+        assert pool.hibernated == set()
+    
+    async def test_hibernated_connection_is_rehydrated(self, pool):
+        await pool.get_or_create("a")
+        await pool.hibernate("a")
+        assert pool.get_active_count() == 0
+        wakes_before = wake_count()
+        
+        context = await pool.get_or_create("a")
+        
+        assert context.pages[0].visited == [WHATSAPP_WEB_URL]
+        assert pool.hibernated == set()
+        assert pool.get_hibernation_stats()["wakes"] == 1
+        assert wake_count() == wakes_before + 1
+    
+    async def test_new_connection_is_not_rehydrated(self, pool):
+        context = await pool.get_or_create("a")
+        
+        # Navegação inicial é do login_cycle
+        assert context.pages[0].visited == []
+    
+    async def test_slow_wake_does_not_block_other_connections(self, pool):
+        await pool.get_or_create("a")
+        await pool.hibernate("a")
+        gate = asyncio.Event()
+        pool._create_context.gates["a"] = gate
+        
+        waking = asyncio.create_task(pool.get_or_create("a"))
+        await asyncio.sleep(0)
+        
+        # Outras conexões abrem durante a reidratação, sem hibernar "a"
+        await asyncio.wait_for(pool.get_or_create("b"), timeout=1)
+        await asyncio.wait_for(pool.get_or_create("c"), timeout=1)
+        assert list(pool.contexts) == ["a", "c"]
+        assert not pool.contexts["a"].closed
+        
+        # Quem pede a mesma conexão espera a reidratação terminar
+        again = asyncio.create_task(pool.get_or_create("a"))
+        await asyncio.sleep(0)
+        assert not again.done()
+        
+        gate.set()
+        context = await waking
+        assert await again is context
+        assert context.pages[0].visited == [WHATSAPP_WEB_URL]
+        assert pool.hibernated == {"b"}
+    
+    async def test_wake_waits_for_chat_list(self, pool):
+        selectors = []
+        
+        async def wait_for_selector(selector, **kwargs):
+            selectors.append(selector)
+        
+        await pool.get_or_create("a")
+        await pool.hibernate("a")
+        
+        original = pool._create_context
+        
+        async def create(key, headless):
+            context = await original(key, headless)
+            context.pages[0].wait_for_selector = wait_for_selector
+            return context
+        
+        pool._create_context = create
+        await pool.get_or_create("a")
+        
+        assert selectors == [CHAT_LIST_SELECTOR]
+
+
+def add_warm(pool, name):
+    """Warm context pronto, com o diretório de perfil que o Chromium teria criado."""
+    warm_key = f"{WARM_DIR}/{name}"
+    os.makedirs(os.path.join(pool.sessions_dir, warm_key))
+    context = FakeContext(warm_key)
+    pool.warm.append((warm_key, context))
+    return context
+
+
+@pytest.mark.asyncio
+class TestWarmPool:
+    """Testes da entrega de warm contexts para conexões novas."""
+    
+    async def test_new_connection_claims_warm_context(self, pool):
+        warm = add_warm(pool, "abc")
+        session_dir = os.path.join(pool.sessions_dir, "c1")
+        
+        assert await pool.get_or_create("c1") is warm
+        
+        assert os.readlink(session_dir) == f"{WARM_DIR}/abc"
+        assert os.path.realpath(session_dir) == os.path.realpath(os.path.join(pool.sessions_dir, WARM_DIR, "abc"))
+        assert pool.warm == [] and pool._create_context.created == []
+    
+    async def test_existing_session_dir_never_claims(self, pool):
+        os.makedirs(os.path.join(pool.sessions_dir, "c1"))
+        warm = add_warm(pool, "abc")
+        
+        context = await pool.get_or_create("c1")
+        
+        assert context is not warm
+        assert pool.warm == [(f"{WARM_DIR}/abc", warm)]
+        assert not os.path.islink(os.path.join(pool.sessions_dir, "c1"))
+    
+    async def test_dangling_session_link_is_replaced(self, pool):
+        session_dir = os.path.join(pool.sessions_dir, "c1")
+        os.symlink(f"{WARM_DIR}/gone", session_dir)
+        warm = add_warm(pool, "abc")
+        
+        assert await pool.get_or_create("c1") is warm
+        assert os.readlink(session_dir) == f"{WARM_DIR}/abc"
+    
+    async def test_dangling_link_without_warm_context_starts_fresh(self, pool):
+        session_dir = os.path.join(pool.sessions_dir, "c1")
+        os.symlink(f"{WARM_DIR}/gone", session_dir)
+        
+        await pool.get_or_create("c1")
+        
+        assert not os.path.lexists(session_dir)
+        assert [c.key for c in pool._create_context.created] == ["c1"]
+    
+    async def test_dead_warm_context_is_discarded(self, pool):
+        warm = add_warm(pool, "abc")
+        await warm.close()
+        
+        context = await pool.get_or_create("c1")
+        
+        assert context is not warm
+        assert not os.path.exists(os.path.join(pool.sessions_dir, WARM_DIR, "abc"))
+        assert not os.path.lexists(os.path.join(pool.sessions_dir, "c1"))
+    
+    async def test_prune_keeps_only_claimed_warm_dirs(self, pool):
+        add_warm(pool, "claimed")
+        await pool.get_or_create("c1")
+        os.makedirs(os.path.join(pool.sessions_dir, WARM_DIR, "orphan"))
+        
+        pool._prune_warm_dirs()
+        
+        assert os.listdir(os.path.join(pool.sessions_dir, WARM_DIR)) == ["claimed"]
+    
+    async def test_refill_stops_at_live_context_budget(self, pool, caplog):
+        caplog.set_level(logging.INFO)
+        pool.playwright = object()
+        pool.warm_pool_size = 3
+        await pool.get_or_create("a")
+        
+        await pool.fill_warm_pool()
+        
+        assert len(pool.warm) == 1
+        assert "Warm pool refill paused" in caplog.text
+    
+    async def test_warm_contexts_are_discarded_before_hibernating(self, pool):
+        await pool.get_or_create("a")
+        warm = add_warm(pool, "abc")
+        # Sessão em disco: "b" não assume o warm, precisa de um context novo
+        os.makedirs(os.path.join(pool.sessions_dir, "b"))
+        
+        await pool.get_or_create("b")
+        
+        assert warm.closed and pool.warm == []
+        assert list(pool.contexts) == ["a", "b"] and pool.hibernated == set()
+    
+    async def test_failed_preload_stops_refill_explicitly(self, pool, caplog):
+        pool.playwright = object()
+        pool.warm_pool_size = 1
+        launcher = pool._create_context
+        
+        async def create(key, headless):
+            context = await launcher(key, headless)
+            
+            async def goto(url, **kwargs):
+                raise TimeoutError("Timeout 60000ms exceeded")
+            context.pages[0].goto = goto
+            return context
+        
+        pool._create_context = create
+        await pool.fill_warm_pool()
+        
+        assert pool.warm == [] and pool._warming == 0
+        assert launcher.created[0].closed
+        assert "refill stopped until the next claim" in caplog.text
+
+
+class FakeBrowserContext(FakeContext):
+    """Context do modo shared: carrega e grava storage_state como o Playwright."""
+    
+    def __init__(self, browser, storage_state):
+        super().__init__(key=None)
+        self.pages = []
+        self.browser = browser
+        self.state = {"cookies": [], "origins": []}
+        if storage_state:
+            with open(storage_state) as f:
+                self.state = json.load(f)
+    
+    async def new_page(self):
+        self.pages.append(FakePage())
+    
+    async def storage_state(self, path, indexed_db=False):
+        if self.browser.fail_saves:
+            raise RuntimeError("Target closed")
+        origins = [
+            {k: v for k, v in origin.items() if indexed_db or k != "indexedDB"}
+            for origin in self.state["origins"]
+        ]
+        with open(path, "w") as f:
+            json.dump({**self.state, "origins": origins}, f)
+    
+    async def close(self):
+        await super().close()
+        self.browser.contexts.remove(self)
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.contexts = []
+        self.closed = False
+        self.fail_saves = False
+    
+    def is_connected(self):
+        return not self.closed
+    
+    async def new_context(self, storage_state=None, **options):
+        # Ida e volta ao browser: outras tasks rodam antes do context existir
+        await asyncio.sleep(0)
+        context = FakeBrowserContext(self, storage_state)
+        self.contexts.append(context)
+        return context
+    
+    async def close(self):
+        self.closed = True
+
+
+class FakeChromium:
+    def __init__(self):
+        self.launched = []
+    
+    async def launch(self, **kwargs):
+        browser = FakeBrowser()
+        self.launched.append(browser)
+        return browser
+
+
+WHATSAPP_STATE = {
+    "cookies": [{"name": "wa_lang_pref", "value": "pt_BR", "domain": ".web.whatsapp.com", "path": "/"}],
+    "origins": [{
+        "origin": "https://web.whatsapp.com",
+        "localStorage": [{"name": "WANoiseInfo", "value": "noise"}],
+        # Chaves de login do WhatsApp Web: só vêm com indexed_db=True
+        "indexedDB": [{"name": "wawc", "version": 80, "stores": [{"name": "user", "records": [{"value": "keys"}]}]}],
+    }],
+}
+
+
+@pytest.fixture
+def shared_pool(tmp_path):
+    pool = ConnectionPool(sessions_dir=str(tmp_path), mode="shared", contexts_per_browser=2)
+    pool.playwright = SimpleNamespace(chromium=FakeChromium())
+    return pool
+
+
+@pytest.mark.asyncio
+class TestSharedSessions:
+    """Testes de salvar/restaurar a sessão no modo shared."""
+    
+    async def test_session_round_trip_keeps_indexed_db(self, shared_pool):
+        context = await shared_pool.get_or_create("c1")
+        context.state = copy.deepcopy(WHATSAPP_STATE)
+        
+        # Fechar (hibernar) grava a sessão; reabrir restaura no context novo
+        await shared_pool.hibernate("c1")
+        restored = await shared_pool.get_or_create("c1")
+        
+        assert restored is not context
+        assert restored.state == WHATSAPP_STATE
+        assert len(restored.pages) == 1
+    
+    async def test_save_session_writes_storage_state_file(self, shared_pool):
+        context = await shared_pool.get_or_create("c1")
+        context.state = copy.deepcopy(WHATSAPP_STATE)
+        
+        assert await shared_pool.save_session("c1") is True
+        
+        state_path = shared_pool._storage_state_path("c1")
+        with open(state_path) as f:
+            assert json.load(f)["origins"][0]["indexedDB"][0]["name"] == "wawc"
+        assert not os.path.exists(f"{state_path}.tmp")
+    
+    async def test_failed_save_keeps_previous_session(self, shared_pool):
+        context = await shared_pool.get_or_create("c1")
+        context.state = copy.deepcopy(WHATSAPP_STATE)
+        await shared_pool.save_session("c1")
+        
+        context.state = {"cookies": [], "origins": []}
+        context.browser.fail_saves = True
+        
+        assert await shared_pool.save_session("c1") is False
+        with open(shared_pool._storage_state_path("c1")) as f:
+            assert json.load(f) == WHATSAPP_STATE
+    
+    async def test_new_connection_starts_without_state(self, shared_pool):
+        context = await shared_pool.get_or_create("c1")
+        
+        assert context.state == {"cookies": [], "origins": []}
+        assert not os.path.exists(shared_pool._storage_state_path("c1"))
+    
+    async def test_connections_share_browser_up_to_the_limit(self, shared_pool):
+        for cid in ("c1", "c2", "c3"):
+            await shared_pool.get_or_create(cid)
+        
+        first, second = shared_pool.playwright.chromium.launched
+        assert len(first.contexts) == 2 and len(second.contexts) == 1
+        
+        # Último context do browser fechado: o browser fecha junto
+        await shared_pool.close("c3")
+        assert second.closed and shared_pool.browsers == [first]
+    
+    async def test_warm_refill_and_new_connections_respect_per_browser_cap(self, shared_pool):
+        shared_pool.warm_pool_size = 2
+        
+        await asyncio.gather(
+            shared_pool.fill_warm_pool(),
+            shared_pool.get_or_create("c1"),
+            shared_pool.get_or_create("c2"),
+        )
+        
+        if shared_pool._refill_task:
+            await shared_pool._refill_task
+        
+        launched = shared_pool.playwright.chromium.launched
+        assert len(shared_pool.warm) == 2
+        assert [len(b.contexts) for b in launched] == [2, 2]
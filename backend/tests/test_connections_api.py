@@ -0,0 +1,110 @@
+"""
+Testes para PATCH /api/v1/connections/{id}: null explícito nunca chega ao banco.
+"""
+import uuid
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api import whatsapp_connections
+from api.deps import get_current_user
+from core.database import get_db
+from models.whatsapp_connection import WhatsAppConnection
+
+OWNER = uuid.uuid4()
+
+
+class FakeResult:
+    def __init__(self, connection):
+        self.connection = connection
+    
+    def scalar_one_or_none(self):
+        return self.connection
+
+
+class FakeSession:
+    def __init__(self, connection):
+        self.connection = connection
+        self.commits = 0
+    
+    async def execute(self, statement):
+        return FakeResult(self.connection)
+    
+    async def commit(self):
+        self.commits += 1
+    
+    async def refresh(self, obj):
+        pass
+
+
+@pytest.fixture
+def connection():
+    now = datetime.utcnow()
+    return WhatsAppConnection(
+        id=uuid.uuid4(),
+        user_id=OWNER,
+        nickname="Promoções",
+        status="connected",
+        source_groups=[{"name": "Fonte"}],
+        destination_groups=[{"name": "Destino"}],
+        min_interval_per_group=360,
+        min_interval_global=30,
+        max_messages_per_day=1000,
+        input_mode="paste",
+        plan_name="trial",
+        max_source_groups=5,
+        max_destination_groups=10,
+        messages_sent_today=0,
+        created_at=now,
+        updated_at=now
+    )
+
+
+@pytest.fixture
+def client(connection):
+    session = FakeSession(connection)
+    app = FastAPI()
+    app.include_router(whatsapp_connections.router)
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id=OWNER)
+    app.dependency_overrides[get_db] = lambda: session
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def test_update_sets_given_fields(client, connection):
+    response = client.patch(f"/api/v1/connections/{connection.id}", json={
+        "input_mode": "chunk",
+        "destination_groups": [{"name": "Outro destino"}]
+    })
+    
+    assert response.status_code == 200
+    assert response.json()["input_mode"] == "chunk"
+    assert connection.destination_groups == [{"name": "Outro destino"}]
+
+
+def test_explicit_null_leaves_field_unchanged(client, connection):
+    response = client.patch(f"/api/v1/connections/{connection.id}", json={
+        "input_mode": None,
+        "nickname": None,
+        "source_groups": None,
+        "max_messages_per_day": 200
+    })
+    
+    assert response.status_code == 200
+    assert connection.input_mode == "paste"
+    assert connection.nickname == "Promoções"
+    assert connection.source_groups == [{"name": "Fonte"}]
+    assert connection.max_messages_per_day == 200
+    
+    # Leituras seguintes continuam validando
+    assert client.get(f"/api/v1/connections/{connection.id}").json()["input_mode"] == "paste"
+
+
+def test_invalid_input_mode_is_rejected(client, connection):
+    response = client.patch(f"/api/v1/connections/{connection.id}", json={"input_mode": "turbo"})
+    
+    assert response.status_code == 422
+    assert connection.input_mode == "paste"
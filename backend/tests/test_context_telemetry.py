@@ -0,0 +1,176 @@
+"""
+Testes para a telemetria por context, com uma árvore /proc falsa.
+"""
+from types import SimpleNamespace
+
+import pytest
+
+from services.whatsapp import context_telemetry
+from services.whatsapp.context_telemetry import CLOCK_TICKS, ContextTelemetry, find_browser_pid
+
+
+class FakeProc:
+    """Monta /proc/<pid>/{cmdline,status,stat,task/<pid>/children} num diretório temporário."""
+    
+    def __init__(self, root):
+        self.root = root
+    
+    def add(self, pid, args, rss_kb=0, cpu_ticks=0, children=()):
+        proc = self.root / str(pid)
+        (proc / "task" / str(pid)).mkdir(parents=True, exist_ok=True)
+        (proc / "cmdline").write_bytes(b"\0".join(a.encode() for a in args) + b"\0")
+        (proc / "status").write_text(f"Name:\tchrome\nVmRSS:\t{rss_kb} kB\n")
+        (proc / "stat").write_text(f"{pid} (chrome) S 1 " + "0 " * 9 + f"{cpu_ticks} {cpu_ticks} 0 0\n")
+        (proc / "task" / str(pid) / "children").write_text(" ".join(map(str, children)))
+    
+    def browser(self, pid, user_data_dir, renderer_pid, rss_kb=1024):
+        self.add(pid, ["chrome", f"--user-data-dir={user_data_dir}"], rss_kb, 100, [renderer_pid])
+        self.add(renderer_pid, ["chrome", "--type=renderer", f"--user-data-dir={user_data_dir}"], rss_kb, 100)
+    
+    def kill(self, pid):
+        for path in sorted((self.root / str(pid)).rglob("*"), reverse=True):
+            path.unlink() if path.is_file() else path.rmdir()
+        (self.root / str(pid)).rmdir()
+
+
+@pytest.fixture
+def proc(tmp_path, monkeypatch):
+    root = tmp_path / "proc"
+    root.mkdir()
+    monkeypatch.setattr(context_telemetry, "PROC_ROOT", str(root))
+    return FakeProc(root)
+
+
+@pytest.fixture
+def sessions(tmp_path):
+    sessions = tmp_path / "sessions"
+    for cid in ("c1", "c2"):
+        (sessions / cid).mkdir(parents=True)
+    return sessions
+
+
+@pytest.fixture
+def scans(monkeypatch):
+    calls = []
+    original = context_telemetry.browser_pids
+    
+    def counting():
+        calls.append(1)
+        return original()
+    
+    monkeypatch.setattr(context_telemetry, "browser_pids", counting)
+    return calls
+
+
+def persistent_pool(sessions, *connection_ids):
+    return SimpleNamespace(mode="persistent", sessions_dir=str(sessions), contexts=dict.fromkeys(connection_ids))
+
+
+class FakeCDP:
+    async def send(self, method):
+        if method == "Performance.getMetrics":
+            return {"metrics": [
+                {"name": "JSHeapTotalSize", "value": 300 * 1024 * 1024},
+                {"name": "TaskDuration", "value": 1.5},
+            ]}
+    
+    async def detach(self):
+        pass
+
+
+class FakeSharedContext:
+    pages = ["page"]
+    
+    async def new_cdp_session(self, page):
+        return FakeCDP()
+
+
+class TestFindBrowserPid:
+    
+    def test_only_the_main_process_of_that_profile(self, proc, sessions):
+        proc.browser(100, sessions / "c1", 101)
+        proc.browser(200, sessions / "c2", 201)
+        
+        assert find_browser_pid(str(sessions / "c1")) == 100
+        assert find_browser_pid(str(sessions / "c2")) == 200
+        assert find_browser_pid(str(sessions / "c3")) is None
+    
+    def test_symlinked_profile_matches_its_target(self, proc, sessions):
+        (sessions / "_warm").mkdir()
+        (sessions / "_warm" / "abc").mkdir()
+        (sessions / "c3").symlink_to("_warm/abc")
+        proc.browser(300, sessions / "_warm" / "abc", 301)
+        
+        assert find_browser_pid(str(sessions / "c3")) == 300
+
+
+@pytest.mark.asyncio
+class TestPersistentSampling:
+    
+    async def test_sums_the_process_tree(self, proc, sessions):
+        proc.browser(100, sessions / "c1", 101, rss_kb=2048)
+        
+        samples = await ContextTelemetry(persistent_pool(sessions, "c1")).sample()
+        
+        sample = samples["c1"]
+        assert (sample["source"], sample["pid"], sample["processes"]) == ("process_tree", 100, 2)
+        assert sample["memory_mb"] == 4.0
+        assert sample["cpu_seconds"] == round(4 * 100 / CLOCK_TICKS, 2)
+        assert sample["cpu_percent"] is None
+    
+    async def test_proc_is_scanned_once_per_tick_and_then_cached(self, proc, sessions, scans):
+        proc.browser(100, sessions / "c1", 101)
+        proc.browser(200, sessions / "c2", 201)
+        telemetry = ContextTelemetry(persistent_pool(sessions, "c1", "c2"))
+        
+        await telemetry.sample()
+        assert len(scans) == 1
+        
+        samples = await telemetry.sample()
+        assert len(scans) == 1
+        assert {cid: s["pid"] for cid, s in samples.items()} == {"c1": 100, "c2": 200}
+    
+    async def test_restarted_browser_is_found_again(self, proc, sessions, scans):
+        proc.browser(100, sessions / "c1", 101)
+        telemetry = ContextTelemetry(persistent_pool(sessions, "c1"))
+        await telemetry.sample()
+        
+        # Context reciclado: browser novo, pid antigo reusado por outro programa
+        proc.kill(101)
+        proc.add(100, ["python", "worker.py"])
+        proc.browser(150, sessions / "c1", 151)
+        
+        samples = await telemetry.sample()
+        
+        assert samples["c1"]["pid"] == 150
+        assert len(scans) == 2
+    
+    async def test_connection_without_browser_is_skipped(self, proc, sessions):
+        samples = await ContextTelemetry(persistent_pool(sessions, "c1")).sample()
+        
+        assert samples == {}
+
+
+@pytest.mark.asyncio
+class TestBudgets:
+    
+    async def test_shared_sample_reports_js_heap(self):
+        pool = SimpleNamespace(mode="shared", contexts={"c1": FakeSharedContext()})
+        
+        samples = await ContextTelemetry(pool).sample()
+        
+        assert samples["c1"]["source"] == "js_heap"
+        assert samples["c1"]["heap_mb"] == 300.0
+        assert "memory_mb" not in samples["c1"]
+    
+    async def test_each_source_is_checked_against_its_own_budget(self):
+        telemetry = ContextTelemetry(pool=None)
+        telemetry.samples = {
+            "persistent": {"source": "process_tree", "memory_mb": 900.0},
+            "shared": {"source": "js_heap", "heap_mb": 300.0},
+        }
+        
+        assert telemetry.over_budget(800) == ["persistent"]
+        assert telemetry.over_budget(800, heap_budget_mb=200) == ["persistent", "shared"]
+        assert telemetry.over_budget(0, heap_budget_mb=200) == ["shared"]
+        assert telemetry.over_budget(0) == []
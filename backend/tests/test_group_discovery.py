@@ -0,0 +1,70 @@
+"""
+Testes para a descoberta de grupos.
+
+Simula a lista virtualizada do WhatsApp Web (só uma janela de linhas por vez).
+"""
+import pytest
+
+from services.whatsapp.group_discovery import STABLE_STEPS, SCROLL_STEP_JS, collect_groups
+
+
+class FakeChatList:
+    """Lista virtualizada: cada passo mostra `window` linhas e rola uma tela."""
+    
+    def __init__(self, names, window=3):
+        self.names = names
+        self.window = window
+        self.position = 0
+        self.steps = 0
+    
+    async def evaluate(self, script):
+        if script != SCROLL_STEP_JS:
+            self.position = 0
+            return None
+        
+        self.steps += 1
+        visible = self.names[self.position:self.position + self.window]
+        before = self.position
+        self.position = min(self.position + self.window, max(len(self.names) - self.window, 0))
+        return {
+            "rows": [{"display_name": n, "preview": f"msg {n}"} for n in visible],
+            "moved": self.position != before,
+        }
+
+
+class FakePage:
+    def __init__(self):
+        self.waits = 0
+    
+    async def wait_for_timeout(self, ms):
+        self.waits += 1
+
+
+@pytest.mark.asyncio
+class TestCollectGroups:
+    """Testes de rolagem até estabilizar."""
+    
+    async def test_accumulates_rows_across_scroll_steps(self):
+        names = [f"Grupo {i}" for i in range(10)]
+        chat_list = FakeChatList(names)
+        
+        groups = await collect_groups(FakePage(), chat_list)
+        
+        assert list(groups) == names
+        assert groups["Grupo 0"] == "msg Grupo 0"
+    
+    async def test_stops_when_list_stops_growing(self):
+        chat_list = FakeChatList([f"Grupo {i}" for i in range(10)], window=5)
+        page = FakePage()
+        
+        await collect_groups(page, chat_list)
+        
+        # 1 passo rolando, 1 no fim com grupos novos, depois STABLE_STEPS parados
+        assert chat_list.steps == 2 + STABLE_STEPS
+        assert page.waits == STABLE_STEPS - 1
+    
+    async def test_zero_steps_returns_empty(self):
+        chat_list = FakeChatList(["Grupo 0"])
+        
+        assert await collect_groups(FakePage(), chat_list, max_steps=0) == {}
+        assert chat_list.steps == 0
@@ -0,0 +1,50 @@
+"""
+Testes para a detecção de preview de link.
+
+Testa a espera pelo nó de preview com deadline (sem dormir tempo fixo).
+"""
+import asyncio
+
+import pytest
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+from services.whatsapp.link_preview import has_link, wait_for_link_preview
+
+
+class FakePage:
+    """Página mínima: o preview aparece após `appears_after` segundos (None = nunca)."""
+    
+    def __init__(self, appears_after=None):
+        self.appears_after = appears_after
+    
+    async def wait_for_selector(self, selector, state=None, timeout=None):
+        if self.appears_after is None or self.appears_after * 1000 > timeout:
+            await asyncio.sleep(timeout / 1000)
+            raise PlaywrightTimeoutError(f"Timeout {timeout}ms exceeded")
+        await asyncio.sleep(self.appears_after)
+
+
+def test_has_link():
+    assert has_link("Oferta https://amzn.to/abc")
+    assert has_link("HTTP://exemplo.com")
+    assert not has_link("Sem link aqui")
+    assert not has_link("")
+
+
+@pytest.mark.asyncio
+class TestWaitForLinkPreview:
+    """Testes da espera pelo preview."""
+    
+    async def test_returns_as_soon_as_preview_appears(self):
+        """Preview rápido não deve pagar o deadline inteiro."""
+        result = await wait_for_link_preview(FakePage(appears_after=0.05), timeout=2.0)
+        
+        assert result["preview_generated"] is True
+        assert result["preview_ms"] < 1000
+    
+    async def test_reports_missing_preview_at_deadline(self):
+        """Preview que não aparece é reportado como não gerado."""
+        result = await wait_for_link_preview(FakePage(), timeout=0.1)
+        
+        assert result["preview_generated"] is False
+        assert result["preview_ms"] >= 100
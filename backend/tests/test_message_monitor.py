@@ -0,0 +1,120 @@
+"""
+Testes para a gravação em lote do MessageMonitor.
+
+O flush usa sessões próprias (session_factory), nunca a sessão do monitor.
+"""
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from services.whatsapp import message_monitor
+from services.whatsapp.gateway import WhatsAppMessage
+from services.whatsapp.message_monitor import MAX_FLUSH_ATTEMPTS, MessageMonitor
+
+
+class ForbiddenSession:
+    """Sessão do monitor: o flush não pode tocá-la."""
+    
+    def __getattr__(self, name):
+        raise AssertionError(f"flush used the monitor session ({name})")
+
+
+class FakeSession:
+    def __init__(self, factory):
+        self.factory = factory
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc):
+        self.factory.closed += 1
+        return False
+    
+    async def execute(self, statement):
+        if self.factory.fail:
+            raise RuntimeError("insert failed")
+        self.factory.statements.append(statement)
+    
+    async def commit(self):
+        self.factory.commits += 1
+
+
+class FakeSessionFactory:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.statements = []
+        self.commits = 0
+        self.closed = 0
+    
+    def __call__(self):
+        return FakeSession(self)
+
+
+def message(n):
+    return WhatsAppMessage(id=f"m{n}", group_id="Grupo", sender="x", text=f"oferta {n}", timestamp=n)
+
+
+def inserted(statement):
+    compiled = statement.compile(dialect=postgresql.dialect())
+    return [v for k, v in compiled.params.items() if k.startswith("message_id")]
+
+
+@pytest.fixture
+def monitor():
+    # flush_interval alto: os testes chamam flush() na mão
+    return MessageMonitor(ForbiddenSession(), flush_interval=3600, session_factory=FakeSessionFactory())
+
+
+@pytest.mark.asyncio
+class TestMessageMonitorFlush:
+    
+    async def test_batches_pending_rows_in_one_insert(self, monitor):
+        for n in range(3):
+            await monitor._mark_processed("c1", "Grupo", message(n))
+        
+        assert await monitor.flush() == 3
+        
+        factory = monitor.session_factory
+        assert len(factory.statements) == 1
+        assert sorted(inserted(factory.statements[0])) == ["m0", "m1", "m2"]
+        assert factory.commits == 1 and factory.closed == 1
+        assert monitor._pending == [] and monitor._pending_keys == set()
+        await monitor.close()
+    
+    async def test_conflicting_rows_are_ignored_by_the_database(self, monitor):
+        await monitor._mark_processed("c1", "Grupo", message(1))
+        await monitor.flush()
+        
+        sql = str(monitor.session_factory.statements[0].compile(dialect=postgresql.dialect()))
+        assert "ON CONFLICT ON CONSTRAINT uq_message_per_connection DO NOTHING" in sql
+        await monitor.close()
+    
+    async def test_pending_row_counts_as_processed(self, monitor):
+        await monitor._mark_processed("c1", "Grupo", message(1))
+        monitor.cache.clear()
+        
+        # Buffer ainda não gravado: não consulta o DB (ForbiddenSession)
+        assert await monitor._is_new_message("c1", "Grupo", message(1)) is False
+        await monitor.close()
+    
+    async def test_failed_batch_is_retried_then_dropped(self, monitor, caplog):
+        factory = FakeSessionFactory(fail=True)
+        monitor.session_factory = factory
+        await monitor._mark_processed("c1", "Grupo", message(1))
+        
+        for _ in range(MAX_FLUSH_ATTEMPTS - 1):
+            assert await monitor.flush() == 0
+            assert len(monitor._pending) == 1
+        
+        assert await monitor.flush() == 0
+        assert monitor._pending == [] and monitor._pending_keys == set()
+        assert "Dropped 1 message log(s)" in caplog.text
+        
+        # Depois do descarte o buffer volta a andar
+        factory.fail = False
+        await monitor._mark_processed("c1", "Grupo", message(2))
+        assert await monitor.flush() == 1
+        assert inserted(factory.statements[0]) == ["m2"]
+        await monitor.close()
+    
+    async def test_default_factory_is_the_app_session_factory(self):
+        assert MessageMonitor(ForbiddenSession()).session_factory is message_monitor.AsyncSessionLocal
@@ -0,0 +1,34 @@
+"""
+Testes para os helpers compartilhados de métricas Prometheus.
+"""
+import pytest
+
+from core.metrics import PLAYWRIGHT_OP_SECONDS, render_latest, track_duration
+
+
+def _count(kind: str) -> float:
+    for metric in PLAYWRIGHT_OP_SECONDS.collect():
+        for sample in metric.samples:
+            if sample.name.endswith("_count") and sample.labels.get("kind") == kind:
+                return sample.value
+    return 0.0
+
+
+def test_track_duration_observes_even_on_error():
+    before = _count("test_op")
+    
+    with track_duration(PLAYWRIGHT_OP_SECONDS, kind="test_op"):
+        pass
+    with pytest.raises(RuntimeError):
+        with track_duration(PLAYWRIGHT_OP_SECONDS, kind="test_op"):
+            raise RuntimeError("selector gone")
+    
+    assert _count("test_op") == before + 2
+
+
+def test_render_latest_exposes_metrics():
+    payload, content_type = render_latest()
+    
+    assert content_type.startswith("text/plain")
+    assert b"autopromo_worker_cycle_seconds" in payload
+    assert b"autopromo_ingestion_messages_total" in payload
@@ -0,0 +1,81 @@
+"""
+Testes para o OfferCoalescer.
+
+Testa a janela de agrupamento por produto e as políticas best_price / first.
+"""
+import pytest
+
+from services.whatsapp.offer_coalescer import OfferCoalescer, product_key
+from services.whatsapp.queue_manager import QueueManager
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture
+def redis_conn():
+    return fakeredis.aioredis.FakeRedis(decode_responses=True)
+
+
+def test_product_key_from_monetized_link():
+    text = "Fone por R$ 99,90 https://www.amazon.com.br/dp/B08XYZ1234?tag=meutag-20"
+    
+    assert product_key(text) == "AMZN-B08XYZ1234"
+    assert product_key("Sem link de produto") is None
+
+
+@pytest.mark.asyncio
+class TestOfferCoalescer:
+    """Testes de agrupamento por (conexão, destino, produto)."""
+    
+    async def test_first_policy_keeps_first_arrival(self, redis_conn):
+        coalescer = OfferCoalescer(redis_conn, policy="first")
+        
+        assert await coalescer.admit("c1", "Destino", "AMZN-1", "grupo A", 9990) == ("new", None)
+        assert await coalescer.admit("c1", "Destino", "AMZN-1", "grupo B", 5000) == ("drop", None)
+        # Outro destino / outra conexão não são afetados
+        assert await coalescer.admit("c1", "Outro", "AMZN-1", "grupo B", 5000) == ("new", None)
+        assert await coalescer.admit("c2", "Destino", "AMZN-1", "grupo B", 5000) == ("new", None)
+    
+    async def test_best_price_replaces_queued_copy(self, redis_conn):
+        coalescer = OfferCoalescer(redis_conn, policy="best_price")
+        queue = QueueManager(redis_conn)
+        
+        await coalescer.admit("c1", "Destino", "AMZN-1", "R$ 99,90", 9990)
+        await queue.add("c1", "Destino", "primeira na fila")
+        await queue.add("c1", "Destino", "R$ 99,90", value=9990, product_key="AMZN-1")
+        
+        decision, previous = await coalescer.admit("c1", "Destino", "AMZN-1", "R$ 79,90", 7990)
+        assert (decision, previous) == ("replace", "R$ 99,90")
+        assert await queue.replace("c1", "Destino", "AMZN-1", "R$ 79,90", value=7990) == "replaced"
+        
+        assert await coalescer.admit("c1", "Destino", "AMZN-1", "R$ 89,90", 8990) == ("drop", None)
+        
+        assert (await queue.pop("c1", "Destino")).text == "primeira na fila"
+        assert (await queue.pop("c1", "Destino")).text == "R$ 79,90"
+        assert await coalescer.get_stats("c1") == {"new": 1, "replace": 1, "drop": 1}
+    
+    async def test_without_product_or_window_everything_is_new(self, redis_conn):
+        coalescer = OfferCoalescer(redis_conn, window_seconds=0)
+        
+        assert await coalescer.admit("c1", "Destino", "AMZN-1", "a") == ("new", None)
+        assert await coalescer.admit("c1", "Destino", "AMZN-1", "b") == ("new", None)
+        assert await OfferCoalescer(redis_conn).admit("c1", "Destino", None, "c") == ("new", None)
+    
+    async def test_window_expires(self, redis_conn):
+        coalescer = OfferCoalescer(redis_conn, window_seconds=60)
+        await coalescer.admit("c1", "Destino", "AMZN-1", "a")
+        
+        assert 0 < await redis_conn.ttl("coalesce:whatsapp:c1:Destino:AMZN-1") <= 60
+    
+    async def test_replace_matches_product_not_text(self, redis_conn):
+        queue = QueueManager(redis_conn)
+        # Mesmo texto, produtos diferentes (ex: link trocado pela monetização)
+        await queue.add("c1", "Destino", "Oferta do dia", product_key="AMZN-1")
+        await queue.add("c1", "Destino", "Oferta do dia", product_key="AMZN-2")
+        
+        assert await queue.replace("c1", "Destino", "AMZN-2", "R$ 79,90") == "replaced"
+        assert await queue.replace("c1", "Destino", "AMZN-3", "R$ 79,90") == "missing"
+        
+        first, second = await queue.pop("c1", "Destino"), await queue.pop("c1", "Destino")
+        assert (first.text, first.product_key) == ("Oferta do dia", "AMZN-1")
+        assert (second.text, second.product_key) == ("R$ 79,90", "AMZN-2")
@@ -0,0 +1,62 @@
+"""
+Testes para o PollScheduler.
+
+Testa prioridade por atividade e a garantia de staleness máxima.
+"""
+from services.whatsapp.poll_scheduler import PollScheduler
+
+
+GROUPS = [f"Grupo {i}" for i in range(10)]
+
+
+def warm_up(scheduler, now=0.0):
+    """Primeira checagem de todos os grupos (nada encontrado)."""
+    for group_name in scheduler.due_groups("c1", GROUPS, now=now):
+        scheduler.observe("c1", group_name, 0, now=now)
+
+
+class TestPollScheduler:
+    """Testes de agendamento das checagens."""
+    
+    def test_new_groups_are_due_immediately(self):
+        scheduler = PollScheduler()
+        
+        assert scheduler.due_groups("c1", GROUPS, now=0) == GROUPS
+    
+    def test_without_history_keeps_base_interval(self):
+        scheduler = PollScheduler(base_interval=30)
+        warm_up(scheduler)
+        
+        assert scheduler.due_groups("c1", GROUPS, now=29) == []
+        assert scheduler.due_groups("c1", GROUPS, now=30) == GROUPS
+    
+    def test_busy_group_is_checked_more_often(self):
+        scheduler = PollScheduler(base_interval=30, max_staleness=300, min_interval=5)
+        warm_up(scheduler)
+        
+        # Grupo 0 recebe uma oferta a cada checagem
+        for now in range(5, 300, 5):
+            if "Grupo 0" in scheduler.due_groups("c1", GROUPS, now=now):
+                scheduler.observe("c1", "Grupo 0", 1, now=now)
+        
+        intervals = scheduler.intervals("c1", GROUPS)
+        assert intervals["Grupo 0"] == 5
+        assert intervals["Grupo 1"] == 300
+        # Mesmo orçamento: não checa mais vezes que todos a cada 30s
+        assert sum(1 / i for i in intervals.values()) <= len(GROUPS) / 30
+    
+    def test_quiet_group_never_exceeds_max_staleness(self):
+        scheduler = PollScheduler(base_interval=30, max_staleness=120)
+        warm_up(scheduler)
+        scheduler.observe("c1", "Grupo 0", 50, now=1)
+        
+        assert "Grupo 9" not in scheduler.due_groups("c1", GROUPS, now=119)
+        assert "Grupo 9" in scheduler.due_groups("c1", GROUPS, now=120)
+    
+    def test_forget_drops_removed_groups(self):
+        scheduler = PollScheduler()
+        warm_up(scheduler)
+        
+        scheduler.forget("c1", keep=GROUPS[:2])
+        
+        assert set(scheduler.get_stats("c1")) == set(GROUPS[:2])
@@ -0,0 +1,62 @@
+"""
+Testes para o profiler de amostragem sob demanda (pilhas collapsed + dump das tasks).
+"""
+import asyncio
+import time
+
+import pytest
+
+from core import profiler
+
+
+def spin(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+async def hot_loop(stop):
+    # Trava o event loop em fatias, como um loop de parsing descontrolado faria
+    while not stop.is_set():
+        spin(0.02)
+        await asyncio.sleep(0)
+
+
+async def idle_waiter(event):
+    await event.wait()
+
+
+@pytest.mark.asyncio
+class TestProfiler:
+    """Testes da janela de profiling."""
+    
+    async def test_profile_writes_collapsed_stacks_and_task_dump(self, tmp_path):
+        stop = asyncio.Event()
+        hot = asyncio.create_task(hot_loop(stop), name="hot")
+        idle = asyncio.create_task(idle_waiter(stop), name="idle")
+        
+        result = await profiler.profile(0.3, "test", output_dir=str(tmp_path), interval=0.002)
+        stop.set()
+        await asyncio.gather(hot, idle)
+        
+        assert result["samples"] > 0
+        lines = (tmp_path / result["profile"].split("/")[-1]).read_text().splitlines()
+        stack, count = lines[0].rsplit(" ", 1)
+        assert int(count) > 0
+        assert any(line.startswith("task:hot;") and "spin (tests/test_profiler.py" in line for line in lines)
+        
+        dump = open(result["tasks"]).read()
+        assert "Task 'idle' (idle_waiter) pending" in dump
+        assert "in idle_waiter" in dump
+        assert "waiting on <Future pending" in dump
+    
+    async def test_one_window_at_a_time(self, tmp_path):
+        first = profiler.start_profile(0.05, "test", output_dir=str(tmp_path))
+        assert first is not None
+        assert profiler.start_profile(0.05, "test", output_dir=str(tmp_path)) is None
+        
+        await first
+        second = profiler.start_profile(0.05, "test-2", output_dir=str(tmp_path))
+        assert second is not None
+        await second
+        assert len(list(tmp_path.glob("*.collapsed"))) == 2
@@ -0,0 +1,77 @@
+"""
+Testes para o QR Store.
+
+Testa publicação só quando o QR muda e o cooldown de regeneração.
+"""
+import json
+
+import pytest
+
+from services.whatsapp.connection_events import events_channel
+from services.whatsapp.qr_store import (
+    QR_TTL_SECONDS,
+    claim_regeneration,
+    clear_qr,
+    get_qr,
+    publish_qr,
+    qr_fingerprint,
+    touch_qr,
+)
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture
+def redis_conn():
+    return fakeredis.aioredis.FakeRedis(decode_responses=True)
+
+
+@pytest.mark.asyncio
+class TestQRStore:
+    """Testes de publicação e leitura do QR."""
+    
+    async def test_publishes_only_when_qr_changes(self, redis_conn):
+        first = qr_fingerprint("2@abc,def")
+        
+        assert await publish_qr(redis_conn, "c1", "QkFTRTY0", first) is True
+        assert await publish_qr(redis_conn, "c1", "QkFTRTY0", first) is False
+        assert await publish_qr(redis_conn, "c1", "TkVX", qr_fingerprint("2@xyz,def")) is True
+        
+        qr = await get_qr(redis_conn, "c1")
+        assert qr["qr_code"] == "TkVX"
+        assert 0 < await redis_conn.ttl("qr:whatsapp:c1") <= QR_TTL_SECONDS
+    
+    async def test_touch_refreshes_only_same_qr(self, redis_conn):
+        fingerprint = qr_fingerprint(b"png-bytes")
+        await publish_qr(redis_conn, "c1", "UE5H", fingerprint)
+        
+        assert await touch_qr(redis_conn, "c1", fingerprint) is True
+        assert await touch_qr(redis_conn, "c1", qr_fingerprint(b"other")) is False
+    
+    async def test_clear_and_missing(self, redis_conn):
+        await publish_qr(redis_conn, "c1", "UE5H", qr_fingerprint("ref"))
+        await clear_qr(redis_conn, "c1")
+        
+        assert await get_qr(redis_conn, "c1") is None
+    
+    async def test_regeneration_cooldown(self, redis_conn):
+        assert await claim_regeneration(redis_conn, "c1") is True
+        assert await claim_regeneration(redis_conn, "c1") is False
+        assert await claim_regeneration(redis_conn, "c2") is True
+    
+    async def test_new_frame_is_pushed_to_event_stream(self, redis_conn):
+        pubsub = redis_conn.pubsub()
+        await pubsub.subscribe(events_channel("c1"))
+        await pubsub.get_message(timeout=1.0)  # confirmação do subscribe
+        
+        fingerprint = qr_fingerprint("2@abc,def")
+        await publish_qr(redis_conn, "c1", "QkFTRTY0", fingerprint)
+        await publish_qr(redis_conn, "c1", "QkFTRTY0", fingerprint)
+        
+        message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+        assert json.loads(message["data"]) == {
+            "type": "qr", "qr_code": "QkFTRTY0", "hash": fingerprint
+        }
+        # Frame repetido não gera evento
+        assert await pubsub.get_message(ignore_subscribe_messages=True, timeout=0.2) is None
+        await pubsub.aclose()
@@ -0,0 +1,93 @@
+"""
+Testes para admissão na fila e cota diária do QueueManager.
+
+Testa as políticas de overflow e a virada de dia da cota no fuso configurado.
+"""
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from services.whatsapp import queue_manager
+from services.whatsapp.queue_manager import QueueManager
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture
+def redis_conn():
+    return fakeredis.aioredis.FakeRedis(decode_responses=True)
+
+
+async def texts(manager, group="Grupo"):
+    items = await manager.redis.lrange(f"queue:whatsapp:c1:{group}", 0, -1)
+    return [item.split('"text": "')[1].split('"')[0] for item in items]
+
+
+@pytest.mark.asyncio
+class TestQueueAdmission:
+    """Testes de fila limitada."""
+    
+    async def test_unbounded_by_default(self, redis_conn):
+        manager = QueueManager(redis_conn)
+        
+        for i in range(5):
+            assert await manager.add("c1", "Grupo", f"oferta {i}") == "queued"
+        
+        assert await manager.get_queue_size("c1", "Grupo") == 5
+    
+    async def test_drop_oldest(self, redis_conn):
+        manager = QueueManager(redis_conn, max_queue_size=2, overflow_policy="drop_oldest")
+        
+        for i in range(3):
+            await manager.add("c1", "Grupo", f"oferta {i}")
+        
+        assert await texts(manager) == ["oferta 1", "oferta 2"]
+        assert await manager.get_admission_stats("c1") == {"queued": 2, "dropped": 1}
+    
+    async def test_drop_lowest_evicts_cheapest_or_rejects_new(self, redis_conn):
+        manager = QueueManager(redis_conn, max_queue_size=2, overflow_policy="drop_lowest")
+        await manager.add("c1", "Grupo", "cara", value=50000)
+        await manager.add("c1", "Grupo", "barata", value=1990)
+        
+        assert await manager.add("c1", "Grupo", "media", value=9990) == "dropped"
+        assert await texts(manager) == ["cara", "media"]
+        
+        assert await manager.add("c1", "Grupo", "baratissima", value=500) == "rejected"
+        assert await texts(manager) == ["cara", "media"]
+    
+    async def test_reject(self, redis_conn):
+        manager = QueueManager(redis_conn, max_queue_size=1, overflow_policy="reject")
+        await manager.add("c1", "Grupo", "primeira")
+        
+        assert await manager.add("c1", "Grupo", "segunda") == "rejected"
+        assert await texts(manager) == ["primeira"]
+    
+    async def test_invalid_policy(self, redis_conn):
+        with pytest.raises(ValueError):
+            QueueManager(redis_conn, overflow_policy="drop_random")
+
+
+@pytest.mark.asyncio
+class TestDailyQuota:
+    """Testes da cota diária."""
+    
+    async def test_quota_resets_at_local_midnight(self, redis_conn, monkeypatch):
+        tz = ZoneInfo("America/Sao_Paulo")
+        manager = QueueManager(redis_conn, quota_timezone="America/Sao_Paulo")
+        
+        # 23:30 de amanhã em São Paulo (02:30 UTC do dia seguinte)
+        tomorrow = datetime.now(tz).date() + timedelta(days=1)
+        late = datetime.combine(tomorrow, datetime.min.time(), tzinfo=tz) + timedelta(hours=23, minutes=30)
+        monkeypatch.setattr(queue_manager.time, "time", lambda: late.timestamp())
+        
+        await manager.mark_sent("c1", "Grupo")
+        assert await manager.mark_sent("c1", "Grupo") == 2
+        
+        assert await manager.get_sent_today("c1") == 2
+        assert await manager.get_quota_wait("c1", 2) == pytest.approx(1800)
+        assert await manager.get_quota_wait("c1", 3) == 0
+        assert await manager.get_quota_wait("c1", None) == 0
+        
+        after_midnight = late + timedelta(minutes=35)
+        assert await manager.get_sent_today("c1", after_midnight.timestamp()) == 0
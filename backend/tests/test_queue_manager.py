@@ -0,0 +1,183 @@
+"""
+Testes para a persistência do QueueManager no Redis.
+
+Testa fila FIFO por (conexão, grupo), índice de prontos, lease de envio,
+cota diária no fuso configurado e limpeza de mensagens antigas.
+"""
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from services.whatsapp import queue_manager
+from services.whatsapp.queue_manager import READY_INDEX_KEY, QueueManager, QueuedMessage
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture
+def redis_conn():
+    return fakeredis.aioredis.FakeRedis(decode_responses=True)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_700_000_000.0]
+    monkeypatch.setattr(queue_manager.time, "time", lambda: now[0])
+    return now
+
+
+@pytest.mark.asyncio
+class TestQueuePersistence:
+    """Testes de fila, índice de prontos e lease."""
+    
+    async def test_fifo_per_connection_and_group(self, redis_conn):
+        manager = QueueManager(redis_conn)
+        await manager.add("c1", "Grupo", "primeira")
+        await manager.add("c1", "Grupo", "segunda")
+        await manager.add("c2", "Grupo", "outra conexão")
+        
+        assert (await manager.get_next("c1", "Grupo")).text == "primeira"
+        assert (await manager.pop("c1", "Grupo")).text == "primeira"
+        assert (await manager.pop("c1", "Grupo")).text == "segunda"
+        assert await manager.pop("c1", "Grupo") is None
+        
+        assert await manager.get_queue_size("c2", "Grupo") == 1
+        assert await manager.get_depth_by_connection() == {"c2": 1}
+        assert await manager.get_total_queued() == 1
+    
+    async def test_messages_survive_a_new_manager(self, redis_conn):
+        await QueueManager(redis_conn).add("c1", "Grupo", "antes do restart", value=1990)
+        
+        msg = await QueueManager(redis_conn).get_next("c1", "Grupo")
+        assert isinstance(msg, QueuedMessage)
+        assert (msg.connection_id, msg.group_name, msg.text, msg.value) == ("c1", "Grupo", "antes do restart", 1990)
+    
+    async def test_ready_index_follows_group_rate_limit(self, redis_conn, clock):
+        manager = QueueManager(redis_conn)
+        start = clock[0]
+        
+        await manager.add("c1", "Grupo", "primeira", min_interval_per_group=360)
+        assert await manager.get_scheduled() == [("c1", "Grupo", start)]
+        assert await manager.get_ready() == [("c1", "Grupo")]
+        
+        # Depois de um envio o grupo só volta a ficar pronto após o intervalo
+        await manager.add("c1", "Grupo", "segunda", min_interval_per_group=360)
+        await manager.pop("c1", "Grupo")
+        await manager.mark_sent("c1", "Grupo", min_interval_per_group=360)
+        assert await manager.get_ready() == []
+        assert await manager.get_ready(now=start + 360) == [("c1", "Grupo")]
+        
+        # Fila esvaziada sai do índice
+        await manager.pop("c1", "Grupo")
+        assert await manager.get_scheduled() == []
+    
+    async def test_add_after_recent_send_waits_for_group_interval(self, redis_conn, clock):
+        manager = QueueManager(redis_conn)
+        await manager.mark_sent("c1", "Grupo")
+        
+        await manager.add("c1", "Grupo", "nova", min_interval_per_group=360)
+        
+        assert await manager.get_scheduled() == [("c1", "Grupo", clock[0] + 360)]
+        assert await manager.get_time_until_next_send("c1", "Grupo", 360, 30) == 360
+        assert await manager.can_send("c1", "Outro", 360, 30) is False  # intervalo global
+        clock[0] += 30
+        assert await manager.can_send("c1", "Outro", 360, 30) is True
+    
+    async def test_lease_is_exclusive_and_released_only_by_owner(self, redis_conn):
+        first = QueueManager(redis_conn)
+        second = QueueManager(redis_conn)
+        
+        assert await first.claim_connection("c1") is True
+        assert await second.claim_connection("c1") is False
+        
+        await second.release_connection("c1")
+        assert await second.claim_connection("c1") is False
+        
+        await first.release_connection("c1")
+        assert await second.claim_connection("c1") is True
+        assert 0 < await redis_conn.ttl("lock:whatsapp:send:c1") <= 120
+
+
+@pytest.mark.asyncio
+class TestQuotaRollover:
+    """Testes da virada de dia da cota."""
+    
+    async def test_counter_key_changes_at_local_midnight(self, redis_conn, clock):
+        tz = ZoneInfo("America/Sao_Paulo")
+        manager = QueueManager(redis_conn, quota_timezone="America/Sao_Paulo")
+        # Datas futuras: o TTL do contador é absoluto (EXPIREAT)
+        tomorrow = datetime.now(tz).date() + timedelta(days=1)
+        midnight = datetime.combine(tomorrow, datetime.min.time(), tzinfo=tz)
+        before, after = (tomorrow - timedelta(days=1)).isoformat(), tomorrow.isoformat()
+        
+        clock[0] = (midnight - timedelta(seconds=1)).timestamp()
+        assert await manager.mark_sent("c1", "Grupo") == 1
+        assert await manager.mark_sent("c1", "Grupo") == 2
+        
+        clock[0] = midnight.timestamp()
+        assert await manager.mark_sent("c1", "Grupo") == 1
+        
+        assert await redis_conn.get(f"quota:whatsapp:c1:{before}") == "2"
+        assert await redis_conn.get(f"quota:whatsapp:c1:{after}") == "1"
+        # Contador do dia expira 24h depois da virada seguinte
+        expires_at = (midnight + timedelta(days=2)).timestamp()
+        assert await redis_conn.expiretime(f"quota:whatsapp:c1:{after}") == int(expires_at)
+    
+    async def test_invalid_timezone_falls_back_to_utc(self, redis_conn):
+        manager = QueueManager(redis_conn, quota_timezone="Mars/Olympus")
+        
+        day, reset_at = manager._quota_day(datetime(2026, 3, 9, 23, 59, tzinfo=ZoneInfo("UTC")).timestamp())
+        assert day == "2026-03-09"
+        assert reset_at == datetime(2026, 3, 10, tzinfo=ZoneInfo("UTC")).timestamp()
+
+
+@pytest.mark.asyncio
+class TestClearOldQueues:
+    """Testes da limpeza de mensagens antigas."""
+    
+    async def test_removes_only_expired_head(self, redis_conn, clock):
+        manager = QueueManager(redis_conn)
+        await manager.add("c1", "Grupo", "velha 1")
+        await manager.add("c1", "Grupo", "velha 2")
+        await manager.add("c1", "Vazio", "velha")
+        clock[0] += 20 * 3600
+        await manager.add("c1", "Grupo", "recente")
+        clock[0] += 5 * 3600
+        
+        await manager.clear_old_queues(max_age_hours=24)
+        
+        assert [group for _, group, _ in await manager.get_scheduled()] == ["Grupo"]
+        assert await manager.get_queue_size("c1", "Vazio") == 0
+        assert (await manager.pop("c1", "Grupo")).text == "recente"
+    
+    async def test_keeps_index_while_a_message_is_in_flight(self, redis_conn, clock):
+        manager = QueueManager(redis_conn)
+        await manager.add("c1", "Grupo", "sendo enviada")
+        await manager.add("c1", "Grupo", "velha")
+        await manager.take("c1", "Grupo")
+        clock[0] += 25 * 3600
+        
+        await manager.clear_old_queues(max_age_hours=24)
+        
+        assert await manager.get_queue_size("c1", "Grupo") == 0
+        assert await redis_conn.zscore(READY_INDEX_KEY, "c1|Grupo") is not None
+
+
+@pytest.mark.asyncio
+class TestPurge:
+    """Testes do descarte da fila de um grupo removido."""
+    
+    async def test_drops_queue_in_flight_and_index_entry(self, redis_conn):
+        manager = QueueManager(redis_conn)
+        await manager.add("c1", "Grupo", "enviando")
+        await manager.add("c1", "Grupo", "na fila")
+        await manager.add("c1", "Outro", "fica")
+        await manager.take("c1", "Grupo")
+        
+        assert await manager.purge("c1", "Grupo") == 2
+        
+        assert await manager.take("c1", "Grupo") is None
+        assert await redis_conn.zscore(READY_INDEX_KEY, "c1|Grupo") is None
+        assert [group for _, group, _ in await manager.get_scheduled()] == ["Outro"]
+        assert await manager.purge("c1", "Grupo") == 0
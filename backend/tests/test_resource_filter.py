@@ -0,0 +1,45 @@
+"""
+Testes para o ResourceFilter.
+
+Testa a decisão por perfil (monitor agressivo, send preserva o preview).
+"""
+from services.whatsapp.resource_filter import CANDIDATE_URL_PATTERN, ResourceFilter
+
+
+AVATAR_URL = "https://pps.whatsapp.net/v/t61/123_n.jpg?oh=abc"
+PREVIEW_THUMB_URL = "https://m.media-amazon.com/images/I/71abc.jpg"
+
+
+def test_monitor_profile_stubs_every_image():
+    resource_filter = ResourceFilter()
+    
+    assert resource_filter.profile == "monitor"
+    assert resource_filter.decide("image", AVATAR_URL) == "stub"
+    assert resource_filter.decide("image", PREVIEW_THUMB_URL) == "stub"
+
+
+def test_send_profile_keeps_preview_images():
+    resource_filter = ResourceFilter()
+    
+    with resource_filter.sending():
+        assert resource_filter.profile == "send"
+        assert resource_filter.decide("image", PREVIEW_THUMB_URL) == "continue"
+        assert resource_filter.decide("image", AVATAR_URL) == "stub"
+    
+    assert resource_filter.profile == "monitor"
+
+
+def test_media_and_fonts_always_aborted():
+    resource_filter = ResourceFilter()
+    
+    with resource_filter.sending():
+        assert resource_filter.decide("media", "https://mmg.whatsapp.net/v/video.mp4") == "abort"
+        assert resource_filter.decide("font", "https://static.whatsapp.net/font.woff2") == "abort"
+    
+    assert resource_filter.decide("script", "https://web.whatsapp.com/app.js") == "continue"
+
+
+def test_only_candidate_urls_are_intercepted():
+    assert CANDIDATE_URL_PATTERN.search(AVATAR_URL)
+    assert CANDIDATE_URL_PATTERN.search("https://static.whatsapp.net/rsrc/font.woff2")
+    assert not CANDIDATE_URL_PATTERN.search("https://web.whatsapp.com/app.b3f1.js")
@@ -0,0 +1,204 @@
+"""
+Testes para a mensagem em andamento do QueueManager (take / ack / requeue).
+
+A oferta sendo enviada sai da LIST da fila, então descartes por overflow e
+trocas do coalescer durante o envio não a alcançam.
+"""
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from models.whatsapp_connection import WhatsAppConnection
+from services.whatsapp.offer_coalescer import OfferCoalescer
+from services.whatsapp.queue_manager import READY_INDEX_KEY, QueueManager
+from workers import whatsapp_worker
+from workers.whatsapp_worker import WhatsAppWorker
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture
+def redis_conn():
+    return fakeredis.aioredis.FakeRedis(decode_responses=True)
+
+
+async def texts(manager, connection_id, group="Grupo"):
+    items = await manager.redis.lrange(f"queue:whatsapp:{connection_id}:{group}", 0, -1)
+    return [item.split('"text": "')[1].split('"')[0] for item in items]
+
+
+class FakeSession:
+    def __init__(self, conn):
+        self.conn = conn
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc):
+        return False
+    
+    async def get(self, model, ident):
+        return self.conn
+    
+    async def execute(self, statement):
+        return None
+    
+    def add(self, obj):
+        pass
+    
+    async def commit(self):
+        pass
+
+
+class OverflowingGateway:
+    """Enfileira mais ofertas durante o envio (rajada vinda do monitor)."""
+    
+    def __init__(self, manager, connection_id, incoming, status="sent"):
+        self.manager = manager
+        self.connection_id = connection_id
+        self.incoming = incoming
+        self.status = status
+        self.sent = []
+    
+    async def send_message(self, connection_id, group_name, text, wait_for_preview=True, input_mode="char"):
+        for offer in self.incoming:
+            await self.manager.add(connection_id, group_name, offer)
+        self.sent.append(text)
+        return {"status": self.status, "preview_generated": True, "duration_ms": 10}
+
+
+def build_worker(redis_conn, max_queue_size=2):
+    conn = WhatsAppConnection(
+        id=uuid.uuid4(),
+        user_id=uuid.uuid4(),
+        nickname="teste",
+        status="connected",
+        destination_groups=[{"name": "Grupo"}],
+        min_interval_per_group=0,
+        min_interval_global=0,
+        max_messages_per_day=0,
+        input_mode="paste"
+    )
+    worker = WhatsAppWorker()
+    worker.queue_manager = QueueManager(redis_conn, max_queue_size=max_queue_size, overflow_policy="drop_oldest")
+    worker.session_factory = lambda: FakeSession(conn)
+    worker.offer_coalescer = OfferCoalescer(redis_conn, policy="best_price")
+    return worker, conn
+
+
+def offer(price):
+    return SimpleNamespace(text=f"Fone por R$ {price} https://www.amazon.com.br/dp/B08XYZ1234?tag=t-20")
+
+
+@pytest.mark.asyncio
+class TestInFlight:
+    
+    async def test_take_ack(self, redis_conn):
+        manager = QueueManager(redis_conn)
+        await manager.add("c1", "Grupo", "primeira")
+        await manager.add("c1", "Grupo", "segunda")
+        
+        assert (await manager.take("c1", "Grupo")).text == "primeira"
+        assert await texts(manager, "c1") == ["segunda"]
+        
+        await manager.ack("c1", "Grupo")
+        assert (await manager.take("c1", "Grupo")).text == "segunda"
+        await manager.ack("c1", "Grupo")
+        
+        assert await manager.take("c1", "Grupo") is None
+        assert await redis_conn.zscore(READY_INDEX_KEY, "c1|Grupo") is None
+    
+    async def test_requeue_puts_message_back_at_the_head(self, redis_conn):
+        manager = QueueManager(redis_conn)
+        await manager.add("c1", "Grupo", "primeira")
+        await manager.add("c1", "Grupo", "segunda")
+        
+        await manager.take("c1", "Grupo")
+        assert await manager.requeue("c1", "Grupo") is True
+        
+        assert await texts(manager, "c1") == ["primeira", "segunda"]
+        assert await manager.requeue("c1", "Grupo") is False
+    
+    async def test_interrupted_send_is_taken_again(self, redis_conn):
+        manager = QueueManager(redis_conn)
+        await manager.add("c1", "Grupo", "primeira")
+        await manager.add("c1", "Grupo", "segunda")
+        await manager.take("c1", "Grupo")
+        
+        # Worker novo depois de um crash: mesma mensagem, índice ainda aponta para cá
+        restarted = QueueManager(redis_conn)
+        assert (await restarted.take("c1", "Grupo")).text == "primeira"
+        assert await redis_conn.zscore(READY_INDEX_KEY, "c1|Grupo") is not None
+    
+    async def test_overflow_during_send_drops_queued_offer_not_the_one_being_sent(self, redis_conn):
+        worker, conn = build_worker(redis_conn, max_queue_size=2)
+        conn_id = str(conn.id)
+        await worker.queue_manager.add(conn_id, "Grupo", "enviando")
+        await worker.queue_manager.add(conn_id, "Grupo", "segunda")
+        worker.gateway = OverflowingGateway(worker.queue_manager, conn_id, ["terceira", "quarta"])
+        
+        await worker._send_next(conn_id, "Grupo")
+        
+        # "segunda" era a mais antiga na fila quando ela encheu
+        assert worker.gateway.sent == ["enviando"]
+        assert await texts(worker.queue_manager, conn_id) == ["terceira", "quarta"]
+    
+    async def test_failed_send_goes_back_to_the_head(self, redis_conn):
+        worker, conn = build_worker(redis_conn, max_queue_size=2)
+        conn_id = str(conn.id)
+        await worker.queue_manager.add(conn_id, "Grupo", "enviando")
+        worker.gateway = OverflowingGateway(worker.queue_manager, conn_id, ["segunda"], status="error")
+        
+        await worker._send_next(conn_id, "Grupo")
+        
+        assert await texts(worker.queue_manager, conn_id) == ["enviando", "segunda"]
+    
+    async def test_replace_skips_offer_in_flight(self, redis_conn):
+        manager = QueueManager(redis_conn)
+        await manager.add("c1", "Grupo", "R$ 99,90", product_key="AMZN-1")
+        await manager.take("c1", "Grupo")
+        
+        assert await manager.replace("c1", "Grupo", "AMZN-1", "R$ 79,90") == "in_flight"
+        assert await texts(manager, "c1") == []
+    
+    async def test_better_price_while_previous_copy_is_being_sent_is_dropped(self, redis_conn, monkeypatch):
+        async def monetize(db, text, user_id):
+            return text
+        monkeypatch.setattr(whatsapp_worker, "monetize_text", monetize)
+        worker, conn = build_worker(redis_conn, max_queue_size=0)
+        conn_id = str(conn.id)
+        
+        await worker.process_new_message(None, conn, offer("99,90"))
+        await worker.queue_manager.take(conn_id, "Grupo")
+        await worker.process_new_message(None, conn, offer("79,90"))
+        
+        assert await texts(worker.queue_manager, conn_id) == []
+    
+    async def test_better_price_after_previous_copy_was_sent_is_queued(self, redis_conn, monkeypatch):
+        async def monetize(db, text, user_id):
+            return text
+        monkeypatch.setattr(whatsapp_worker, "monetize_text", monetize)
+        worker, conn = build_worker(redis_conn, max_queue_size=0)
+        conn_id = str(conn.id)
+        
+        await worker.process_new_message(None, conn, offer("99,90"))
+        await worker.queue_manager.take(conn_id, "Grupo")
+        await worker.queue_manager.ack(conn_id, "Grupo")
+        await worker.process_new_message(None, conn, offer("79,90"))
+        
+        assert await texts(worker.queue_manager, conn_id) == [offer("79,90").text]
+    
+    async def test_removed_group_is_purged_and_unscheduled(self, redis_conn):
+        worker, conn = build_worker(redis_conn)
+        conn_id = str(conn.id)
+        await worker.queue_manager.add(conn_id, "Antigo", "oferta")
+        worker.send_scheduler.schedule(conn_id, "Antigo", 60)
+        worker.gateway = OverflowingGateway(worker.queue_manager, conn_id, [])
+        
+        await worker._send_next(conn_id, "Antigo")
+        
+        assert worker.gateway.sent == []
+        assert await worker.queue_manager.get_queue_size(conn_id, "Antigo") == 0
+        assert await worker.queue_manager.get_scheduled() == []
+        assert worker.send_scheduler.next_deadline() is None
@@ -0,0 +1,97 @@
+"""
+Testes para o SendScheduler.
+
+Testa ordenação por deadline, reagendamento e espera até o próximo envio.
+"""
+import asyncio
+import time
+
+import pytest
+
+from services.whatsapp.send_scheduler import SendScheduler
+
+
+class TestScheduling:
+    """Testes de agendamento e retirada de pares prontos."""
+    
+    def test_pop_due_returns_only_ready_pairs(self):
+        """Apenas pares com deadline vencido devem sair."""
+        scheduler = SendScheduler()
+        scheduler.schedule("c1", "Grupo A", delay=0, now=100)
+        scheduler.schedule("c1", "Grupo B", delay=60, now=100)
+        
+        assert scheduler.pop_due(now=100) == [("c1", "Grupo A")]
+        assert len(scheduler) == 1
+        assert scheduler.next_deadline() == 160
+    
+    def test_pop_due_orders_by_deadline(self):
+        """Pares prontos saem do mais antigo para o mais novo."""
+        scheduler = SendScheduler()
+        scheduler.schedule_at("c1", "Grupo B", 30)
+        scheduler.schedule_at("c2", "Grupo A", 10)
+        scheduler.schedule_at("c1", "Grupo A", 20)
+        
+        assert scheduler.pop_due(now=50) == [
+            ("c2", "Grupo A"),
+            ("c1", "Grupo A"),
+            ("c1", "Grupo B"),
+        ]
+    
+    def test_reschedule_replaces_previous_deadline(self):
+        """Reagendar substitui o deadline anterior (sem duplicar)."""
+        scheduler = SendScheduler()
+        scheduler.schedule_at("c1", "Grupo A", 10)
+        scheduler.schedule_at("c1", "Grupo A", 400)
+        
+        assert scheduler.pop_due(now=50) == []
+        assert scheduler.pop_due(now=400) == [("c1", "Grupo A")]
+        assert len(scheduler) == 0
+    
+    def test_same_group_name_different_connections(self):
+        """Mesmo nome de grupo em conexões diferentes são pares distintos."""
+        scheduler = SendScheduler()
+        scheduler.schedule_at("c1", "Ofertas", 10)
+        scheduler.schedule_at("c2", "Ofertas", 10)
+        
+        assert len(scheduler) == 2
+        assert ("c2", "Ofertas") in scheduler
+    
+    def test_cancel(self):
+        """Par cancelado não deve sair no pop."""
+        scheduler = SendScheduler()
+        scheduler.schedule_at("c1", "Grupo A", 10)
+        scheduler.cancel("c1", "Grupo A")
+        
+        assert scheduler.pop_due(now=50) == []
+        assert scheduler.next_deadline() is None
+
+
+@pytest.mark.asyncio
+class TestWait:
+    """Testes da espera até o próximo deadline."""
+    
+    async def test_wait_returns_at_deadline(self):
+        """wait() deve dormir só até o deadline mais próximo."""
+        scheduler = SendScheduler()
+        scheduler.schedule("c1", "Grupo A", delay=0.05)
+        
+        start = time.monotonic()
+        await scheduler.wait(max_wait=5)
+        
+        assert time.monotonic() - start < 1
+        assert scheduler.pop_due() == [("c1", "Grupo A")]
+    
+    async def test_wait_wakes_on_earlier_schedule(self):
+        """Agendar algo mais cedo deve acordar o loop."""
+        scheduler = SendScheduler()
+        scheduler.schedule("c1", "Grupo A", delay=60)
+        
+        async def schedule_soon():
+            await asyncio.sleep(0.05)
+            scheduler.schedule("c2", "Grupo B", delay=0)
+        
+        start = time.monotonic()
+        await asyncio.gather(scheduler.wait(max_wait=5), schedule_soon())
+        
+        assert time.monotonic() - start < 1
+        assert scheduler.pop_due() == [("c2", "Grupo B")]
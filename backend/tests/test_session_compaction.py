@@ -0,0 +1,73 @@
+"""
+Testes para a compactação de sessões.
+
+Testa que caches são podados e o estado de login é preservado.
+"""
+import os
+import socket
+import subprocess
+import sys
+
+from services.whatsapp.session_compaction import compact_session
+
+
+def _write(path, size):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+
+
+def test_prunes_caches_and_keeps_auth_state(tmp_path):
+    profile = tmp_path / "session"
+    _write(f"{profile}/Default/Cache/Cache_Data/data_0", 1000)
+    _write(f"{profile}/Default/Code Cache/js/index", 500)
+    _write(f"{profile}/Default/Service Worker/CacheStorage/abc/index", 250)
+    _write(f"{profile}/Default/IndexedDB/https_web.whatsapp.com_0.indexeddb.leveldb/000003.log", 100)
+    _write(f"{profile}/Default/Local Storage/leveldb/000003.log", 100)
+    _write(f"{profile}/Default/Service Worker/Database/000003.log", 100)
+    _write(f"{profile}/Default/Service Worker/ScriptCache/index", 100)
+    
+    result = compact_session(str(profile))
+    
+    assert result["compacted"] is True
+    assert result["reclaimed_bytes"] == 1750
+    assert not os.path.exists(f"{profile}/Default/Cache")
+    assert not os.path.exists(f"{profile}/Default/Service Worker/CacheStorage")
+    assert os.path.exists(f"{profile}/Default/IndexedDB")
+    assert os.path.exists(f"{profile}/Default/Local Storage")
+    assert os.path.exists(f"{profile}/Default/Service Worker/Database")
+    assert os.path.exists(f"{profile}/Default/Service Worker/ScriptCache")
+
+
+def test_skips_open_profile(tmp_path):
+    profile = tmp_path / "session"
+    _write(f"{profile}/Default/Cache/Cache_Data/data_0", 1000)
+    os.symlink(f"{socket.gethostname()}-{os.getpid()}", f"{profile}/SingletonLock")
+    
+    result = compact_session(str(profile))
+    
+    assert result["compacted"] is False
+    assert result["reason"] == "profile_open"
+    assert os.path.exists(f"{profile}/Default/Cache")
+
+
+def test_compacts_profile_with_stale_lock(tmp_path):
+    profile = tmp_path / "session"
+    _write(f"{profile}/Default/Cache/Cache_Data/data_0", 1000)
+    # Chromium morto sem apagar o lock (crash / kill)
+    dead = subprocess.Popen([sys.executable, "-c", "pass"])
+    dead.wait()
+    os.symlink(f"{socket.gethostname()}-{dead.pid}", f"{profile}/SingletonLock")
+    
+    result = compact_session(str(profile))
+    
+    assert result["compacted"] is True
+    assert not os.path.exists(f"{profile}/Default/Cache")
+
+
+def test_lock_from_another_host_counts_as_open(tmp_path):
+    profile = tmp_path / "session"
+    _write(f"{profile}/Default/Cache/Cache_Data/data_0", 1000)
+    os.symlink(f"outra-maquina-{os.getpid()}", f"{profile}/SingletonLock")
+    
+    assert compact_session(str(profile))["reason"] == "profile_open"
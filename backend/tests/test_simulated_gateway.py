@@ -0,0 +1,64 @@
+"""
+Testes para o gateway WhatsApp em memória usado pelo driver de carga.
+"""
+import pytest
+
+from services.whatsapp.simulated_gateway import SimulatedWhatsAppGateway
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def gateway(clock):
+    latencies = {"sweep": 0, "open_group": 0, "send": 0}
+    return SimulatedWhatsAppGateway(latencies=latencies, arrival_rate=1.0, seed=7, clock=clock)
+
+
+@pytest.mark.asyncio
+class TestSimulatedGateway:
+    
+    async def test_sweep_reports_groups_with_arrivals(self, gateway, clock):
+        assert await gateway.sweep_source_groups("c1", ["A"]) == {
+            "changed": [], "unchanged": ["A"], "missing": []
+        }
+        
+        clock.now += 600
+        sweep = await gateway.sweep_source_groups("c1", ["A"])
+        
+        assert sweep["changed"] == ["A"]
+        assert gateway.backlog() == gateway.stats["generated"] > 0
+    
+    async def test_messages_are_read_once(self, gateway, clock):
+        await gateway.get_new_messages("c1", ["A"])
+        clock.now += 600
+        
+        messages = await gateway.get_new_messages("c1", ["A"])
+        
+        assert messages and all(m.group_id == "A" for m in messages)
+        assert await gateway.get_new_messages("c1", ["A"]) == []
+        assert gateway.backlog() == 0
+    
+    async def test_send_measures_latency_from_marker(self, gateway, clock):
+        await gateway.get_new_messages("c1", ["A"])
+        clock.now += 600
+        msg = (await gateway.get_new_messages("c1", ["A"]))[0]
+        
+        clock.now += 30
+        monetized = msg.text.replace("https://", "https://tagged.")
+        result = await gateway.send_message("c1", "Destino", monetized)
+        
+        assert result["status"] == "sent"
+        assert gateway.timings["capture_to_send"] == [30]
+        assert gateway.timings["end_to_end"][0] >= 30
+        assert gateway.sent_by_connection == {"c1": 1}
@@ -0,0 +1,182 @@
+"""
+Testes para as estratégias de digitação e a conferência do texto composto.
+
+A página falsa guarda o que foi digitado no compose box e o devolve como o
+WhatsApp Web renderiza (parágrafos, espaços não separáveis, emojis sem U+FE0F).
+"""
+import pytest
+
+from services.whatsapp import text_input
+from services.whatsapp.humanized_sender import HumanizedSender
+from services.whatsapp.text_input import COMPOSED_TEXT_JS, type_text, verify_composed_text
+
+OFFER = "🔥 Kindle 11ª Geração\nR$ 474,05\nhttps://www.amazon.com.br/dp/B0CP31L73X"
+
+
+class FakeKeyboard:
+    def __init__(self, page):
+        self.page = page
+        self.calls = []
+    
+    async def type(self, text, delay=None):
+        self.calls.append(("type", text))
+        self.page.composed += text
+    
+    async def insert_text(self, text):
+        self.calls.append(("insert_text", text))
+        # Colar falha no meio do texto (ex.: foco roubado por uma notificação)
+        self.page.composed += text[:10] if "paste" in self.page.broken else text
+    
+    async def press(self, key):
+        self.calls.append(("press", key))
+        if key == "Shift+Enter":
+            self.page.composed += "\n"
+        elif key == "Backspace":
+            self.page.composed = ""
+
+
+class FakePage:
+    def __init__(self, broken=()):
+        self.composed = ""
+        self.broken = set(broken)
+        self.keyboard = FakeKeyboard(self)
+    
+    def rendered(self):
+        # Como o WhatsApp exibe: um <p> por linha, nbsp, emojis sem seletor de variação
+        return "\n\n".join(self.composed.split("\n")).replace(" ", "\u00a0").replace("\ufe0f", "")
+
+
+class FakeComposeBox:
+    def __init__(self, page, fail=False):
+        self.page = page
+        self.fail = fail
+    
+    async def evaluate(self, script):
+        if self.fail:
+            raise RuntimeError("Target closed")
+        assert script == COMPOSED_TEXT_JS
+        return self.page.rendered()
+    
+    async def click(self):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def no_delays(monkeypatch):
+    monkeypatch.setattr(text_input, "CHAR_DELAY", (0, 0))
+    monkeypatch.setattr(text_input, "CHUNK_DELAY", (0, 0))
+
+
+@pytest.mark.asyncio
+class TestTypeText:
+    """Testes dos modos de digitação."""
+    
+    async def test_char_mode_types_one_key_at_a_time(self):
+        page = FakePage()
+        
+        result = await type_text(page, "ab\nc", "char")
+        
+        assert page.keyboard.calls == [
+            ("type", "a"), ("type", "b"), ("press", "Shift+Enter"), ("type", "c")
+        ]
+        assert page.composed == "ab\nc"
+        assert result["input_mode"] == "char"
+    
+    async def test_chunk_mode_types_one_word_at_a_time(self):
+        page = FakePage()
+        
+        await type_text(page, "Fone  JBL\nR$ 99", "chunk")
+        
+        assert page.keyboard.calls == [
+            ("type", "Fone  "), ("type", "JBL"), ("press", "Shift+Enter"), ("type", "R$ "), ("type", "99")
+        ]
+        assert page.composed == "Fone  JBL\nR$ 99"
+    
+    async def test_paste_mode_inserts_each_line(self):
+        page = FakePage()
+        
+        result = await type_text(page, OFFER, "paste")
+        
+        assert [c for c in page.keyboard.calls if c[0] == "insert_text"] == [
+            ("insert_text", line) for line in OFFER.split("\n")
+        ]
+        assert page.composed == OFFER
+        assert result["chars_per_second"] > 0
+    
+    async def test_unknown_mode_falls_back_to_default(self):
+        page = FakePage()
+        
+        result = await type_text(page, "oi", "turbo")
+        
+        assert result["input_mode"] == "char"
+        assert page.composed == "oi"
+
+
+@pytest.mark.asyncio
+class TestVerifyComposedText:
+    """Testes da conferência do compose box."""
+    
+    async def test_matches_whatsapp_rendering(self):
+        page = FakePage()
+        page.composed = "🔥\ufe0f Kindle  11ª Geração\nR$ 474,05\nhttps://www.amazon.com.br/dp/B0CP31L73X"
+        
+        # Parágrafos, nbsp, espaços repetidos e U+FE0F não contam como diferença
+        assert await verify_composed_text(FakeComposeBox(page), OFFER)
+        assert await verify_composed_text(FakeComposeBox(page), "❤\ufe0f " + OFFER) is False
+    
+    async def test_emoji_with_and_without_variation_selector(self):
+        page = FakePage()
+        page.composed = "Oferta ❤ R$ 10"
+        
+        assert await verify_composed_text(FakeComposeBox(page), "Oferta ❤\ufe0f R$ 10")
+    
+    async def test_composed_forms_are_equivalent(self):
+        page = FakePage()
+        page.composed = "Gerac\u0327a\u0303o"  # ç e ã decompostos
+        
+        assert await verify_composed_text(FakeComposeBox(page), "Geração")
+    
+    async def test_wrong_link_does_not_match(self):
+        page = FakePage()
+        page.composed = OFFER.replace("B0CP31L73X", "B0CP31L73")
+        
+        assert await verify_composed_text(FakeComposeBox(page), OFFER) is False
+    
+    async def test_unreadable_compose_box_does_not_match(self):
+        assert await verify_composed_text(FakeComposeBox(FakePage(), fail=True), OFFER) is False
+
+
+@pytest.mark.asyncio
+class TestTypeVerified:
+    """Testes do fallback de modo do HumanizedSender."""
+    
+    async def test_verified_on_first_try(self):
+        page = FakePage()
+        
+        result = await HumanizedSender()._type_verified(page, FakeComposeBox(page), OFFER, "paste")
+        
+        assert result["input_mode"] == "paste"
+        assert result["text_verified"] is True
+    
+    async def test_mismatch_clears_and_retypes_with_slower_mode(self):
+        page = FakePage(broken={"paste"})
+        
+        result = await HumanizedSender()._type_verified(page, FakeComposeBox(page), OFFER, "paste")
+        
+        assert result["input_mode"] == HumanizedSender.FALLBACK_MODE["paste"] == "chunk"
+        assert result["text_verified"] is True
+        assert ("press", "Control+A") in page.keyboard.calls
+        assert page.composed == OFFER
+    
+    async def test_gives_up_after_slowest_mode(self):
+        page = FakePage()
+        
+        class NeverMatches(FakeComposeBox):
+            async def evaluate(self, script):
+                return "texto errado"
+        
+        with pytest.raises(Exception, match="Composed text mismatch"):
+            await HumanizedSender()._type_verified(page, NeverMatches(page), OFFER, "chunk")
+        
+        # chunk -> char -> desiste (sem modo mais lento)
+        assert [c for c in page.keyboard.calls if c == ("press", "Backspace")] == [("press", "Backspace")] * 2
@@ -0,0 +1,109 @@
+"""
+Testes para o tracing do pipeline (aninhamento de spans e propagação pelos payloads das filas).
+"""
+import json
+import time
+
+import pytest
+
+from core import tracing
+from core.tracing import JSONLExporter, span, start_trace, trace_fields
+from schemas.worker import ProcessedOffer
+
+
+class ListExporter:
+    def __init__(self):
+        self.records = []
+    
+    def export(self, record: dict):
+        self.records.append(record)
+
+
+@pytest.fixture
+def exporter():
+    exporter = ListExporter()
+    tracing.set_exporter(exporter)
+    yield exporter
+    tracing.set_exporter(None)
+
+
+def test_spans_nest_under_the_trace(exporter):
+    with start_trace("ingest", platform="telegram") as root:
+        with span("unshorten"):
+            pass
+    
+    child, parent = exporter.records
+    assert parent["name"] == "ingest" and parent["parent_id"] is None
+    assert parent["attributes"] == {"platform": "telegram"}
+    assert child["trace_id"] == root.trace_id
+    assert child["parent_id"] == root.span_id
+
+
+def test_span_outside_a_trace_is_noop(exporter):
+    with span("monetize") as opened:
+        assert opened is None
+    assert trace_fields() == {}
+    assert exporter.records == []
+
+
+def test_trace_continues_through_queue_payload(exporter):
+    with start_trace("process_message"):
+        with span("enqueue_dispatch"):
+            offer = ProcessedOffer(
+                user_id="u1",
+                destination_group_id="g1",
+                destination_platform="telegram",
+                monetized_url="https://example.com",
+                final_text="oferta",
+                source_platform="telegram",
+                source_group_id="s1",
+                **trace_fields()
+            )
+    
+    payload = ProcessedOffer.model_validate_json(offer.model_dump_json())
+    with start_trace("send", payload.trace_id, payload.parent_span_id):
+        pass
+    
+    enqueue = next(r for r in exporter.records if r["name"] == "enqueue_dispatch")
+    send = exporter.records[-1]
+    assert send["trace_id"] == enqueue["trace_id"]
+    assert send["parent_id"] == enqueue["span_id"]
+
+
+def test_error_is_recorded(exporter):
+    with pytest.raises(ValueError):
+        with start_trace("send"):
+            raise ValueError("provider down")
+    
+    assert exporter.records[0]["error"] == "ValueError"
+
+
+def read_spans(path):
+    if not path.exists():
+        return []
+    return [json.loads(line)["name"] for line in path.read_text().splitlines()]
+
+
+def test_jsonl_export_does_not_write_on_the_caller(tmp_path):
+    path = tmp_path / "traces" / "spans.jsonl"
+    exporter = JSONLExporter(str(path), flush_interval=60)
+    
+    exporter.export({"name": "ingest"})
+    exporter.export({"name": "send"})
+    assert read_spans(path) == []
+    
+    exporter.flush()
+    assert read_spans(path) == ["ingest", "send"]
+
+
+def test_jsonl_export_flushes_in_background_at_batch_size(tmp_path):
+    path = tmp_path / "spans.jsonl"
+    exporter = JSONLExporter(str(path), batch_size=3, flush_interval=60)
+    
+    for name in ("a", "b", "c"):
+        exporter.export({"name": name})
+    
+    deadline = time.monotonic() + 5
+    while read_spans(path) != ["a", "b", "c"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert read_spans(path) == ["a", "b", "c"]
@@ -0,0 +1,53 @@
+"""
+Testes para o UnreadSweep.
+
+Testa a classificação dos grupos a partir das linhas lidas da lista de chats.
+"""
+from services.whatsapp.unread_sweep import UnreadSweep
+
+
+GROUPS = ["Promo A", "Promo B", "Promo C"]
+
+
+def row(unread=0, last_time="10:00", preview="oferta"):
+    return {"unread": unread, "last_time": last_time, "preview": preview}
+
+
+class TestUnreadSweep:
+    """Testes de changed / unchanged / missing."""
+    
+    def test_first_sighting_counts_as_changed(self):
+        sweep = UnreadSweep()
+        
+        result = sweep.classify("c1", GROUPS, {"Promo A": row(), "Promo B": row()})
+        
+        assert result == {"changed": ["Promo A", "Promo B"], "unchanged": [], "missing": ["Promo C"]}
+    
+    def test_only_groups_that_changed_are_reported(self):
+        sweep = UnreadSweep()
+        sweep.classify("c1", GROUPS, {g: row() for g in GROUPS})
+        
+        result = sweep.classify("c1", GROUPS, {
+            "Promo A": row(),
+            "Promo B": row(unread=3),
+            "Promo C": row(last_time="10:01", preview="nova oferta"),
+        })
+        
+        assert result["changed"] == ["Promo B", "Promo C"]
+        assert result["unchanged"] == ["Promo A"]
+    
+    def test_opening_group_clears_badge_without_new_change(self):
+        sweep = UnreadSweep()
+        sweep.classify("c1", GROUPS, {"Promo A": row(unread=2, last_time="10:05")})
+        
+        # Grupo aberto: contador zerado, mesma última mensagem
+        result = sweep.classify("c1", GROUPS, {"Promo A": row(last_time="10:05")})
+        
+        assert result["unchanged"] == ["Promo A"]
+    
+    def test_forget_resets_connection(self):
+        sweep = UnreadSweep()
+        sweep.classify("c1", GROUPS, {"Promo A": row()})
+        sweep.forget("c1")
+        
+        assert sweep.classify("c1", GROUPS, {"Promo A": row()})["changed"] == ["Promo A"]
@@ -0,0 +1,93 @@
+"""
+Testes dos caminhos Playwright contra a cópia local do WhatsApp Web.
+
+A página é aberta do disco (file://), então rodam offline; são pulados
+quando o Chromium não está instalado (playwright install chromium).
+"""
+from contextlib import asynccontextmanager
+from pathlib import Path
+from urllib.parse import urlencode
+
+import pytest
+
+async_api = pytest.importorskip("playwright.async_api")
+
+from services.whatsapp.group_discovery import collect_groups
+from services.whatsapp.humanized_sender import HumanizedSender
+from services.whatsapp.text_input import verify_composed_text
+from services.whatsapp.unread_sweep import UnreadSweep
+
+FIXTURE = Path(__file__).parent / "fixtures" / "whatsapp_web" / "index.html"
+
+OFFER = "🔥 Kindle 11ª Geração\nR$ 474,05\nhttps://www.amazon.com.br/dp/B0CP31L73X"
+
+
+@asynccontextmanager
+async def fixture_page(**params):
+    async with async_api.async_playwright() as playwright:
+        try:
+            browser = await playwright.chromium.launch(headless=True)
+        except Exception as e:
+            pytest.skip(f"Chromium not available: {e}")
+        try:
+            page = await browser.new_page()
+            await page.goto(FIXTURE.as_uri() + "?" + urlencode(params, doseq=True))
+            yield page
+        finally:
+            await browser.close()
+
+
+@pytest.mark.asyncio
+class TestWhatsAppWebFixture:
+    
+    async def test_discovery_walks_virtualized_list(self):
+        async with fixture_page(groups=150, contacts=40, group=["Fonte A"]) as page:
+            rendered = await page.evaluate("document.querySelectorAll('[role=\"listitem\"]').length")
+            groups = await collect_groups(page)
+        
+        # Só uma janela de linhas existe por vez, mesmo assim todo grupo é achado
+        assert rendered < 151
+        assert len(groups) == 151
+        assert "Fonte A" in groups
+        assert all(not name.startswith(("Ana ", "Bruno ")) for name in groups)
+    
+    async def test_sweep_reports_only_groups_with_new_messages(self):
+        async with fixture_page(group=["Fonte A", "Fonte B"]) as page:
+            sweeper = UnreadSweep()
+            await sweeper.sweep(page, "c1", ["Fonte A", "Fonte B"])
+            await page.evaluate("window.waFixture.receive('Fonte B')")
+            result = await sweeper.sweep(page, "c1", ["Fonte A", "Fonte B"])
+        
+        assert result["changed"] == ["Fonte B"]
+        assert result["unchanged"] == ["Fonte A"]
+    
+    async def test_send_with_preview(self):
+        async with fixture_page(group=["Destino"], preview_ms=300) as page:
+            result = await HumanizedSender().send_with_preview(page, "Destino", OFFER, input_mode="paste")
+            sent = await page.evaluate("window.waFixture.sent()")
+        
+        assert result["status"] == "sent"
+        assert result["preview_generated"] is True
+        assert result["open_method"] == "chat_row"
+        assert sent == [{"chat": "Destino", "text": OFFER, "preview": True, "at": sent[0]["at"]}]
+    
+    async def test_send_without_preview_hits_deadline(self):
+        async with fixture_page(group=["Destino"], preview_fail=1) as page:
+            sender = HumanizedSender(preview_timeout=0.5)
+            result = await sender.send_with_preview(page, "Destino", OFFER, input_mode="paste")
+            sent = await page.evaluate("window.waFixture.sent()")
+        
+        assert result["status"] == "sent"
+        assert result["preview_generated"] is False
+        assert sent[0]["preview"] is False
+    
+    async def test_verify_reads_emoji_images_in_compose_box(self):
+        async with fixture_page(group=["Destino"]) as page:
+            compose = await page.query_selector('[data-testid="conversation-compose-box-input"]')
+            # Como o WhatsApp renderiza uma oferta digitada: um <p> por linha, emojis como <img alt>
+            await compose.evaluate(
+                """el => el.innerHTML = '<p><img alt="🔥" src="data:,">&nbsp;Kindle 11ª Geração</p>'
+                    + '<p>R$ 474,05</p><p>https://www.amazon.com.br/dp/B0CP31L73X</p>'"""
+            )
+            
+            assert await verify_composed_text(compose, OFFER)
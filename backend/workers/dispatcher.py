@@ -32,8 +32,12 @@ from typing import Optional, List
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from core.config import settings
 from core.database import AsyncSessionLocal
 from core.redis_client import redis_client
+from core.metrics import DISPATCH_LAG_SECONDS, start_metrics_server
+from core.profiler import profile_on_start
+from core.tracing import start_trace
 from models.user import User
 from models.send_log import SendLog
 from schemas.worker import ProcessedOffer
@@ -267,8 +271,16 @@ async def process_user_queue(db: AsyncSession, user_id: str, user_config: dict)
         )
         return 0
     
-    # 5. Enviar para o provider
-    success = await dispatch_to_provider(offer)
+    # 5. Enviar para o provider (último span do trace da oferta)
+    with start_trace(
+        "send",
+        offer.trace_id,
+        offer.parent_span_id,
+        platform=offer.destination_platform,
+        queue_wait_ms=round(max(0.0, datetime.now().timestamp() - offer.enqueued_at) * 1000)
+    ) as send_span:
+        success = await dispatch_to_provider(offer)
+        send_span.set_attribute("success", success)
     
     if not success:
         # Falhou, recolocar na fila (com limite de retries)
@@ -289,6 +301,10 @@ async def process_user_queue(db: AsyncSession, user_id: str, user_config: dict)
     db.add(send_log)
     await db.commit()
     
+    DISPATCH_LAG_SECONDS.labels(platform=offer.destination_platform).observe(
+        max(0.0, datetime.now().timestamp() - offer.enqueued_at)
+    )
+    
     logger.info(
         f"✅ Sent offer for user {user_id} to {offer.destination_platform} "
         f"group {offer.destination_group_id}"
@@ -334,6 +350,8 @@ async def dispatcher_loop():
     
     # Conectar ao Redis
     await redis_client.connect()
+    start_metrics_server(settings.DISPATCHER_METRICS_PORT)
+    profile_on_start("dispatcher")
     
     try:
         while True:
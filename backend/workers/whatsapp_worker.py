@@ -8,7 +8,7 @@ Responsibilities:
 - Process NEW_CONNECTION events (initialize Playwright, generate QR)
 - login_cycle(): detect QR scan and login completion
 - Monitor source groups for new messages (status='connected' only)
-- Queue messages for sending
+- Queue messages for sending (durable, Redis-backed)
 - Process send queue with rate limiting
 - Graceful shutdown
 
@@ -23,18 +23,47 @@ import logging
 import signal
 import sys
 import json
+import time
 import base64
-from typing import Dict, Set, Optional
+from typing import Dict, List, Set, Optional
 from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update
 
+from core.config import settings
 from core.database import AsyncSessionLocal
 from core.redis_client import redis_client
+from core.profiler import profile_on_start, start_profile
+from core.metrics import (
+    PLAYWRIGHT_OP_SECONDS,
+    SEND_QUEUE_DEPTH,
+    SEND_SECONDS,
+    SENDS_TOTAL,
+    WORKER_CYCLE_SECONDS,
+    start_metrics_server,
+    track_duration,
+)
 from models.whatsapp_connection import WhatsAppConnection
+from models.offer_log import OfferLog
 from services.whatsapp.playwright_gateway import PlaywrightWhatsAppGateway
 from services.whatsapp.queue_manager import QueueManager
+from services.whatsapp.send_scheduler import SendScheduler
+from services.whatsapp.poll_scheduler import PollScheduler
+from services.whatsapp.offer_coalescer import OfferCoalescer, product_key
+from services.whatsapp.context_telemetry import BUDGET_FIELDS, ContextTelemetry
+from services.whatsapp.qr_store import clear_qr, publish_qr, qr_fingerprint, touch_qr
+from services.whatsapp.connection_events import publish_event
+from services.whatsapp.chat_navigator import is_chat_open, open_chat_row
+from services.whatsapp.link_preview import has_link, wait_for_link_preview
+from services.whatsapp.group_discovery import collect_groups
+from services.whatsapp.text_input import (
+    DEFAULT_INPUT_MODE,
+    type_text,
+    verify_composed_text,
+    clear_compose_box,
+)
 from services.monetization_service import monetize_text
+from services.parsing_service import extract_price_from_text
 
 # Configure structured logging
 logging.basicConfig(
@@ -63,14 +92,31 @@ class WhatsAppWorker:
     
     def __init__(self):
         self.gateway: PlaywrightWhatsAppGateway = None
-        self.queue_manager = QueueManager()
+        self.queue_manager = QueueManager(
+            max_queue_size=settings.WHATSAPP_MAX_QUEUE_PER_GROUP,
+            overflow_policy=settings.WHATSAPP_QUEUE_OVERFLOW_POLICY,
+            quota_timezone=settings.WHATSAPP_QUOTA_TIMEZONE
+        )
+        self.send_scheduler = SendScheduler()
+        self.offer_coalescer = OfferCoalescer(
+            window_seconds=settings.WHATSAPP_COALESCE_WINDOW_SECONDS,
+            policy=settings.WHATSAPP_COALESCE_POLICY
+        )
+        self.poll_scheduler = PollScheduler(
+            base_interval=30,  # old fixed cycle: same browser work, spread by activity
+            max_staleness=settings.WHATSAPP_MONITOR_MAX_STALENESS
+        )
         self.running = False
         self.active_connections: Set[str] = set()
+        # Connections mid-login: pinned in the pool until they leave the login statuses
+        self.login_pins: Set[str] = set()
+        # DB sessions are opened through this (scripts/load_whatsapp_worker.py swaps in an in-memory one)
+        self.session_factory = AsyncSessionLocal
         self.redis_subscriber = None
         
         # State
-        self.monitor_interval = 30  # seconds between monitoring cycles
         self.send_interval = 5      # seconds between send attempts
+        self.schedule_resync_interval = 30  # seconds between Redis index resyncs
         
         logger.info("WhatsAppWorker initialized")
     
@@ -82,11 +128,18 @@ class WhatsAppWorker:
         await redis_client.connect()
         logger.info("✓ Redis connected")
         
+        start_metrics_server(settings.WORKER_METRICS_PORT)
+        
         # Initialize Playwright gateway
-        async with AsyncSessionLocal() as db:
+        async with self.session_factory() as db:
             self.gateway = PlaywrightWhatsAppGateway(
                 db=db,
-                sessions_dir="./whatsapp_sessions"
+                sessions_dir="./whatsapp_sessions",
+                pool_mode=settings.WHATSAPP_POOL_MODE,
+                contexts_per_browser=settings.WHATSAPP_CONTEXTS_PER_BROWSER,
+                max_live_contexts=settings.WHATSAPP_MAX_LIVE_CONTEXTS,
+                block_resources=settings.WHATSAPP_BLOCK_RESOURCES,
+                warm_pool_size=settings.WHATSAPP_WARM_POOL_SIZE
             )
             await self.gateway.start()
         logger.info("✓ Playwright gateway started")
@@ -135,6 +188,8 @@ class WhatsAppWorker:
         Commands:
         - NEW_CONNECTION: Initialize new connection
         - REGENERATE_QR: Reload page to generate new QR
+        - DISCOVER_GROUPS: Scrape the account's groups
+        - PROFILE: Sample this process for N seconds (core.profiler)
         """
         try:
             logger.info("Redis command listener started")
@@ -158,6 +213,8 @@ class WhatsAppWorker:
                         await self.handle_regenerate_qr(data)
                     elif cmd_type == "DISCOVER_GROUPS":
                         await self.handle_discover_groups(data)
+                    elif cmd_type == "PROFILE":
+                        self.handle_profile(data)
                     else:
                         logger.warning(f"Unknown command type: {cmd_type}")
                 
@@ -171,17 +228,37 @@ class WhatsAppWorker:
         except Exception as e:
             logger.error(f"Redis listener error: {e}", exc_info=True)
     
+    def handle_profile(self, data: dict):
+        """
+        Handle PROFILE command - sample the event loop in the background.
+        
+        {"type": "PROFILE", "seconds": 30}: the listener returns right away,
+        files land in WORKER_PROFILE_DIR when the window ends.
+        """
+        seconds = float(data.get("seconds") or 30)
+        if start_profile(seconds, "whatsapp_worker"):
+            logger.info(f"Profiling for {seconds:.0f}s")
+    
     async def handle_new_connection(self, data: dict):
         """
         Handle NEW_CONNECTION command.
         
         Backend created a connection with status='pending'.
-        We just log it - login_cycle() will process it.
+        Claims a warm context right away (if the warm pool is enabled)
+        so login_cycle() finds WhatsApp Web already loaded.
         """
         conn_id = data.get("connection_id")
         nickname = data.get("nickname", "Unknown")
         
         logger.info(f"📝 NEW_CONNECTION: {nickname} ({conn_id})")
+        
+        if conn_id and self.gateway.pool.warm_pool_size:
+            try:
+                async with self.gateway.pool.use(conn_id):
+                    pass
+            except Exception as e:
+                logger.error(f"Could not prepare context for {conn_id}: {e}")
+        
         logger.info(f"login_cycle() will process this connection")
     
     async def handle_regenerate_qr(self, data: dict):
@@ -194,7 +271,7 @@ class WhatsAppWorker:
         
         logger.info(f"🔄 REGENERATE_QR: {conn_id}")
         
-        async with AsyncSessionLocal() as db:
+        async with self.session_factory() as db:
             result = await db.execute(
                 select(WhatsAppConnection).where(
                     WhatsAppConnection.id == conn_id
@@ -207,19 +284,17 @@ class WhatsAppWorker:
                 return
             
             try:
-                # Get context
-                context = await self.gateway.pool.get_or_create(conn_id)
-                if context.pages:
-                    page = context.pages[0]
-                    await page.reload()
-                    
-                    # Reset status to trigger new QR generation
-                    conn.status = "qr_needed"
-                    conn.qr_code_base64 = None
-                    conn.qr_generated_at = None
-                    await db.commit()
-                    
-                    logger.info(f"✓ Page reloaded for {conn_id}")
+                # Pinned: hibernation must not close the page mid-reload
+                async with self.gateway.pool.use(conn_id) as context:
+                    if context.pages:
+                        page = context.pages[0]
+                        await page.reload()
+                        
+                        # Reset status to trigger new QR generation
+                        await self._set_status(db, conn, "qr_needed")
+                        await clear_qr(redis_client.client, conn_id)
+                        
+                        logger.info(f"✓ Page reloaded for {conn_id}")
             
             except Exception as e:
                 logger.error(f"Error regenerating QR for {conn_id}: {e}")
@@ -241,7 +316,7 @@ class WhatsAppWorker:
         """
         while self.running:
             try:
-                async with AsyncSessionLocal() as db:
+                async with self.session_factory() as db:
                     # Get connections awaiting login
                     result = await db.execute(
                         select(WhatsAppConnection).where(
@@ -249,94 +324,141 @@ class WhatsAppWorker:
                         )
                     )
                     connections = result.scalars().all()
+                    self._pin_login_contexts({str(conn.id) for conn in connections})
                     
                     if not connections:
                         await asyncio.sleep(5)  # Check every 5s
                         continue
                     
+                    cycle_started = time.perf_counter()
+                    
                     for conn in connections:
                         try:
                             conn_id = str(conn.id)
                             
-                            # Get or create persistent context
-                            context = await self.gateway.pool.get_or_create(conn_id)
-                            
-                            # Ensure we have a page
-                            if not context.pages:
-                                page = await context.new_page()
-                            else:
-                                page = context.pages[0]
-                            
-                            # === PENDING: Open WhatsApp Web ===
-                            if conn.status == "pending":
-                                logger.info(f"📱 Opening WhatsApp Web for {conn.nickname}")
-                                await page.goto(
-                                    "https://web.whatsapp.com",
-                                    wait_until="networkidle",
-                                    timeout=60000
-                                )
+                            # Pinned for the whole login (see _pin_login_contexts)
+                            async with self.gateway.pool.use(conn_id) as context:
+                                # Ensure we have a page
+                                if not context.pages:
+                                    page = await context.new_page()
+                                else:
+                                    page = context.pages[0]
                                 
-                                conn.status = "qr_needed"
-                                await db.commit()
-                                logger.info(f"✓ WhatsApp Web opened for {conn.nickname}")
-                                continue
-                            
-                            # === QR_NEEDED: Generate and save QR ===
-                            if conn.status == "qr_needed":
-                                # Check if QR needs update (first gen or >50s old)
-                                should_update_qr = (
-                                    not conn.qr_generated_at or
-                                    (datetime.utcnow() - conn.qr_generated_at).total_seconds() > 50
-                                )
+                                # === PENDING: Open WhatsApp Web ===
+                                if conn.status == "pending":
+                                    # Warm contexts already have WhatsApp Web loaded
+                                    if not page.url.startswith("https://web.whatsapp.com"):
+                                        logger.info(f"📱 Opening WhatsApp Web for {conn.nickname}")
+                                        await page.goto(
+                                            "https://web.whatsapp.com",
+                                            wait_until="networkidle",
+                                            timeout=60000
+                                        )
+                                    
+                                    await self._set_status(db, conn, "qr_needed")
+                                    logger.info(f"✓ WhatsApp Web opened for {conn.nickname}")
+                                    continue
                                 
-                                if should_update_qr:
-                                    qr_element = await self._get_qr_element(page)
+                                # === QR_NEEDED: Publish QR to Redis when it changes ===
+                                if conn.status == "qr_needed":
+                                    with track_duration(PLAYWRIGHT_OP_SECONDS, kind="qr"):
+                                        qr_element = await self._get_qr_element(page)
                                     
                                     if qr_element:
                                         try:
-                                            # Screenshot QR code
-                                            qr_bytes = await qr_element.screenshot()
-                                            qr_base64 = base64.b64encode(qr_bytes).decode()
-                                            
-                                            # Save to database
-                                            conn.qr_code_base64 = qr_base64
-                                            conn.qr_generated_at = datetime.utcnow()
-                                            await db.commit()
-                                            
-                                            logger.info(f"✓ QR code generated for {conn.nickname}")
+                                            if await self._publish_qr_if_changed(conn_id, qr_element):
+                                                logger.info(f"✓ QR code published for {conn.nickname}")
                                         
                                         except Exception as e:
                                             logger.error(f"Error capturing QR for {conn_id}: {e}")
-                                
-                                # Check if user scanned QR
-                                if await self._is_logged_in(page):
-                                    conn.status = "connecting"
-                                    await db.commit()
-                                    logger.info(f"📲 QR scanned for {conn.nickname}, connecting...")
-                                
-                                continue
-                            
-                            # === CONNECTING: Wait for full connection ===
-                            if conn.status == "connecting":
-                                if await self._is_fully_connected(page):
-                                    conn.status = "connected"
-                                    conn.last_activity_at = datetime.utcnow()
-                                    conn.qr_code_base64 = None  # Clear QR
-                                    conn.qr_generated_at = None
-                                    await db.commit()
                                     
-                                    logger.info(f"✅ {conn.nickname} fully connected!")
+                                    # Check if user scanned QR
+                                    if await self._is_logged_in(page):
+                                        await self._set_status(db, conn, "connecting")
+                                        await clear_qr(redis_client.client, conn_id)
+                                        logger.info(f"📲 QR scanned for {conn.nickname}, connecting...")
+                                    
+                                    continue
                                 
-                                continue
+                                # === CONNECTING: Wait for full connection ===
+                                if conn.status == "connecting":
+                                    if await self._is_fully_connected(page):
+                                        conn.last_activity_at = datetime.utcnow()
+                                        await self._set_status(db, conn, "connected")
+                                        
+                                        # Shared pool: persist login keys right away
+                                        await self.gateway.pool.save_session(conn_id)
+                                        
+                                        logger.info(f"✅ {conn.nickname} fully connected!")
+                                    
+                                    continue
                         
                         except Exception as e:
                             logger.error(f"Error in login_cycle for {conn.id}: {e}", exc_info=True)
                             continue
                 
+                WORKER_CYCLE_SECONDS.labels(cycle="login").observe(time.perf_counter() - cycle_started)
+                
+                # QR checks are cheap now (fingerprint only), keep a steady cadence
+                await asyncio.sleep(2)
+                
             except Exception as e:
                 logger.error(f"Login cycle error: {e}", exc_info=True)
                 await asyncio.sleep(5)
     
+    def _pin_login_contexts(self, login_ids: Set[str]):
+        """
+        Keep contexts of connections mid-login out of the hibernation budget.
+        
+        The QR login spans many login_cycle passes; evicting the context
+        between them would reload WhatsApp Web and invalidate the QR the
+        user is scanning. Pins are released once the connection leaves the
+        pending/qr_needed/connecting statuses (connected, error, deleted).
+        """
+        pool = self.gateway.pool
+        
+        for conn_id in login_ids - self.login_pins:
+            pool.pin(conn_id)
+        for conn_id in self.login_pins - login_ids:
+            pool.unpin(conn_id)
+        
+        self.login_pins = set(login_ids)
+    
+    async def _set_status(self, db: AsyncSession, conn: WhatsAppConnection, status: str):
+        """Persist a status transition and push it to the connection's event stream."""
+        conn.status = status
+        await db.commit()
+        await publish_event(redis_client.client, str(conn.id), "status", status=status)
+    
+    async def _publish_qr_if_changed(self, conn_id: str, qr_element) -> bool:
+        """
+        Publish the QR frame to Redis only when the code changed.
+        
+        The fingerprint comes from the QR container's data-ref (the encoded
+        login token), so unchanged codes cost no screenshot at all. Falls
+        back to hashing the screenshot when data-ref is not available.
+        
+        Returns:
+            True if a new frame was published
+        """
+        redis_conn = redis_client.client
+        
+        data_ref = await qr_element.evaluate(
+            "el => el.closest('[data-ref]')?.getAttribute('data-ref') || null"
+        )
+        
+        if data_ref:
+            fingerprint = qr_fingerprint(data_ref)
+            if await touch_qr(redis_conn, conn_id, fingerprint):
+                return False
+            qr_bytes = await qr_element.screenshot()
+        else:
+            qr_bytes = await qr_element.screenshot()
+            fingerprint = qr_fingerprint(qr_bytes)
+        
+        qr_base64 = base64.b64encode(qr_bytes).decode()
+        return await publish_qr(redis_conn, conn_id, qr_base64, fingerprint)
+    
     async def _get_qr_element(self, page):
         """Try multiple selectors to find QR code element."""
         for selector in QR_SELECTORS:
@@ -400,8 +522,25 @@ class WhatsAppWorker:
         Monitor source groups for new messages.
         
         Only processes connections with status='connected'.
+        
+        Runs every poll_scheduler.min_interval seconds. Each tick first sweeps
+        the chat list (one evaluate, see UnreadSweep) and opens only groups
+        whose unread counter / last message changed. Groups the sweep can't
+        see fall back to PollScheduler (busy groups checked more often), and
+        every group is still opened at least every WHATSAPP_MONITOR_MAX_STALENESS
+        seconds.
         """
-        async with AsyncSessionLocal() as db:
+        while self.running:
+            try:
+                with track_duration(WORKER_CYCLE_SECONDS, cycle="monitor"):
+                    await self._monitor_tick()
+            except Exception as e:
+                logger.error(f"Monitor cycle error: {e}", exc_info=True)
+            
+            await asyncio.sleep(self.poll_scheduler.min_interval)
+    
+    async def _monitor_tick(self):
+        async with self.session_factory() as db:
             connections = await self.get_active_connections(db)
             
             if not connections:
@@ -409,17 +548,30 @@ class WhatsAppWorker:
             
             for conn in connections:
                 try:
+                    conn_id = str(conn.id)
                     source_groups = [g["name"] for g in conn.source_groups]
+                    self.poll_scheduler.forget(conn_id, keep=source_groups)
                     
-                    if not source_groups:
+                    due_groups = self._groups_to_check(
+                        conn_id,
+                        source_groups,
+                        await self.gateway.sweep_source_groups(conn_id, source_groups)
+                    )
+                    if not due_groups:
                         continue
                     
-                    # Check for new messages
+                    # Check for new messages (most overdue groups first)
                     new_messages = await self.gateway.get_new_messages(
-                        connection_id=str(conn.id),
-                        source_groups=source_groups
+                        connection_id=conn_id,
+                        source_groups=due_groups
                     )
                     
+                    found: Dict[str, int] = {}
+                    for msg in new_messages:
+                        found[msg.group_id] = found.get(msg.group_id, 0) + 1
+                    for group_name in due_groups:
+                        self.poll_scheduler.observe(conn_id, group_name, found.get(group_name, 0))
+                    
                     if new_messages:
                         logger.info(f"Found {len(new_messages)} new message(s) for {conn.nickname}")
                         
@@ -430,6 +582,31 @@ class WhatsAppWorker:
                     logger.error(f"Error monitoring connection {conn.id}: {e}", exc_info=True)
                     continue
     
+    def _groups_to_check(
+        self,
+        conn_id: str,
+        source_groups: List[str],
+        sweep: Optional[Dict[str, List[str]]]
+    ) -> List[str]:
+        """
+        Pick the source groups to open this tick.
+        
+        Without a sweep every due group (PollScheduler) is opened. With one:
+        changed groups, plus due groups the sweep couldn't see, plus stale
+        groups (safety net for changes the chat list doesn't reflect).
+        """
+        due_groups = self.poll_scheduler.due_groups(conn_id, source_groups)
+        if sweep is None:
+            return due_groups
+        
+        selected = set(sweep["changed"])
+        selected.update(g for g in due_groups if g in sweep["missing"])
+        selected.update(self.poll_scheduler.stale_groups(conn_id, sweep["unchanged"]))
+        
+        # Keep PollScheduler's priority order (most overdue first)
+        ordered = [g for g in due_groups if g in selected]
+        return ordered + [g for g in source_groups if g in selected and g not in ordered]
+    
     async def process_new_message(
         self,
         db: AsyncSession,
@@ -440,7 +617,8 @@ class WhatsAppWorker:
         Process new message from source group.
         
         1. Monetize URLs
-        2. Queue for destination groups
+        2. Coalesce copies of the same product from other source groups
+        3. Queue for destination groups
         """
         try:
             # Monetize text
@@ -453,14 +631,67 @@ class WhatsAppWorker:
                 logger.warning(f"Connection {conn.nickname} has no destination groups")
                 return
             
+            # Offer value for drop_lowest / best_price (price in cents)
+            value = extract_price_from_text(monetized_text) or 0
+            product_unique_id = product_key(monetized_text)
+            
             # Queue message for each destination group
             for group_name in dest_groups:
-                self.queue_manager.add(
+                decision, _ = await self.offer_coalescer.admit(
                     connection_id=str(conn.id),
                     group_name=group_name,
-                    text=monetized_text
+                    product_unique_id=product_unique_id,
+                    text=monetized_text,
+                    price_cents=value
                 )
                 
+                if decision == "drop":
+                    continue
+                
+                if decision == "replace":
+                    # Better price for a copy of the same product still waiting in the queue
+                    replaced = await self.queue_manager.replace(
+                        connection_id=str(conn.id),
+                        group_name=group_name,
+                        product_key=product_unique_id,
+                        text=monetized_text,
+                        value=value
+                    )
+                    if replaced == "replaced":
+                        continue
+                    
+                    if replaced == "in_flight":
+                        # Too late to swap it, and queueing it too would send the product twice
+                        logger.info(f"Previous copy for {group_name} is being sent, dropping the better price")
+                        continue
+                    
+                    logger.info(
+                        f"Previous copy for {group_name} already sent, "
+                        f"queueing the better price as a new offer"
+                    )
+                
+                outcome = await self.queue_manager.add(
+                    connection_id=str(conn.id),
+                    group_name=group_name,
+                    text=monetized_text,
+                    min_interval_per_group=conn.min_interval_per_group,
+                    value=value,
+                    product_key=product_unique_id
+                )
+                
+                if outcome == "rejected":
+                    await self.offer_coalescer.forget(str(conn.id), group_name, product_unique_id)
+                    continue
+                
+                # Schedule for the next eligible send time
+                wait = await self.queue_manager.get_time_until_next_send(
+                    connection_id=str(conn.id),
+                    group_name=group_name,
+                    min_interval_per_group=conn.min_interval_per_group,
+                    min_interval_global=conn.min_interval_global
+                )
+                self.send_scheduler.schedule(str(conn.id), group_name, wait)
+                
                 logger.info(f"Queued message for {group_name} (connection: {conn.nickname})")
         
         except Exception as e:
@@ -474,171 +705,206 @@ class WhatsAppWorker:
         """
         Send queued messages with rate limiting.
         
-        Only processes connections with status='connected'.
+        Driven by SendScheduler: sleeps until the earliest next-eligible
+        send time and only touches (connection, group) pairs that are due.
+        The schedule is rebuilt from the Redis ready index on start and
+        resynced periodically (picks up messages queued by other workers).
         """
-        async with AsyncSessionLocal() as db:
-            connections = await self.get_active_connections(db)
-            
-            for conn in connections:
-                try:
-                    dest_groups = [g["name"] for g in conn.destination_groups]
-                    
-                    for group_name in dest_groups:
-                        # Check if we have queued messages
-                        if self.queue_manager.get_queue_size(group_name) == 0:
-                            continue
-                        
-                        # Check rate limit
-                        can_send = self.queue_manager.can_send(
-                            connection_id=str(conn.id),
-                            group_name=group_name,
-                            min_interval_per_group=conn.min_interval_per_group,
-                            min_interval_global=conn.min_interval_global
-                        )
-                        
-                        if not can_send:
-                            continue
-                        
-                        # Get message from queue
-                        msg = self.queue_manager.get_next(group_name)
-                        
-                        if not msg:
-                            continue
-                        
-                        # Send message
-                        result = await self.gateway.send_message(
-                            connection_id=str(conn.id),
-                            group_name=group_name,
-                            text=msg.text,
-                            wait_for_preview=True
-                        )
-                        
-                        if result["status"] == "sent":
-                            # Remove from queue
-                            self.queue_manager.pop(group_name)
-                            
-                            # Mark as sent
-                            self.queue_manager.mark_sent(
-                                connection_id=str(conn.id),
-                                group_name=group_name
-                            )
-                            
-                            logger.info(
-                                f"✓ Sent to {group_name} (preview: {result.get('preview_generated')}, "
-                                f"{result.get('duration_ms')}ms)"
-                            )
-                            
-                            # TODO: Save to OfferLog
-                        else:
-                            logger.error(f"Failed to send to {group_name}: {result.get('error')}")
+        last_resync = 0.0
+        
+        while self.running:
+            try:
+                if time.monotonic() - last_resync >= self.schedule_resync_interval:
+                    await self._resync_send_schedule()
+                    await self._export_queue_depth()
+                    last_resync = time.monotonic()
                 
-                except Exception as e:
-                    logger.error(f"Error in send cycle for {conn.id}: {e}", exc_info=True)
-                    continue
+                due = self.send_scheduler.pop_due()
+                if due:
+                    with track_duration(WORKER_CYCLE_SECONDS, cycle="send"):
+                        for conn_id, group_name in due:
+                            try:
+                                await self._send_next(conn_id, group_name)
+                            except Exception as e:
+                                logger.error(f"Error in send cycle for {conn_id}: {e}", exc_info=True)
+                                self.send_scheduler.schedule(conn_id, group_name, self.send_interval)
+                
+                await self.send_scheduler.wait(max_wait=self.schedule_resync_interval)
+            
+            except Exception as e:
+                logger.error(f"Send cycle error: {e}", exc_info=True)
+                await asyncio.sleep(self.send_interval)
     
+    async def _resync_send_schedule(self):
+        """Add queues found in the Redis ready index that are not scheduled yet."""
+        for conn_id, group_name, ready_at in await self.queue_manager.get_scheduled():
+            if (conn_id, group_name) not in self.send_scheduler:
+                self.send_scheduler.schedule_at(conn_id, group_name, ready_at)
     
-    # ========================================================================
-    # MAIN LOOP
-    # ========================================================================
+    async def _export_queue_depth(self):
+        """Refresh the per-connection queue depth gauge (drops connections with no queue)."""
+        depths = await self.queue_manager.get_depth_by_connection()
+        SEND_QUEUE_DEPTH.clear()
+        for conn_id, depth in depths.items():
+            SEND_QUEUE_DEPTH.labels(connection_id=conn_id).set(depth)
     
-    async def main_loop(self):
+    async def _send_next(self, conn_id: str, group_name: str):
         """
-        Main worker loop.
+        Send the next queued message for one (connection, group) pair.
         
-        Runs all processing cycles concurrently:
-        - login_cycle() - Process pending/qr_needed/connecting
-        - monitor_cycle() - Monitor messages (connected only)
-        - send_cycle() - Send queued messages (connected only)
+        Reschedules the pair for its next eligible time while it still
+        has queued messages. Only processes connections with status='connected'.
         """
-        logger.info("Starting main loop...")
+        async with self.session_factory() as db:
+            conn = await db.get(WhatsAppConnection, conn_id)
         
-        while self.running:
-            try:
-                # Run all cycles concurrently with exception handling
-                await asyncio.gather(
-                    self.login_cycle(),
-                    self.monitor_cycle(),
-                    self.send_cycle(),
-                    return_exceptions=True
+        if not conn or conn.status != "connected":
+            # Resync will pick it up again once the connection is back
+            return
+        
+        if group_name not in [g["name"] for g in conn.destination_groups]:
+            # Group was removed from the destinations: drop its queue so the
+            # ready index stops handing the pair back
+            dropped = await self.queue_manager.purge(conn_id, group_name)
+            self.send_scheduler.cancel(conn_id, group_name)
+            if dropped:
+                logger.info(f"Dropped {dropped} queued message(s) for removed group {group_name} ({conn.nickname})")
+            return
+        
+        # Check rate limit
+        wait = await self.queue_manager.get_time_until_next_send(
+            connection_id=conn_id,
+            group_name=group_name,
+            min_interval_per_group=conn.min_interval_per_group,
+            min_interval_global=conn.min_interval_global
+        )
+        
+        if wait > 0:
+            self.send_scheduler.schedule(conn_id, group_name, wait)
+            return
+        
+        # Lease: only one worker sends through a connection at a time
+        if not await self.queue_manager.claim_connection(conn_id):
+            self.send_scheduler.schedule(conn_id, group_name, self.send_interval)
+            return
+        
+        retry_in = None
+        
+        try:
+            # Daily quota (checked under the lease, so no other worker can race it)
+            quota_wait = await self.queue_manager.get_quota_wait(conn_id, conn.max_messages_per_day)
+            if quota_wait > 0:
+                logger.info(
+                    f"Daily quota reached for {conn.nickname} ({conn.max_messages_per_day}), "
+                    f"resuming in {quota_wait / 3600:.1f}h"
                 )
-                
-                # Small delay between cycles
-                await asyncio.sleep(1)
+                self.send_scheduler.schedule(conn_id, group_name, quota_wait)
+                return
             
-            except Exception as e:
-                logger.error(f"Main loop error: {e}", exc_info=True)
-                await asyncio.sleep(5)
-        
-        logger.info("Main loop stopped")
-    
-    async def cleanup_cycle(self):
-        """
-        Cleanup cycle - runs every hour to clear old queued messages.
-        """
-        while self.running:
+            # Take the head out of the queue while it is being sent
+            # (overflow and coalescer replacements can't touch it meanwhile)
+            msg = await self.queue_manager.take(conn_id, group_name)
+            
+            if not msg:
+                return
+            
+            # Send message
             try:
-                self.queue_manager.clear_old_queues(max_age_hours=24)
-                logger.info("Cleanup cycle completed")
+                result = await self.gateway.send_message(
+                    connection_id=conn_id,
+                    group_name=group_name,
+                    text=msg.text,
+                    wait_for_preview=True,
+                    input_mode=conn.input_mode or DEFAULT_INPUT_MODE
+                )
+            except Exception:
+                await self.queue_manager.requeue(conn_id, group_name)
+                raise
             
-            except Exception as e:
-                logger.error(f"Cleanup cycle error: {e}")
+            send_status = "sent" if result["status"] == "sent" else "error"
+            SENDS_TOTAL.labels(
+                status=send_status,
+                preview="yes" if result.get("preview_generated") else "no"
+            ).inc()
+            if result.get("duration_ms") is not None:
+                SEND_SECONDS.labels(status=send_status).observe(result["duration_ms"] / 1000)
             
-            # Run every hour
-            await asyncio.sleep(3600)
-
-
-
-# ============================================================================
-# GRACEFUL SHUTDOWN
-# ============================================================================
-
-worker_instance = None
-
-
-def handle_shutdown(signum, frame):
-    """Handle shutdown signals gracefully."""
-    logger.info(f"Received signal {signum}, initiating graceful shutdown...")
-    
-    if worker_instance:
-        asyncio.create_task(worker_instance.stop())
-        sys.exit(0)
-
-
-# ============================================================================
-# ENTRY POINT
-# ============================================================================
-
-async def main():
-    """Main entry point."""
-    global worker_instance
+            if result["status"] == "sent":
+                # Done with the in-flight message
+                await self.queue_manager.ack(conn_id, group_name)
+                
+                # Mark as sent
+                sent_today = await self.queue_manager.mark_sent(
+                    connection_id=conn_id,
+                    group_name=group_name,
+                    min_interval_per_group=conn.min_interval_per_group
+                )
+                await self._update_sent_today(conn.id, sent_today)
+                
+                logger.info(
+                    f"✓ Sent to {group_name} (preview: {result.get('preview_generated')} "
+                    f"in {result.get('preview_ms')}ms, {result.get('duration_ms')}ms, "
+                    f"typing: {result.get('input_mode')} {result.get('chars_per_second')} chars/s)"
+                )
+                
+                await self._save_offer_log(conn.id, group_name, msg.text, result)
+            else:
+                logger.error(f"Failed to send to {group_name}: {result.get('error')}")
+                await self.queue_manager.requeue(conn_id, group_name)
+                retry_in = self.send_interval
+        
+        finally:
+            await self.queue_manager.release_connection(conn_id)
+        
+        # Reschedule while there is still something queued
+        if await self.queue_manager.get_queue_size(conn_id, group_name) > 0:
+            if retry_in is None:
+                retry_in = await self.queue_manager.get_time_until_next_send(
+                    connection_id=conn_id,
+                    group_name=group_name,
+                    min_interval_per_group=conn.min_interval_per_group,
+                    min_interval_global=conn.min_interval_global
+                )
+            self.send_scheduler.schedule(conn_id, group_name, retry_in)
     
-    # Setup signal handlers
-    signal.signal(signal.SIGINT, handle_shutdown)
-    signal.signal(signal.SIGTERM, handle_shutdown)
     
-    # Create worker
-    worker_instance = WhatsAppWorker()
+    async def _update_sent_today(self, connection_id, sent_today: int):
+        """Mirror the Redis daily counter into WhatsAppConnection.messages_sent_today."""
+        try:
+            async with self.session_factory() as db:
+                await db.execute(
+                    update(WhatsAppConnection)
+                    .where(WhatsAppConnection.id == connection_id)
+                    .values(messages_sent_today=sent_today, last_activity_at=datetime.utcnow())
+                )
+                await db.commit()
+        except Exception as e:
+            logger.error(f"Failed to update messages_sent_today for {connection_id}: {e}")
     
-    try:
-        # Start worker
-        await worker_instance.start()
-        
-        # Run: main_loop + cleanup + Redis listener
-        await asyncio.gather(
-            worker_instance.main_loop(),
-            worker_instance.cleanup_cycle(),
-            worker_instance.redis_command_listener()  # NEW!
-        )
+    async def _save_offer_log(
+        self,
+        connection_id,
+        group_name: str,
+        text: str,
+        result: dict
+    ):
+        """Record a sent offer with the measured preview outcome."""
+        try:
+            async with self.session_factory() as db:
+                db.add(OfferLog(
+                    connection_id=connection_id,
+                    destination_group_name=group_name,
+                    monetized_text=text,
+                    preview_generated="yes" if result.get("preview_generated") else "no",
+                    preview_ms=result.get("preview_ms"),
+                    send_duration_ms=result.get("duration_ms")
+                ))
+                await db.commit()
+        except Exception as e:
+            logger.error(f"Failed to save OfferLog for {group_name}: {e}")
     
-    except KeyboardInterrupt:
-        logger.info("Keyboard interrupt received")
     
-    finally:
-        await worker_instance.stop()
-
-
-if __name__ == "__main__":
-    asyncio.run(main())    # ========================================================================
+    # ========================================================================
     # GROUP DISCOVERY - DOM-BASED HELPERS (NEW!)
     # ========================================================================
     
@@ -647,11 +913,11 @@ if __name__ == "__main__":
         Handle DISCOVER_GROUPS command - DOM scraping via aba "Grupos".
         
         Strategy:
-        1. Navigate to WhatsApp Web
+        1. Ensure WhatsApp Web is open (skip navigation if it already is)
         2. Click "Grupos" tab (filters only groups)
-        3. Scroll list multiple times to load all
-        4. Extract display_name via DOM for each group
-        5. Save to DB (UPSERT)
+        3. Scroll until the list stops growing, one page.evaluate per step
+           (extracts every visible row at once - see group_discovery)
+        4. Save all groups to DB with a single bulk UPSERT
         
         NO JID extraction - not needed in this version.
         """
@@ -659,7 +925,7 @@ if __name__ == "__main__":
         
         logger.info(f"🔍 DISCOVER_GROUPS: {conn_id}")
         
-        async with AsyncSessionLocal() as db:
+        async with self.session_factory() as db:
             from models.whatsapp_group import WhatsAppGroup
             from sqlalchemy.dialects.postgresql import insert
             
@@ -669,92 +935,56 @@ if __name__ == "__main__":
                 return
             
             try:
-                # Get Playwright page
-                context = await self.gateway.pool.get_or_create(conn_id)
-                page = context.pages[0]
-                
-                # Ensure we're on WhatsApp Web
-                await page.goto("https://web.whatsapp.com", wait_until="networkidle", timeout=60000)
-                
-                # 1. Try to click "Grupos" tab (optional)
-                try:
-                    groups_tab = await page.wait_for_selector(
-                        'button[aria-label*="Grupos"], button:has-text("Grupos")',
-                        timeout=10000
-                    )
-                    await groups_tab.click()
-                    await page.wait_for_timeout(1000)
-                    logger.info("✓ Clicked 'Grupos' tab")
-                except Exception as e:
-                    logger.warning(f"Could not click Grupos tab: {e}. Continuing with all chats...")
-                
-                # 2. Scroll to load all groups
-                chat_list_selector = '[data-testid="chat-list"]'
-                chat_list = await page.wait_for_selector(chat_list_selector, timeout=20000)
-                
-                logger.info("Scrolling to load all groups...")
-                for i in range(15):  # 15 scrolls
-                    await chat_list.evaluate("el => el.scrollBy(0, 1000)")
-                    await page.wait_for_timeout(500)
-                
-                # 3. Extract groups via DOM
-                groups = []
-                chat_items = await page.query_selector_all('[data-testid^="cell-frame-container"]')
-                
-                logger.info(f"Found {len(chat_items)} chat items, extracting groups...")
-                
-                for item in chat_items:
-                    try:
-                        # Check if it's a group (has group icon)
-                        is_group = await item.query_selector('[data-icon="group"]')
-                        if not is_group:
-                            continue  # Skip private chats
-                        
-                        # Extract group name
-                        title_el = await item.query_selector('[title]')
-                        if not title_el:
-                            continue
-                        
-                        display_name = await title_el.get_attribute('title')
-                        
-                        # Extract last message preview (optional)
-                        preview_el = await item.query_selector('.selectable-text')
-                        last_message_preview = None
-                        if preview_el:
-                            last_message_preview = await preview_el.text_content()
-                        
-                        groups.append({
-                            "display_name": display_name,
-                            "last_message_preview": last_message_preview[:200] if last_message_preview else None
-                        })
-                        
-                        # LOG: Show discovery in real-time
-                        logger.info(f"[DISCOVERY] {conn.nickname} → {display_name}")
+                async with self.gateway.pool.use(conn_id) as context:
+                    page = context.pages[0]
+                    
+                    # Ensure we're on WhatsApp Web
+                    if not page.url.startswith("https://web.whatsapp.com"):
+                        await page.goto("https://web.whatsapp.com", wait_until="networkidle", timeout=60000)
                     
+                    # 1. Try to click "Grupos" tab (optional)
+                    try:
+                        groups_tab = await page.wait_for_selector(
+                            'button[aria-label*="Grupos"], button:has-text("Grupos")',
+                            timeout=10000
+                        )
+                        await groups_tab.click()
+                        logger.info("✓ Clicked 'Grupos' tab")
                     except Exception as e:
-                        logger.error(f"Error extracting group: {e}")
-                        continue
+                        logger.warning(f"Could not click Grupos tab: {e}. Continuing with all chats...")
+                    
+                    # 2-3. Scroll until stable, extracting rows as we go
+                    groups = await collect_groups(page)
                 
-                # 4. Save to DB (UPSERT)
-                saved_count = 0
-                for g in groups:
-                    stmt = insert(WhatsAppGroup).values(
-                        connection_id=conn_id,
-                        display_name=g["display_name"],
-                        last_message_preview=g["last_message_preview"],
-                        last_sync_at=datetime.utcnow()
-                    ).on_conflict_do_update(
-                        index_elements=["connection_id", "display_name"],
-                        set_={
-                            "last_message_preview": g["last_message_preview"],
-                            "last_sync_at": datetime.utcnow()
-                        }
-                    )
-                    await db.execute(stmt)
-                    saved_count += 1
+                if not groups:
+                    logger.warning(f"No groups found for connection {conn.nickname}")
+                    return
+                
+                for display_name in groups:
+                    logger.info(f"[DISCOVERY] {conn.nickname} → {display_name}")
                 
+                # 4. Save to DB (single bulk UPSERT)
+                now = datetime.utcnow()
+                stmt = insert(WhatsAppGroup).values([
+                    {
+                        "connection_id": conn_id,
+                        "display_name": display_name,
+                        "last_message_preview": preview,
+                        "last_sync_at": now,
+                    }
+                    for display_name, preview in groups.items()
+                ])
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=["connection_id", "display_name"],
+                    set_={
+                        "last_message_preview": stmt.excluded.last_message_preview,
+                        "last_sync_at": stmt.excluded.last_sync_at
+                    }
+                )
+                await db.execute(stmt)
                 await db.commit()
-                logger.info(f"✓ Discovered and saved {saved_count} groups for connection {conn.nickname}")
+                
+                logger.info(f"✓ Discovered and saved {len(groups)} groups for connection {conn.nickname}")
             
             except Exception as e:
                 logger.error(f"Error in handle_discover_groups: {e}", exc_info=True)
@@ -768,7 +998,11 @@ if __name__ == "__main__":
         """
         Opens a group using WhatsApp Web search field.
         
-        Imitates human behavior:
+        Fast paths first (no typing, no fixed waits):
+        - Chat already open (header title matches) -> nothing to do
+        - Chat row visible in the list (name learned at discovery) -> click it
+        
+        Otherwise imitates human behavior:
         1. Click on search field
         2. Type group name
         3. Wait for results
@@ -786,6 +1020,15 @@ if __name__ == "__main__":
         import random
         
         try:
+            # 0. Fast paths: already open / row visible in chat list
+            if await is_chat_open(page, group_display_name):
+                logger.debug(f"Group already open: {group_display_name}")
+                return True
+            
+            if await open_chat_row(page, group_display_name):
+                logger.info(f"✓ Opened group from chat list: {group_display_name}")
+                return True
+            
             # 1. Focus on search field (top of chat list)
             search_selector = '[data-testid="chat-list-search"]'
             search_box = await page.wait_for_selector(search_selector, timeout=10000)
@@ -833,7 +1076,8 @@ if __name__ == "__main__":
         page,
         group_display_name: str,
         message_text: str,
-        wait_for_preview: bool = True
+        wait_for_preview: bool = True,
+        input_mode: str = DEFAULT_INPUT_MODE
     ) -> bool:
         """
         Sends message to group using search.
@@ -841,12 +1085,10 @@ if __name__ == "__main__":
         Human flow:
         1. Open group via search
         2. Click compose field
-        3. Type message (with link)
-        4. Wait for preview to load (2-3 seconds)
+        3. Type message (with link) using the connection's input mode
+        4. Wait for the link preview node (deadline, no fixed sleep)
         5. Click send
         """
-        import random
-        
         try:
             # 1. Open group
             if not await self.open_group_by_search(page, group_display_name):
@@ -857,21 +1099,25 @@ if __name__ == "__main__":
             compose_box = await page.wait_for_selector(compose_selector, timeout=10000)
             await compose_box.click()
             
-            # 3. Type message (slowly, like human)
-            lines = message_text.split('\n')
-            for i, line in enumerate(lines):
-                for char in line:
-                    await page.keyboard.type(char)
-                    await page.wait_for_timeout(random.randint(30, 100))
-                
-                # Enter for line break (except last)
-                if i < len(lines) - 1:
-                    await page.keyboard.press('Shift+Enter')
+            # 3. Type message (char / chunk / paste) and check what was composed
+            typing = await type_text(page, message_text, input_mode)
+            if not await verify_composed_text(compose_box, message_text):
+                await clear_compose_box(page, compose_box)
+                logger.error(f"Composed text mismatch for {group_display_name} (mode: {input_mode})")
+                return False
+            
+            logger.info(
+                f"Typed {len(message_text)} chars in {typing['typing_ms']}ms "
+                f"({typing['chars_per_second']} chars/s, mode={typing['input_mode']})"
+            )
             
             # 4. Wait for preview to load (if has link)
-            if wait_for_preview and ('http://' in message_text or 'https://' in message_text):
-                logger.info("Waiting for link preview to load...")
-                await page.wait_for_timeout(3000)  # 3 seconds for preview
+            if wait_for_preview and has_link(message_text):
+                preview = await wait_for_link_preview(page)
+                logger.info(
+                    f"Link preview {'ready' if preview['preview_generated'] else 'missing'} "
+                    f"after {preview['preview_ms']}ms"
+                )
             
             # 5. Send message
             send_button = '[data-testid="send"]'
@@ -887,5 +1133,167 @@ if __name__ == "__main__":
         except Exception as e:
             logger.error(f"Failed to send message to {group_display_name}: {e}")
             return False
+    
+    
+    # ========================================================================
+    # MAIN LOOP
+    # ========================================================================
+    
+    async def main_loop(self):
+        """
+        Main worker loop.
+        
+        Runs all processing cycles concurrently:
+        - login_cycle() - Process pending/qr_needed/connecting
+        - monitor_cycle() - Monitor messages (connected only)
+        - send_cycle() - Send queued messages when due (connected only)
+        """
+        logger.info("Starting main loop...")
+        
+        while self.running:
+            try:
+                # Run all cycles concurrently with exception handling
+                await asyncio.gather(
+                    self.login_cycle(),
+                    self.monitor_cycle(),
+                    self.send_cycle(),
+                    return_exceptions=True
+                )
+                
+                # Small delay between cycles
+                await asyncio.sleep(1)
+            
+            except Exception as e:
+                logger.error(f"Main loop error: {e}", exc_info=True)
+                await asyncio.sleep(5)
+        
+        logger.info("Main loop stopped")
+    
+    async def cleanup_cycle(self):
+        """
+        Cleanup cycle - runs every hour to clear old queued messages
+        and compact closed session profiles.
+        """
+        while self.running:
+            try:
+                await self.queue_manager.clear_old_queues(max_age_hours=24)
+                
+                if self.gateway.pool.max_live_contexts:
+                    logger.info(f"Context hibernation: {self.gateway.pool.get_hibernation_stats()}")
+                
+                # Prune regenerable Chromium caches of closed profiles
+                compaction = await self.gateway.pool.compact_sessions()
+                if compaction["sessions"]:
+                    logger.info(
+                        f"Compacted {compaction['sessions']} sessions "
+                        f"({compaction['reclaimed_bytes'] / (1024 * 1024):.1f}MB reclaimed)"
+                    )
+                
+                logger.info("Cleanup cycle completed")
+            
+            except Exception as e:
+                logger.error(f"Cleanup cycle error: {e}")
+            
+            # Run every hour
+            await asyncio.sleep(3600)
+    
+    async def telemetry_cycle(self):
+        """
+        Sample memory/CPU per browser context and recycle the ones over budget.
+        
+        Samples are exported to Redis (telemetry:whatsapp:{connection_id}).
+        Persistent contexts are checked against the RSS budget, shared ones
+        against the JS heap budget. Recycling holds the connection's send lease, so it only happens
+        between sends, and the pool skips contexts busy monitoring.
+        """
+        telemetry = ContextTelemetry(self.gateway.pool)
+        memory_budget_mb = settings.WHATSAPP_CONTEXT_MEMORY_BUDGET_MB
+        heap_budget_mb = settings.WHATSAPP_CONTEXT_HEAP_BUDGET_MB
+        interval = settings.WHATSAPP_TELEMETRY_INTERVAL
+        
+        while self.running:
+            try:
+                samples = await telemetry.sample()
+                
+                for conn_id, sample in samples.items():
+                    key = f"telemetry:whatsapp:{conn_id}"
+                    await redis_client.client.hset(key, mapping={
+                        k: "" if v is None else v for k, v in sample.items()
+                    })
+                    await redis_client.client.expire(key, interval * 3)
+                
+                for conn_id in telemetry.over_budget(memory_budget_mb, heap_budget_mb):
+                    field = BUDGET_FIELDS[samples[conn_id]["source"]]
+                    logger.warning(
+                        f"Context {conn_id} over memory budget "
+                        f"({field}: {samples[conn_id][field]}MB), recycling"
+                    )
+                    
+                    if not await self.queue_manager.claim_connection(conn_id):
+                        continue  # Sending right now, try again next sample
+                    
+                    try:
+                        await self.gateway.pool.recycle(conn_id)
+                    finally:
+                        await self.queue_manager.release_connection(conn_id)
+            
+            except Exception as e:
+                logger.error(f"Telemetry cycle error: {e}")
+            
+            await asyncio.sleep(interval)
+
 
 
+# ============================================================================
+# GRACEFUL SHUTDOWN
+# ============================================================================
+
+worker_instance = None
+
+
+def handle_shutdown(signum, frame):
+    """Handle shutdown signals gracefully."""
+    logger.info(f"Received signal {signum}, initiating graceful shutdown...")
+    
+    if worker_instance:
+        asyncio.create_task(worker_instance.stop())
+        sys.exit(0)
+
+
+# ============================================================================
+# ENTRY POINT
+# ============================================================================
+
+async def main():
+    """Main entry point."""
+    global worker_instance
+    
+    # Setup signal handlers
+    signal.signal(signal.SIGINT, handle_shutdown)
+    signal.signal(signal.SIGTERM, handle_shutdown)
+    
+    # Create worker
+    worker_instance = WhatsAppWorker()
+    
+    try:
+        # Start worker
+        await worker_instance.start()
+        profile_on_start("whatsapp_worker")
+        
+        # Run: main_loop + cleanup + telemetry + Redis listener
+        await asyncio.gather(
+            worker_instance.main_loop(),
+            worker_instance.cleanup_cycle(),
+            worker_instance.telemetry_cycle(),
+            worker_instance.redis_command_listener()  # NEW!
+        )
+    
+    except KeyboardInterrupt:
+        logger.info("Keyboard interrupt received")
+    
+    finally:
+        await worker_instance.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -34,6 +34,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from core.database import AsyncSessionLocal
 from core.redis_client import redis_client
+from core.profiler import profile_on_start
+from core.tracing import start_trace, span, trace_fields
 from models.user import User
 from models.offer import Offer
 from models.price_history import PriceHistory
@@ -259,13 +261,16 @@ async def process_message(message_data: dict) -> None:
         
         for group in destination_groups:
             # QUALITY GATE POR GRUPO (blacklist global + 24h window per group)
-            passes_gate = await apply_quality_gate(
-                db,
-                message.user_id,
-                parsed['store_slug'],
-                parsed['product_unique_id'],
-                group.destination_group_id  # Passa o ID do grupo!
-            )
+            with span("quality_gate", group=group.destination_group_id) as gate_span:
+                passes_gate = await apply_quality_gate(
+                    db,
+                    message.user_id,
+                    parsed['store_slug'],
+                    parsed['product_unique_id'],
+                    group.destination_group_id  # Passa o ID do grupo!
+                )
+                if gate_span:
+                    gate_span.set_attribute("passed", passes_gate)
             
             if not passes_gate:
                 logger.info(
@@ -273,23 +278,25 @@ async def process_message(message_data: dict) -> None:
                 )
                 continue
             
-            # Criar oferta processada para dispatch
-            processed_offer = ProcessedOffer(
-                user_id=message.user_id,
-                destination_group_id=group.destination_group_id,
-                destination_platform=group.platform,
-                product_unique_id=parsed['product_unique_id'],
-                monetized_url=monetized_url,
-                final_text=message.raw_text,  # Pode ser melhorado com IA no futuro
-                source_platform=message.source_platform,
-                source_group_id=message.source_group_id,
-                store_slug=parsed['store_slug'],
-                price_cents=parsed['price_cents']
-            )
-            
-            # RPUSH na fila do usuário
-            queue_key = f"queue:dispatch:user:{message.user_id}"
-            await redis.rpush(queue_key, processed_offer.model_dump_json())
+            with span("enqueue_dispatch", platform=group.platform):
+                # Criar oferta processada para dispatch (o envio continua o trace)
+                processed_offer = ProcessedOffer(
+                    user_id=message.user_id,
+                    destination_group_id=group.destination_group_id,
+                    destination_platform=group.platform,
+                    product_unique_id=parsed['product_unique_id'],
+                    monetized_url=monetized_url,
+                    final_text=message.raw_text,  # Pode ser melhorado com IA no futuro
+                    source_platform=message.source_platform,
+                    source_group_id=message.source_group_id,
+                    store_slug=parsed['store_slug'],
+                    price_cents=parsed['price_cents'],
+                    **trace_fields()
+                )
+                
+                # RPUSH na fila do usuário
+                queue_key = f"queue:dispatch:user:{message.user_id}"
+                await redis.rpush(queue_key, processed_offer.model_dump_json())
             
             enqueued_count += 1
             
@@ -322,6 +329,7 @@ async def worker_loop():
     
     # Conectar ao Redis
     await redis_client.connect()
+    profile_on_start("worker")
     redis = redis_client.client
     
     try:
@@ -336,8 +344,13 @@ async def worker_loop():
                     # Parsear JSON
                     message_data = json.loads(message_json)
                     
-                    # Processar mensagem
-                    await process_message(message_data)
+                    # Processar mensagem (continuando o trace da ingestão)
+                    with start_trace(
+                        "process_message",
+                        message_data.get("trace_id"),
+                        message_data.get("parent_span_id")
+                    ):
+                        await process_message(message_data)
                 
                 else:
                     # Timeout, nenhuma mensagem na fila